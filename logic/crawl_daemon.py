@@ -0,0 +1,266 @@
+"""
+서울시 매물 변동 감시 데몬
+동별 신규/삭제 매물 발생 빈도(churn)에 따라 재검색 주기를 조정하며 계속 실행
+
+- 변동이 잦은 동(예: 관악구 신림동)은 자주, 조용한 동은 드물게 재검색
+- 신규 매물은 상세 정보를 받아 JSONL 출력 스트림에 한 줄씩 추가 (removed 이벤트 포함)
+- 동별 상태(좌표, 알려진 item_id, 변동률)는 상태 파일에 저장되어 재시작 시 이어서 실행
+
+사용법:
+  python crawl_daemon.py
+  python crawl_daemon.py --output seoul_stream.jsonl --state daemon_state.json
+  python crawl_daemon.py --gu 관악구 --gu 마포구 --min-interval 300
+"""
+import argparse
+import heapq
+import json
+import os
+import time
+from datetime import datetime
+
+from search_all_seoul import (
+    SEOUL_DISTRICTS, iter_units, search_location, fetch_item_ids,
+    fetch_details, parse_item,
+)
+from map_filters import add_filter_arguments, filters_from_args, item_matches
+from profiling import add_profile_argument, start_profiling
+from map_tile_cache import add_map_cache_arguments, configure_map_cache
+
+
+class AreaState:
+    """동 하나의 재검색 상태"""
+
+    def __init__(self, gu: str, dong: str, data: dict = None):
+        data = data or {}
+        self.gu = gu
+        self.dong = dong
+        self.lat = data.get('lat')
+        self.lng = data.get('lng')
+        self.known_ids = set(data.get('known_ids', []))
+        self.rate = data.get('rate')  # 시간당 변동(신규+삭제) 건수 추정치
+        self.last_scan = data.get('last_scan')
+        self.next_scan = data.get('next_scan', 0.0)
+        self.scans = data.get('scans', 0)
+
+    @property
+    def key(self) -> str:
+        return f'{self.gu}/{self.dong}'
+
+    def to_dict(self) -> dict:
+        return {
+            'lat': self.lat,
+            'lng': self.lng,
+            'known_ids': sorted(self.known_ids),
+            'rate': self.rate,
+            'last_scan': self.last_scan,
+            'next_scan': self.next_scan,
+            'scans': self.scans,
+        }
+
+    def update_rate(self, events: int, now: float, alpha: float):
+        """관측된 변동 건수로 시간당 변동률(EWMA) 갱신"""
+        hours = max((now - self.last_scan) / 3600.0, 1e-3)
+        observed = events / hours
+        if self.rate is None:
+            self.rate = observed
+        else:
+            self.rate = alpha * observed + (1 - alpha) * self.rate
+
+    def schedule(self, now: float, target_events: float, min_interval: float, max_interval: float):
+        """다음 검색까지 평균 target_events 건의 변동이 쌓이도록 주기 결정"""
+        if self.rate is None:
+            # 아직 변동률을 모르면 빨리 한 번 더 관측
+            interval = min_interval
+        elif self.rate <= 0:
+            interval = max_interval
+        else:
+            interval = target_events / self.rate * 3600.0
+        interval = min(max(interval, min_interval), max_interval)
+        self.next_scan = now + interval
+        return interval
+
+
+class CrawlDaemon:
+    def __init__(self, areas: list, state_path: str, output_path: str,
+                 target_events: float = 3.0, min_interval: float = 600.0,
+                 max_interval: float = 6 * 3600.0, alpha: float = 0.3,
+                 pause: float = 0.5, emit_initial: bool = False, filters: dict = None):
+        self.state_path = state_path
+        self.output_path = output_path
+        self.target_events = target_events
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.alpha = alpha
+        self.pause = pause
+        self.emit_initial = emit_initial
+        self.filters = filters
+
+        saved = self._load_state()
+        self.areas = {}
+        for gu, dong in areas:
+            area = AreaState(gu, dong, saved.get(f'{gu}/{dong}'))
+            self.areas[area.key] = area
+
+        # 인접 동의 검색 범위가 겹치므로 item_id별로 몇 개 동에서 보이는지 관리
+        self.id_refs = {}
+        for area in self.areas.values():
+            for iid in area.known_ids:
+                self.id_refs[iid] = self.id_refs.get(iid, 0) + 1
+
+    def _load_state(self) -> dict:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('areas', {})
+
+    def save_state(self):
+        """상태 파일을 임시 파일로 쓴 뒤 교체 (중간에 종료되어도 손상되지 않음)"""
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'areas': {k: a.to_dict() for k, a in self.areas.items()}},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def emit(self, out, event: str, payload: dict):
+        record = {'event': event, 'ts': datetime.now().isoformat(timespec='seconds')}
+        record.update(payload)
+        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        out.flush()
+
+    def scan(self, area: AreaState, out) -> tuple:
+        """동 하나 재검색. (신규 수, 삭제 수) 반환"""
+        if area.lat is None:
+            location = search_location(f'서울 {area.gu} {area.dong}')
+            if not location:
+                raise ValueError('지역 못찾음')
+            area.lat, area.lng = location['lat'], location['lng']
+            time.sleep(self.pause)
+
+        now = time.time()
+        current = set(fetch_item_ids(area.lat, area.lng, radius_km=1.0,
+                                         filters=self.filters))
+        first_scan = area.last_scan is None
+        added = current - area.known_ids
+        removed = area.known_ids - current
+
+        # 다른 동에서 이미 알고 있는 매물은 신규로 내보내지 않음
+        fresh = sorted(iid for iid in added if iid not in self.id_refs)
+        details = []
+        if fresh and (self.emit_initial or not first_scan):
+            time.sleep(self.pause)
+            items = fetch_details(fresh)
+            parsed = [parse_item(it, area.gu, area.dong) for it in items]
+            # 상세 조회에 실패한(응답에 없는) 매물은 알려진 매물로 넣지 않아 다음 검색에서 다시 신규로 조회
+            returned = {int(p['item_id']) for p in parsed if p['item_id']}
+            missing = set(fresh) - returned
+            added -= missing
+            current -= missing
+            # 거래 유형(salesType)은 파싱 결과에 없으므로 원본 상세 정보로 조건 확인
+            details = [p for it, p in zip(items, parsed) if item_matches(it, self.filters)]
+
+        # 요청이 끝난 뒤에 상태 갱신 (실패 시 다음 검색에서 다시 비교)
+        for iid in added:
+            self.id_refs[iid] = self.id_refs.get(iid, 0) + 1
+        gone = []
+        for iid in removed:
+            self.id_refs[iid] -= 1
+            if self.id_refs[iid] <= 0:
+                del self.id_refs[iid]
+                gone.append(iid)
+
+        for p in details:
+            self.emit(out, 'new', p)
+        for iid in sorted(gone):
+            self.emit(out, 'removed', {'search_gu': area.gu, 'search_dong': area.dong,
+                                       'item_id': iid})
+
+        area.known_ids = current
+        if not first_scan:
+            area.update_rate(len(added) + len(removed), now, self.alpha)
+        area.last_scan = now
+        area.scans += 1
+        return len(added), len(removed)
+
+    def run(self, max_scans: int = 0):
+        heap = [(area.next_scan, key) for key, area in self.areas.items()]
+        heapq.heapify(heap)
+        scans = 0
+        print(f'데몬 시작: {len(self.areas)}개 동, 출력 {self.output_path}')
+
+        with open(self.output_path, 'a', encoding='utf-8') as out:
+            try:
+                while heap:
+                    due, key = heapq.heappop(heap)
+                    wait = due - time.time()
+                    if wait > 0:
+                        time.sleep(wait)
+
+                    area = self.areas[key]
+                    try:
+                        added, removed = self.scan(area, out)
+                        interval = area.schedule(time.time(), self.target_events,
+                                                 self.min_interval, self.max_interval)
+                        rate = f'{area.rate:.2f}/h' if area.rate is not None else '-'
+                        print(f'  {key}: +{added} -{removed} (변동률 {rate}, '
+                              f'다음 검색 {interval / 60:.0f}분 후)')
+                    except Exception as e:
+                        # 실패한 동은 최소 주기 후 재시도
+                        area.next_scan = time.time() + self.min_interval
+                        print(f'  {key}: ❌ 오류 - {e}')
+
+                    heapq.heappush(heap, (area.next_scan, key))
+                    self.save_state()
+                    scans += 1
+                    if max_scans and scans >= max_scans:
+                        break
+                    time.sleep(self.pause)
+            except KeyboardInterrupt:
+                print('\n중단 요청 - 상태 저장 후 종료합니다')
+            finally:
+                self.save_state()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='서울시 매물 변동 감시 데몬')
+    parser.add_argument('--output', default='seoul_stream.jsonl', help='신규/삭제 이벤트 JSONL 출력 파일')
+    parser.add_argument('--state', default='daemon_state.json', help='동별 상태 파일')
+    parser.add_argument('--gu', action='append', help='대상 구 (여러 번 지정 가능, 기본: 전체)')
+    parser.add_argument('--target-events', type=float, default=3.0,
+                        help='한 번 검색할 때 기대하는 변동 건수 (작을수록 자주 검색)')
+    parser.add_argument('--min-interval', type=float, default=600.0, help='동별 최소 재검색 주기(초)')
+    parser.add_argument('--max-interval', type=float, default=6 * 3600.0, help='동별 최대 재검색 주기(초)')
+    parser.add_argument('--emit-initial', action='store_true', help='첫 검색에서 발견한 매물도 신규로 출력')
+    parser.add_argument('--max-scans', type=int, default=0, help='지정한 횟수만큼 검색 후 종료 (0: 무한)')
+    add_filter_arguments(parser)
+    add_profile_argument(parser)
+    # 변동 감지가 늦어지지 않도록 이웃 동 타일은 짧게만 재사용
+    add_map_cache_arguments(parser, default_ttl=120.0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start_profiling(args.profile)
+    configure_map_cache(args)
+    if args.gu:
+        unknown = [gu for gu in args.gu if gu not in SEOUL_DISTRICTS]
+        if unknown:
+            print(f'❌ 알 수 없는 구: {", ".join(unknown)}')
+            return
+        areas = [(gu, dong) for gu, dong in iter_units() if gu in args.gu]
+    else:
+        areas = iter_units()
+
+    daemon = CrawlDaemon(
+        areas, args.state, args.output,
+        target_events=args.target_events,
+        min_interval=args.min_interval,
+        max_interval=args.max_interval,
+        emit_initial=args.emit_initial,
+        filters=filters_from_args(args),
+    )
+    daemon.run(max_scans=args.max_scans)
+
+
+if __name__ == '__main__':
+    main()
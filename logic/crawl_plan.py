@@ -0,0 +1,230 @@
+"""
+수집 계획(dry-run) 및 요청 지표 기록
+--plan 으로 실행하면 API를 호출하지 않고 작업 목록(동 / 격자 포인트 / 예상 상세 청크)을 만든 뒤
+이전 실행에서 기록한 지표로 요청 수, 전송량, 소요 시간을 추정
+
+- 지표 기록: 각 스크립트가 실제 실행 중 HTTP 응답마다 record_request() 호출
+  스크립트(scope)·API 종류(search / map / list / detail)별로
+  요청 수(재시도 포함), 논리 호출 수(첫 시도), 응답 시간, 응답 바이트, 받은 매물 수를 누적하여
+  종료 시 crawl_metrics.json (ZIGBANG_METRICS 환경 변수 또는 --metrics 로 변경)에 합산 저장
+- 추정: 단위(동, 격자 포인트)당 논리 호출 수 × 재시도 배율 × 평균 응답 시간 + 코드상 고정 대기 시간을
+  --plan-workers 개 워커로 나누고, --plan-rate(초당 최대 요청 수)가 있으면 그보다 빠를 수 없음
+- 지표가 없는 API는 DEFAULT_METRICS 값을 사용 (보고서에 '기본값'으로 표시)
+
+사용법:
+  python search_all_seoul.py --plan
+  python search_all_seoul.py --plan --plan-workers 4 --plan-rate 5
+  python -m logic.zigbang_grid_search 망원동 합정동 --plan --plan-out grid_plan.json
+"""
+import atexit
+import json
+import math
+import os
+import threading
+
+METRICS_PATH = os.environ.get('ZIGBANG_METRICS', 'crawl_metrics.json')
+FIELDS = ['requests', 'calls', 'seconds', 'bytes', 'items']
+DECAY_LIMIT = 5000  # 누적 요청 수가 이보다 많으면 이전 값을 줄여 최근 실행 비중을 높임
+
+# 지표가 없을 때 쓰는 API별 기본값 (논리 호출 1회 기준)
+DEFAULT_METRICS = {
+    'search': {'requests': 1.0, 'seconds': 0.15, 'bytes': 2000, 'items': 5},
+    'map': {'requests': 1.0, 'seconds': 0.4, 'bytes': 40000, 'items': 150},
+    'list': {'requests': 1.0, 'seconds': 0.6, 'bytes': 25000, 'items': 10},
+    'detail': {'requests': 1.0, 'seconds': 0.3, 'bytes': 15000, 'items': 1},
+}
+
+_recorder = None
+
+
+class MetricsRecorder:
+    def __init__(self, scope: str, path: str = None):
+        self.scope = scope
+        self.path = path or METRICS_PATH
+        self.stats = {}  # API 종류 → {필드: 값}
+        self.lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, nbytes: int, items: int = 0, attempt: int = 1):
+        with self.lock:
+            entry = self.stats.get(endpoint)
+            if entry is None:
+                entry = self.stats[endpoint] = dict.fromkeys(FIELDS, 0)
+            entry['requests'] += 1
+            entry['calls'] += 1 if attempt == 1 else 0
+            entry['seconds'] += seconds
+            entry['bytes'] += nbytes
+            entry['items'] += items
+
+    def save(self):
+        """이번 실행 지표를 파일의 기존 값에 합산 (임시 파일 + os.replace)"""
+        if not self.stats:
+            return
+        data = load_metrics(self.path)
+        scoped = data.setdefault(self.scope, {})
+        for endpoint, entry in self.stats.items():
+            old = scoped.get(endpoint) or dict.fromkeys(FIELDS, 0)
+            if old.get('requests') and old['requests'] + entry['requests'] > DECAY_LIMIT:
+                keep = max(DECAY_LIMIT - entry['requests'], 0) / old['requests']
+                old = {f: old.get(f, 0) * keep for f in FIELDS}
+            scoped[endpoint] = {f: old.get(f, 0) + entry[f] for f in FIELDS}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def load_metrics(path: str = None) -> dict:
+    try:
+        with open(path or METRICS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def start_recording(scope: str, path: str = None):
+    """이 프로세스의 요청 지표를 scope 이름으로 기록. 종료 시 자동 저장"""
+    global _recorder
+    if _recorder is not None:
+        return _recorder
+    _recorder = MetricsRecorder(scope, path)
+    atexit.register(_recorder.save)
+    return _recorder
+
+
+def record_request(endpoint: str, resp, items: int = 0, attempt: int = 1):
+    """HTTP 응답 하나를 기록. attempt가 1이면 새 논리 호출(청크, 검색어 등)로 셈"""
+    recorder = _recorder
+    if recorder is None or resp is None:
+        return
+    recorder.record(endpoint, resp.elapsed.total_seconds(), len(resp.content), items, attempt)
+
+
+def record_items(endpoint: str, items: int):
+    """record_request 후 응답을 해석해서 얻은 매물 수 추가"""
+    recorder = _recorder
+    if recorder is None:
+        return
+    with recorder.lock:
+        entry = recorder.stats.get(endpoint)
+        if entry is not None:
+            entry['items'] += items
+
+
+def endpoint_profile(metrics: dict, endpoint: str, default_requests: float = None) -> dict:
+    """논리 호출 1회당 {requests, seconds, bytes, items} 평균과 출처('기록'/'기본값')
+
+    default_requests: 지표가 없을 때 논리 호출 1회의 요청 수 (여러 파라미터 조합을 시도하는 경우 등)
+    """
+    entry = metrics.get(endpoint)
+    if not entry or not entry.get('calls') or not entry.get('requests'):
+        profile = dict(DEFAULT_METRICS[endpoint], source='기본값')
+        if default_requests:
+            profile['requests'] = default_requests
+        return profile
+    calls, requests = entry['calls'], entry['requests']
+    return {
+        'requests': requests / calls,
+        'seconds': entry['seconds'] / requests,
+        'bytes': entry['bytes'] / requests,
+        'items': entry['items'] / calls,
+        'source': f'기록 {int(calls)}회',
+    }
+
+
+def estimate(units: int, per_unit: dict, metrics: dict, unit_sleep: float = 0.0,
+             call_sleep: dict = None, workers: int = 1, rate: float = None,
+             default_requests: dict = None) -> dict:
+    """작업 단위 units개를 처리하는 데 필요한 요청 수, 바이트, 소요 시간 추정
+
+    per_unit: 단위당 API별 논리 호출 수 {'search': 1, 'map': 1, 'list': 3.2}
+    unit_sleep: 단위마다 코드에서 쉬는 시간, call_sleep: API별 논리 호출마다 쉬는 시간
+    default_requests: 지표가 없을 때 API별 논리 호출 1회의 요청 수
+    """
+    call_sleep = call_sleep or {}
+    default_requests = default_requests or {}
+    endpoints = {}
+    requests_total = bytes_total = serial = 0.0
+    for endpoint, calls_per_unit in per_unit.items():
+        profile = endpoint_profile(metrics, endpoint, default_requests.get(endpoint))
+        calls = units * calls_per_unit
+        requests = calls * profile['requests']
+        nbytes = requests * profile['bytes']
+        seconds = requests * profile['seconds'] + calls * call_sleep.get(endpoint, 0.0)
+        endpoints[endpoint] = {'calls': calls, 'requests': requests, 'bytes': nbytes,
+                               'seconds': seconds, 'source': profile['source']}
+        requests_total += requests
+        bytes_total += nbytes
+        serial += seconds
+    serial += units * unit_sleep
+
+    wall = serial / max(workers, 1)
+    rate_bound = requests_total / rate if rate else 0.0
+    return {
+        'units': units,
+        'endpoints': endpoints,
+        'requests': requests_total,
+        'bytes': bytes_total,
+        'serial_seconds': serial,
+        'wall_seconds': max(wall, rate_bound),
+        'rate_limited': rate_bound > wall,
+        'workers': workers,
+        'rate': rate,
+    }
+
+
+def list_calls_per_unit(metrics: dict, chunk_size: int, map_calls_per_unit: float = 1.0) -> float:
+    """단위당 상세(items/list) 청크 수. 이전 실행 비율이 있으면 사용 (중복 제거 효과 포함)"""
+    map_entry = metrics.get('map') or {}
+    list_entry = metrics.get('list') or {}
+    if map_entry.get('calls') and list_entry.get('calls'):
+        return list_entry['calls'] / map_entry['calls'] * map_calls_per_unit
+    ids = endpoint_profile(metrics, 'map')['items'] * map_calls_per_unit
+    return math.ceil(ids / chunk_size)
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f'{hours}시간 {minutes}분'
+    if minutes:
+        return f'{minutes}분 {secs}초'
+    return f'{secs}초'
+
+
+def print_plan(title: str, plan: dict):
+    print('=' * 60)
+    print(f'  수집 계획 (dry-run): {title}')
+    print('=' * 60)
+    print(f'작업 단위: {plan["units"]}개')
+    print(f'{"API":<8} {"논리 호출":>10} {"요청(재시도 포함)":>18} {"전송량":>10} {"시간":>12}  지표')
+    for endpoint, e in plan['endpoints'].items():
+        print(f'{endpoint:<8} {e["calls"]:>10.0f} {e["requests"]:>18.0f} '
+              f'{e["bytes"] / 1024 / 1024:>8.1f}MB {_format_duration(e["seconds"]):>12}  {e["source"]}')
+    print('-' * 60)
+    print(f'📊 총 요청 {plan["requests"]:.0f}회, 전송량 {plan["bytes"] / 1024 / 1024:.1f}MB')
+    print(f'   순차 실행 시간 {_format_duration(plan["serial_seconds"])} '
+          f'(고정 대기 시간 포함)')
+    limit = f', 초당 최대 {plan["rate"]:g}회' if plan['rate'] else ''
+    note = ' ← 요청 속도 제한이 병목' if plan['rate_limited'] else ''
+    print(f'   예상 소요 시간 {_format_duration(plan["wall_seconds"])} '
+          f'(워커 {plan["workers"]}개{limit}){note}')
+
+
+def save_plan(path: str, plan: dict, work: list):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'estimate': plan, 'work': work}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    print(f'   작업 목록 저장: {path}')
+
+
+def add_plan_arguments(parser):
+    parser.add_argument('--plan', action='store_true',
+                        help='API를 호출하지 않고 작업 목록과 요청 수/전송량/소요 시간 추정만 출력')
+    parser.add_argument('--plan-workers', type=int, default=1, help='추정에 사용할 동시 워커 수')
+    parser.add_argument('--plan-rate', type=float, help='추정에 사용할 초당 최대 요청 수 (전체 워커 합계)')
+    parser.add_argument('--plan-out', help='작업 목록과 추정 결과를 JSON으로 저장')
+    parser.add_argument('--metrics', default=METRICS_PATH,
+                        help='요청 지표 파일 (실행 시 기록, --plan 에서 사용)')
@@ -0,0 +1,206 @@
+"""
+중복 매물(같은 방을 여러 중개사가 각각 올린 경우) 탐지
+모든 매물 쌍을 비교하지 않고 블로킹(blocking)으로 후보를 좁힌 뒤 후보 쌍만 점수화
+
+1. 블록 키: (geohash 셀, 면적 버킷, 층, 서비스 유형)
+   셀 경계 근처 매물도 놓치지 않도록 주변 8개 셀과 인접 면적 버킷까지 후보로 봄
+2. 후보 쌍 점수: 거리, 면적, 보증금, 월세 유사도의 평균 (같은 동이어야 함)
+3. 점수가 기준 이상인 쌍을 union-find로 묶어 중복 클러스터 id 부여 (클러스터의 가장 작은 item_id)
+
+블록 크기가 작으므로 전체 스냅샷 기준 거의 선형 시간
+
+사용법:
+  python dedup.py seoul_data.zip
+  python dedup.py seoul_data/ --out dedup_clusters.csv --threshold 0.85
+"""
+import argparse
+import csv
+import math
+import sys
+import time
+
+from snapshot_diff import iter_snapshot_rows
+
+try:
+    import pygeohash as pgh
+except ImportError:
+    print("pygeohash 설치 필요: pip install pygeohash")
+    sys.exit(1)
+
+def geohash_cell_size(precision: int) -> tuple:
+    """(위도 폭, 경도 폭) 도 단위"""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def geohash_neighbors(lat: float, lng: float, precision: int = 7) -> list:
+    """자기 셀 포함 주변 9개 셀"""
+    dlat, dlng = geohash_cell_size(precision)
+    return list(dict.fromkeys(
+        pgh.encode(lat + i * dlat, lng + j * dlng, precision=precision)
+        for i in (-1, 0, 1) for j in (-1, 0, 1)
+    ))
+
+
+def distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """짧은 거리용 평면 근사 (m)"""
+    dy = (lat2 - lat1) * 111320.0
+    dx = (lng2 - lng1) * 111320.0 * math.cos(math.radians((lat1 + lat2) / 2))
+    return math.hypot(dx, dy)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while parent.get(x, x) != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # 작은 item_id를 대표로 유지
+            if rb < ra:
+                ra, rb = rb, ra
+            self.parent[rb] = ra
+
+
+class Listing:
+    __slots__ = ('item_id', 'lat', 'lng', 'size', 'floor', 'deposit', 'rent',
+                 'service_type', 'dong')
+
+    def __init__(self, row: dict):
+        self.item_id = int(row['item_id'])
+        self.lat = _to_float(row.get('lat'))
+        self.lng = _to_float(row.get('lng'))
+        self.size = _to_float(row.get('size_m2'))
+        self.floor = row.get('floor') or ''
+        self.deposit = _to_float(row.get('deposit'))
+        self.rent = _to_float(row.get('rent'))
+        self.service_type = row.get('service_type') or ''
+        self.dong = row.get('local3') or ''
+
+
+def _closeness(a, b, tolerance: float) -> float:
+    if a is None or b is None:
+        return 0.0
+    return max(0.0, 1.0 - abs(a - b) / tolerance)
+
+
+def pair_score(a: Listing, b: Listing, max_distance: float = 100.0) -> float:
+    """두 매물이 같은 방일 가능성 (0~1)"""
+    if a.dong != b.dong:
+        return 0.0
+    dist = distance_m(a.lat, a.lng, b.lat, b.lng)
+    scores = [
+        max(0.0, 1.0 - dist / max_distance),
+        _closeness(a.size, b.size, 2.0),
+        _closeness(a.deposit, b.deposit, max(50.0, 0.1 * max(a.deposit or 0, b.deposit or 0))),
+        _closeness(a.rent, b.rent, max(3.0, 0.1 * max(a.rent or 0, b.rent or 0))),
+    ]
+    return sum(scores) / len(scores)
+
+
+def _block_key(listing: Listing, cell: str, size_bucket: int) -> tuple:
+    return cell, size_bucket, listing.floor, listing.service_type
+
+
+def find_duplicates(listings: list, precision: int = 7, size_step: float = 2.0,
+                    threshold: float = 0.8) -> tuple:
+    """중복 클러스터 계산. ({item_id: 클러스터 id} (중복이 있는 매물만), 비교한 쌍 수) 반환"""
+    blocks = {}
+    for listing in listings:
+        if listing.lat is None or listing.lng is None or listing.size is None:
+            continue
+        cell = pgh.encode(listing.lat, listing.lng, precision=precision)
+        bucket = int(listing.size // size_step)
+        blocks.setdefault(_block_key(listing, cell, bucket), []).append(listing)
+
+    uf = UnionFind()
+    compared = 0
+    for listing in listings:
+        if listing.lat is None or listing.lng is None or listing.size is None:
+            continue
+        bucket = int(listing.size // size_step)
+        for cell in geohash_neighbors(listing.lat, listing.lng, precision):
+            for b in (bucket - 1, bucket, bucket + 1):
+                for other in blocks.get(_block_key(listing, cell, b), ()):
+                    # 각 쌍은 item_id가 작은 쪽에서 한 번만 비교
+                    if other.item_id <= listing.item_id:
+                        continue
+                    compared += 1
+                    if pair_score(listing, other) >= threshold:
+                        uf.union(listing.item_id, other.item_id)
+
+    clusters = {}
+    for item_id in uf.parent:
+        clusters[item_id] = uf.find(item_id)
+    for root in set(clusters.values()):
+        clusters[root] = root
+    return clusters, compared
+
+
+def load_listings(path: str) -> list:
+    """스냅샷에서 item_id별 첫 행만 Listing으로 변환"""
+    listings = []
+    seen = set()
+    for row in iter_snapshot_rows(path):
+        item_id = int(row['item_id'])
+        if item_id in seen:
+            continue
+        seen.add(item_id)
+        listings.append(Listing(row))
+    return listings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='중복 매물 탐지 (블로킹 + 쌍 점수)')
+    parser.add_argument('snapshot', help='스냅샷 (CSV 파일, 구별 CSV 폴더 또는 zip)')
+    parser.add_argument('--out', default='dedup_clusters.csv', help='클러스터 결과 CSV')
+    parser.add_argument('--threshold', type=float, default=0.8, help='중복 판정 점수 기준 (0~1)')
+    parser.add_argument('--precision', type=int, default=7, help='블록 geohash 자릿수 (7 ≈ 150m)')
+    parser.add_argument('--size-step', type=float, default=2.0, help='면적 버킷 크기 (m²)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.time()
+    listings = load_listings(args.snapshot)
+    clusters, compared = find_duplicates(listings, precision=args.precision,
+                                         size_step=args.size_step, threshold=args.threshold)
+    elapsed = time.time() - start
+
+    sizes = {}
+    for cluster_id in clusters.values():
+        sizes[cluster_id] = sizes.get(cluster_id, 0) + 1
+
+    with open(args.out, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['item_id', 'cluster_id', 'cluster_size'])
+        for item_id in sorted(clusters, key=lambda i: (clusters[i], i)):
+            writer.writerow([item_id, clusters[item_id], sizes[clusters[item_id]]])
+
+    duplicates = len(clusters) - len(sizes)
+    print(f'✅ 완료! {len(listings)}개 매물, 후보 쌍 {compared:,}개 비교 ({elapsed:.2f}초)')
+    print(f'   - 중복 클러스터: {len(sizes)}개 ({len(clusters)}개 매물)')
+    print(f'   - 중복 제거 후 매물 수: {len(listings) - duplicates}개')
+    print(f'   - 결과: {args.out}')
+
+
+if __name__ == '__main__':
+    main()
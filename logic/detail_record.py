@@ -0,0 +1,178 @@
+"""
+상세 API(/v3/items/{id}) 응답을 원본 바이트 그대로 들고 있다가 필요한 필드만 꺼내는 레코드
+
+- DetailRecord: 응답 바이트(raw)를 보관. 컬럼을 처음 읽을 때 한 번만 JSON을 해석하고,
+  컬럼 값(설명, 이미지, 주변 편의시설 등)은 요청된 것만 계산해 캐시
+- row()로 CSV용 전체 컬럼을 만든 뒤에는 해석한 트리와 캐시를 버리고 raw만 남김
+  (큰 배치에서 원본 트리 + 컬럼 dict를 함께 들고 있지 않음)
+- write_raw_json(): 원본 바이트를 재인코딩 없이 JSON 배열로 저장
+
+CPython에서는 순수 파이썬으로 JSON 일부만 건너뛰며 읽는 것이 json.loads(C 구현) 한 번보다 느리므로
+필드 단위가 아니라 레코드 단위로 해석을 미룸. CSV는 모든 컬럼(설명, 이미지, 편의시설 포함)을 쓰므로
+fetch_item_details의 CSV 경로는 레코드마다 한 번 전체를 해석함 (해석 비용은 줄지 않고,
+줄어드는 것은 JSON 재인코딩과 들고 있는 메모리). 일부 컬럼만 읽는 경우에만 컬럼 계산이 생략됨
+"""
+import json
+
+
+def _item(data):
+    return data.get('item') or {}
+
+
+def _join(values) -> str:
+    return ', '.join(values or [])
+
+
+def _location(data):
+    item = _item(data)
+    return item.get('location') or item.get('randomLocation') or {}
+
+
+def _sub(section: str, key: str):
+    return lambda data: (_item(data).get(section) or {}).get(key)
+
+
+def _field(key: str, default=None):
+    return lambda data: _item(data).get(key, default)
+
+
+def _top(section: str, key: str):
+    return lambda data: (data.get(section) or {}).get(key)
+
+
+def _description(data) -> str:
+    text = _item(data).get('description')
+    return text[:500] if text else ''  # 500자 제한
+
+
+def _subways(data) -> str:
+    return ', '.join(f"{s.get('name', '')}({s.get('description', '')})" for s in data.get('subways') or [])
+
+
+def _amenities(data) -> str:
+    neighborhoods = _item(data).get('neighborhoods') or {}
+    return ', '.join(a.get('title', '') for a in neighborhoods.get('amenities') or [])
+
+
+# CSV 컬럼 → 해석된 응답에서 값을 꺼내는 함수 (순서 = CSV 컬럼 순서)
+COLUMNS = {
+    # 기본 정보
+    'item_id': _field('itemId'),
+    'sales_type': _field('salesType'),  # 월세, 전세, 매매
+    'service_type': _field('serviceType'),  # 원룸, 오피스텔 등
+    'room_type': _field('roomType'),  # 분리형원룸 등
+    'residence_type': _field('residenceType'),  # 단독주택, 다세대 등
+    'status': _field('status'),
+    # 가격 정보 (만원)
+    'deposit': _sub('price', 'deposit'),
+    'rent': _sub('price', 'rent'),
+    # 면적 / 층
+    'area_m2': _sub('area', '전용면적M2'),
+    'floor': _sub('floor', 'floor'),
+    'all_floors': _sub('floor', 'allFloors'),
+    # 관리비
+    'manage_cost': _sub('manageCost', 'amount'),
+    'manage_cost_includes': lambda data: _join((_item(data).get('manageCost') or {}).get('includes')),
+    'manage_cost_not_includes': lambda data: _join((_item(data).get('manageCost') or {}).get('notIncludes')),
+    # 주소
+    'local1': lambda data: (_item(data).get('addressOrigin') or {}).get('local1', ''),
+    'local2': lambda data: (_item(data).get('addressOrigin') or {}).get('local2', ''),
+    'local3': lambda data: (_item(data).get('addressOrigin') or {}).get('local3', ''),
+    'full_address': lambda data: (_item(data).get('addressOrigin') or {}).get('fullText', ''),
+    'jibun_address': _field('jibunAddress', ''),
+    # 위치 (좌표)
+    'lat': lambda data: _location(data).get('lat'),
+    'lng': lambda data: _location(data).get('lng'),
+    # 제목 및 설명
+    'title': _field('title'),
+    'description': _description,
+    # 옵션
+    'options': lambda data: _join(_item(data).get('options')),
+    # 기타 정보
+    'room_direction': _field('roomDirection'),  # 방향 (S, N, E, W 등)
+    'direction_criterion': _field('directionCriterion'),
+    'parking': _field('parkingAvailableText'),
+    'elevator': _field('elevator'),
+    'bathroom_count': _field('bathroomCount'),
+    'movein_date': _field('moveinDate'),
+    'approve_date': _field('approveDate'),
+    # 지하철 / 주변 편의시설
+    'subways': _subways,
+    'amenities': _amenities,
+    # 중개사 정보
+    'agent_name': _top('agent', 'agentName'),
+    'agent_title': _top('agent', 'agentTitle'),
+    'agent_phone': _top('agent', 'agentPhone'),
+    'agent_address': _top('agent', 'agentAddress'),
+    # 태그
+    'tags': lambda data: _join(data.get('tags')),
+    # 이미지
+    'thumbnail': _field('imageThumbnail'),
+    'images': lambda data: _join((_item(data).get('images') or [])[:5]),  # 최대 5개
+    # 메타 정보
+    'updated_at': _field('updatedAt'),
+    'is_premium': _field('isPremium'),
+}
+
+
+def detail_row(data: dict) -> dict:
+    """해석된 상세 응답 → CSV 한 행"""
+    return {name: getter(data) for name, getter in COLUMNS.items()}
+
+
+def looks_complete(raw: bytes) -> bool:
+    """해석하지 않고 잘린 응답인지만 확인 (JSON 객체는 '}' 로 끝나야 함)"""
+    raw = raw.strip()
+    return raw[:1] == b'{' and raw[-1:] == b'}'
+
+
+class DetailRecord:
+    __slots__ = ('item_id', 'raw', '_data', '_values')
+
+    def __init__(self, item_id: int, raw: bytes):
+        self.item_id = item_id
+        self.raw = raw
+        self._data = None
+        self._values = {}
+
+    @property
+    def data(self) -> dict:
+        """해석된 전체 응답 (처음 접근할 때 한 번 json.loads)"""
+        if self._data is None:
+            self._data = json.loads(self.raw)
+        return self._data
+
+    def __getitem__(self, name: str):
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        value = self._values[name] = COLUMNS[name](self.data)
+        return value
+
+    def get(self, name: str, default=None):
+        if name not in COLUMNS:
+            return default
+        return self[name]
+
+    def row(self) -> dict:
+        """CSV용 전체 컬럼. 만든 뒤 해석된 트리와 컬럼 캐시는 버림 (raw는 유지)"""
+        row = {name: self[name] for name in COLUMNS}
+        self.release()
+        return row
+
+    def release(self):
+        """해석된 트리와 계산한 컬럼 값을 버리고 raw만 남김"""
+        self._data = None
+        self._values = {}
+
+
+def write_raw_json(records: list, filename: str):
+    """원본 응답 바이트를 그대로 이어 붙여 JSON 배열로 저장 (재인코딩 없음)"""
+    with open(filename, 'wb') as f:
+        f.write(b'[\n')
+        for i, record in enumerate(records):
+            if i:
+                f.write(b',\n')
+            f.write(record.raw.strip())
+        f.write(b'\n]\n')
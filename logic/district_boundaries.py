@@ -0,0 +1,308 @@
+"""
+구/동 경계 폴리곤 기준 매물 귀속
+search_all_seoul 은 매물을 처음 찾은 동(동 중심 1km 상자)에 귀속시키므로 구 경계 근처 매물이
+이웃 구 CSV에 섞임 → 매물 좌표가 실제로 들어 있는 법정동 폴리곤으로 search_gu / search_dong 을 다시 지정
+
+경계 데이터는 저장소에 포함하지 않음. 법정동 경계 GeoJSON(Polygon / MultiPolygon, WGS84)을 받아 사용
+  - 속성 이름: adm_nm("서울특별시 종로구 사직동"), sggnm / SIG_KOR_NM(구), EMD_KOR_NM / EMD_NM(동) 등
+  - 구 이름이 없으면 EMD_CD / SIG_CD 앞 5자리 시군구 코드로 구 이름을 찾음
+  - 다른 속성 이름은 --gu-key / --dong-key 로 지정
+
+격자 인덱스 (BoundaryIndex):
+  - 경계 범위를 cells × cells 격자로 나누고 폴리곤 변이 지나가는 칸을 표시
+  - 변이 지나가지 않는 칸은 칸 전체가 한 폴리곤 안(또는 밖)이므로 조회 시 폴리곤 판정 없이 바로 결정
+  - 변이 지나가는 칸만 후보 폴리곤의 같은 행 변들로 ray casting (폴리곤 전체 변을 보지 않음)
+
+사용법:
+  python district_boundaries.py seoul_data.zip --boundaries seoul_dong.geojson
+  python district_boundaries.py seoul_data/ --boundaries seoul_dong.geojson --out attributed.csv
+  python search_all_seoul.py --boundaries seoul_dong.geojson      # 수집 중 매물을 폴리곤 기준 구/동에 귀속
+"""
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+
+from snapshot_diff import iter_snapshot_rows
+
+# 시군구 코드 → 서울 구 이름 (법정동 코드 앞 5자리)
+SIG_CODES = {
+    '11110': '종로구', '11140': '중구', '11170': '용산구', '11200': '성동구', '11215': '광진구',
+    '11230': '동대문구', '11260': '중랑구', '11290': '성북구', '11305': '강북구', '11320': '도봉구',
+    '11350': '노원구', '11380': '은평구', '11410': '서대문구', '11440': '마포구', '11470': '양천구',
+    '11500': '강서구', '11530': '구로구', '11545': '금천구', '11560': '영등포구', '11590': '동작구',
+    '11620': '관악구', '11650': '서초구', '11680': '강남구', '11710': '송파구', '11740': '강동구',
+}
+
+GU_KEYS = ['sggnm', 'SIG_KOR_NM', 'sgg_nm', 'gu']
+DONG_KEYS = ['EMD_KOR_NM', 'EMD_NM', 'emd_nm', 'dong']
+FULL_NAME_KEYS = ['adm_nm', 'ADM_NM', 'full_nm']
+CODE_KEYS = ['EMD_CD', 'SIG_CD', 'adm_cd2', 'sgg', 'code']
+
+
+def _first(props: dict, keys: list):
+    for key in keys:
+        value = props.get(key)
+        if value not in (None, ''):
+            return str(value)
+    return None
+
+
+def region_names(props: dict, gu_key: str = None, dong_key: str = None) -> tuple:
+    """GeoJSON 속성 → (구, 동). 알 수 없으면 None"""
+    gu = _first(props, [gu_key] if gu_key else GU_KEYS)
+    dong = _first(props, [dong_key] if dong_key else DONG_KEYS)
+    full = _first(props, FULL_NAME_KEYS)
+    if full:
+        parts = full.split()
+        if not dong and parts:
+            dong = parts[-1]
+        if not gu and len(parts) >= 3:
+            gu = parts[-2]
+    if not gu:
+        code = _first(props, CODE_KEYS)
+        gu = SIG_CODES.get(code[:5]) if code else None
+    return gu, dong
+
+
+def _rings(geometry: dict) -> list:
+    """Polygon / MultiPolygon → 모든 링(외곽선, 구멍)의 [(lng, lat), ...] 목록"""
+    kind = (geometry or {}).get('type')
+    coords = (geometry or {}).get('coordinates') or []
+    polygons = [coords] if kind == 'Polygon' else coords if kind == 'MultiPolygon' else []
+    return [[(float(p[0]), float(p[1])) for p in ring] for polygon in polygons for ring in polygon if len(ring) >= 3]
+
+
+def load_boundaries(path: str, gu_key: str = None, dong_key: str = None) -> list:
+    """GeoJSON FeatureCollection → [{'gu', 'dong', 'rings'}] (이름을 알 수 없는 폴리곤은 제외)"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        data = json.load(f)
+    regions = []
+    for feature in data.get('features') or []:
+        gu, dong = region_names(feature.get('properties') or {}, gu_key, dong_key)
+        rings = _rings(feature.get('geometry'))
+        if gu and dong and rings:
+            regions.append({'gu': gu, 'dong': dong, 'rings': rings})
+    return regions
+
+
+class BoundaryIndex:
+    """폴리곤 목록의 격자 인덱스. locate(lat, lng) → 폴리곤 번호 또는 None"""
+
+    def __init__(self, regions: list, cells: int = 256):
+        self.regions = regions
+        xs = [x for r in regions for ring in r['rings'] for x, _ in ring]
+        ys = [y for r in regions for ring in r['rings'] for _, y in ring]
+        if not xs:
+            raise ValueError('경계 폴리곤이 없습니다')
+        self.x0, self.y0 = min(xs), min(ys)
+        self.nx = self.ny = cells
+        # 최댓값 좌표도 마지막 칸에 들어가도록 약간 넓힘
+        self.dx = (max(xs) - self.x0) / cells * 1.000001 or 1e-9
+        self.dy = (max(ys) - self.y0) / cells * 1.000001 or 1e-9
+        # 폴리곤별 행 번호 → 그 행(y 구간)에 걸친 변 (x1, y1, x2, y2) 목록
+        self.row_edges = [{} for _ in regions]
+        self.cells = self._build()
+
+    def _build(self) -> list:
+        nx, ny, x0, y0, dx, dy = self.nx, self.ny, self.x0, self.y0, self.dx, self.dy
+        touched = {}  # 칸 번호 → 변이 지나가는 폴리곤 번호 집합
+        for r, region in enumerate(self.regions):
+            rows = self.row_edges[r]
+            for ring in region['rings']:
+                for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+                    if x1 == x2 and y1 == y2:
+                        continue
+                    edge = (x1, y1, x2, y2)
+                    ya, yb = (y1, y2) if y1 < y2 else (y2, y1)
+                    row_lo = int((ya - y0) / dy)
+                    row_hi = min(int((yb - y0) / dy), ny - 1)
+                    for row in range(row_lo, row_hi + 1):
+                        rows.setdefault(row, []).append(edge)
+                        # 이 행 안에 들어오는 선분 부분의 x 범위 → 변이 지나가는 칸
+                        if row_lo == row_hi:
+                            xa, xb = x1, x2
+                        else:
+                            lo, hi = max(ya, y0 + row * dy), min(yb, y0 + (row + 1) * dy)
+                            xa = x1 + (lo - y1) * (x2 - x1) / (y2 - y1)
+                            xb = x1 + (hi - y1) * (x2 - x1) / (y2 - y1)
+                        if xa > xb:
+                            xa, xb = xb, xa
+                        base = row * nx
+                        for col in range(int((xa - x0) / dx), min(int((xb - x0) / dx), nx - 1) + 1):
+                            regions = touched.get(base + col)
+                            if regions is None:
+                                touched[base + col] = {r}
+                            else:
+                                regions.add(r)
+
+        # 행 중심선과 변의 교점으로 각 칸 중심이 어느 폴리곤 안인지 한 행씩 계산 (scanline)
+        cells = [None] * (nx * ny)
+        for row in range(ny):
+            yc = y0 + (row + 0.5) * dy
+            inside = {}  # 칸 번호 → 중심을 포함하는 폴리곤
+            for r, rows in enumerate(self.row_edges):
+                edges = rows.get(row)
+                if not edges:
+                    continue
+                xs = sorted(x1 + (yc - y1) * (x2 - x1) / (y2 - y1)
+                            for x1, y1, x2, y2 in edges if (y1 <= yc) != (y2 <= yc))
+                for xa, xb in zip(xs[::2], xs[1::2]):
+                    col_lo = max(int(math.ceil((xa - x0) / dx - 0.5)), 0)
+                    col_hi = min(int(math.floor((xb - x0) / dx - 0.5)), nx - 1)
+                    for col in range(col_lo, col_hi + 1):
+                        inside.setdefault(row * nx + col, r)
+            for col in range(nx):
+                cell = row * nx + col
+                regions = touched.get(cell)
+                if regions is None:
+                    # 변이 지나가지 않는 칸: 칸 전체가 중심과 같은 폴리곤 안 (또는 모든 폴리곤 밖)
+                    cells[cell] = inside.get(cell)
+                else:
+                    # 경계 칸: 변이 지나가는 폴리곤 + 칸을 감싸는 폴리곤이 후보
+                    if cell in inside:
+                        regions = regions | {inside[cell]}
+                    cells[cell] = tuple(sorted(regions))
+        return cells
+
+    def contains(self, r: int, x: float, y: float, row: int) -> bool:
+        """(x, y)가 폴리곤 r 안인지 (even-odd, row 행의 변만 확인)"""
+        inside = False
+        for x1, y1, x2, y2 in self.row_edges[r].get(row, ()):
+            if (y1 <= y) != (y2 <= y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+        return inside
+
+    def locate(self, lat: float, lng: float):
+        """좌표가 들어 있는 폴리곤 번호 (어느 폴리곤에도 없으면 None)"""
+        return self.locate_many([(lat, lng)])[0]
+
+    def locate_many(self, points) -> list:
+        """(lat, lng) 목록 → 폴리곤 번호 목록. 대부분의 점은 칸 조회만으로 결정됨"""
+        x0, y0, dx, dy, nx, ny = self.x0, self.y0, self.dx, self.dy, self.nx, self.ny
+        cells, contains = self.cells, self.contains
+        result = []
+        append = result.append
+        for lat, lng in points:
+            fx, fy = (lng - x0) / dx, (lat - y0) / dy
+            if not (0 <= fx < nx and 0 <= fy < ny):
+                append(None)
+                continue
+            row = int(fy)
+            cell = cells[row * nx + int(fx)]
+            if cell is None or cell.__class__ is int:
+                append(cell)
+                continue
+            for r in cell:
+                if contains(r, lng, lat, row):
+                    append(r)
+                    break
+            else:
+                append(None)
+        return result
+
+    def names(self, r) -> tuple:
+        if r is None:
+            return None, None
+        region = self.regions[r]
+        return region['gu'], region['dong']
+
+
+def load_index(path: str, gu_key: str = None, dong_key: str = None, cells: int = 256) -> BoundaryIndex:
+    return BoundaryIndex(load_boundaries(path, gu_key, dong_key), cells)
+
+
+def _coords(row: dict):
+    try:
+        lat, lng = float(row['lat']), float(row['lng'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return (lat, lng) if lat == lat and lng == lng else None
+
+
+def attribute(rows: list, index: BoundaryIndex) -> int:
+    """rows의 search_gu / search_dong 을 좌표가 들어 있는 폴리곤의 구/동으로 바꾸고 바뀐 행 수 반환
+    (좌표가 없거나 모든 폴리곤 밖인 매물은 검색한 동 그대로 유지)"""
+    located = [(row, _coords(row)) for row in rows]
+    found = index.locate_many(c for _, c in located if c)
+    regions = iter(found)
+    changed = 0
+    for row, c in located:
+        if not c:
+            continue
+        gu, dong = index.names(next(regions))
+        if gu is None:
+            continue
+        if (row.get('search_gu'), row.get('search_dong')) != (gu, dong):
+            row['search_gu'], row['search_dong'] = gu, dong
+            changed += 1
+    return changed
+
+
+def add_boundary_arguments(parser):
+    parser.add_argument('--boundaries', help='법정동 경계 GeoJSON (매물을 좌표가 속한 구/동에 귀속)')
+    parser.add_argument('--gu-key', help='GeoJSON에서 구 이름 속성 (기본: 자동)')
+    parser.add_argument('--dong-key', help='GeoJSON에서 동 이름 속성 (기본: 자동)')
+
+
+def index_from_args(args):
+    """--boundaries 가 있으면 BoundaryIndex, 없으면 None"""
+    if not args.boundaries:
+        return None
+    start = time.time()
+    index = load_index(args.boundaries, args.gu_key, args.dong_key)
+    print(f'경계 폴리곤 {len(index.regions)}개 로드 ({time.time() - start:.2f}초)')
+    return index
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='매물 좌표 기준 구/동 폴리곤 귀속')
+    parser.add_argument('snapshot', help='스냅샷 (CSV 파일, 구별 CSV 폴더 또는 zip)')
+    add_boundary_arguments(parser)
+    parser.add_argument('--out', default='zigbang_attributed.csv', help='결과 CSV')
+    args = parser.parse_args()
+    if not args.boundaries:
+        parser.error('--boundaries 가 필요합니다')
+    return args
+
+
+def main():
+    args = parse_args()
+    index = index_from_args(args)
+    if not index.regions:
+        print(f'❌ 구/동 이름이 있는 폴리곤을 찾을 수 없습니다: {args.boundaries} (--gu-key / --dong-key 확인)')
+        sys.exit(1)
+
+    seen, rows = set(), []
+    for row in iter_snapshot_rows(args.snapshot):
+        if row['item_id'] not in seen:
+            seen.add(row['item_id'])
+            rows.append(row)
+    before = {row['item_id']: row.get('search_gu') for row in rows}
+
+    start = time.time()
+    changed = attribute(rows, index)
+    elapsed = time.time() - start
+
+    moved = {}
+    for row in rows:
+        old = before[row['item_id']]
+        if old != row.get('search_gu'):
+            key = (old, row.get('search_gu'))
+            moved[key] = moved.get(key, 0) + 1
+
+    with open(args.out, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else [], extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f'✅ 완료! 매물 {len(rows)}개 중 {changed}개 구/동 변경 ({elapsed:.2f}초)')
+    for (old, new), count in sorted(moved.items(), key=lambda kv: -kv[1])[:10]:
+        print(f'   {old} → {new}: {count}개')
+    print(f'   - 결과: {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+API 장애 시나리오 실행기
+mock_api.py 목업 서버에 시나리오별 장애를 걸어 두고 각 수집 경로의 재시도 동작을 측정
+
+측정 대상:
+- search_all_seoul.fetch_details          (items/list, 10개씩)
+- zigbang_map_to_details.fetch_details_by_ids (items/list, 15개씩)
+- fetch_item_details.py main              (v3/items/{id}, 1개씩, 별도 프로세스로 실행)
+
+지표:
+- 손실률: 요청한 item_id 중 결과에 없는 비율
+- goodput: 초당 받은 매물 수
+- 재시도 배율: 서버가 받은 요청 수 / 장애가 없을 때 필요한 최소 요청 수
+- 대기 비율: 전체 시간 중 time.sleep으로 보낸 비율 (같은 프로세스에서 실행한 경로만)
+- 예산 거부/브레이커: 재시도 예산이 거부한 재시도 수, 종료 시 브레이커 상태 (resilience 사용 경로만)
+  시나리오마다 resilience.configure()로 브레이커와 재시도 예산을 새로 시작
+
+사용법:
+  python fault_scenarios.py
+  python fault_scenarios.py --snapshot seoul_data.zip --items 60 --scenario 429_bursts --scenario drops
+  python fault_scenarios.py --json fault_report.json
+"""
+import argparse
+import contextlib
+import csv
+import glob
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import resilience
+from mock_api import MockData, MockServer
+import search_all_seoul
+import zigbang_map_to_details
+
+SCENARIOS = {
+    'baseline': {},
+    '429_bursts': {'burst_every': 6, 'burst_len': 3},
+    'slow': {'slow_rate': 0.3, 'slow_seconds': 2.0},
+    'drops': {'drop_rate': 0.2},
+    'malformed': {'malformed_rate': 0.2},
+    'partial': {'partial_rate': 0.3},
+    'mixed': {'burst_every': 10, 'burst_len': 2, 'drop_rate': 0.1, 'malformed_rate': 0.1,
+              'error_rate': 0.05, 'slow_rate': 0.1, 'slow_seconds': 1.0},
+}
+
+
+class SleepMeter:
+    """time.sleep 호출 시간을 합산 (실제로도 잠)"""
+
+    def __init__(self):
+        self.total = 0.0
+        self._original = time.sleep
+
+    def __enter__(self):
+        def sleep(seconds):
+            self.total += seconds
+            self._original(seconds)
+        time.sleep = sleep
+        return self
+
+    def __exit__(self, *exc):
+        time.sleep = self._original
+
+
+def _item_ids(items: list) -> set:
+    ids = set()
+    for item in items:
+        iid = item.get('item_id') or item.get('id') or item.get('itemId')
+        if iid is not None:
+            ids.add(int(iid))
+    return ids
+
+
+def run_fetch_details(server: MockServer, item_ids: list) -> dict:
+    search_all_seoul.API_BASE = server.url
+    with SleepMeter() as meter, contextlib.redirect_stdout(io.StringIO()):
+        start = time.time()
+        try:
+            items = search_all_seoul.fetch_details(item_ids, chunk_size=10)
+        except resilience.CircuitOpenError:
+            items = []  # 브레이커가 열려 중단 (breaker_state로 보고)
+        elapsed = time.time() - start
+    return {'received': _item_ids(items), 'elapsed': elapsed, 'slept': meter.total,
+            'endpoint': 'list', 'min_requests': math.ceil(len(item_ids) / 10),
+            'budget_denied': resilience.budget.denied,
+            'breaker_state': resilience.get_breaker('list').state}
+
+
+def run_fetch_details_by_ids(server: MockServer, item_ids: list) -> dict:
+    zigbang_map_to_details.API_BASE = server.url
+    with SleepMeter() as meter, contextlib.redirect_stdout(io.StringIO()):
+        start = time.time()
+        items = zigbang_map_to_details.fetch_details_by_ids(item_ids, chunk_size=15)
+        elapsed = time.time() - start
+    return {'received': _item_ids(items), 'elapsed': elapsed, 'slept': meter.total,
+            'endpoint': 'list', 'min_requests': math.ceil(len(item_ids) / 15)}
+
+
+def run_fetch_item_details(server: MockServer, item_ids: list) -> dict:
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fetch_item_details.py')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ids_path = os.path.join(tmp_dir, 'item_ids.txt')
+        with open(ids_path, 'w') as f:
+            f.write('\n'.join(str(i) for i in item_ids))
+        env = dict(os.environ, ZIGBANG_API_BASE=server.url)
+        start = time.time()
+        subprocess.run([sys.executable, script, '--file', ids_path], cwd=tmp_dir, env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        elapsed = time.time() - start
+        received = set()
+        for path in glob.glob(os.path.join(tmp_dir, 'zigbang_details_*.csv')):
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                received.update(int(r['item_id']) for r in csv.DictReader(f) if r.get('item_id'))
+    return {'received': received, 'elapsed': elapsed, 'slept': None,
+            'endpoint': 'detail', 'min_requests': len(item_ids)}
+
+
+ENTRY_POINTS = {
+    'fetch_details': run_fetch_details,
+    'fetch_details_by_ids': run_fetch_details_by_ids,
+    'fetch_item_details': run_fetch_item_details,
+}
+
+
+def run_scenario(server: MockServer, name: str, entry: str, item_ids: list, seed: int = 0) -> dict:
+    server.configure(SCENARIOS[name], seed)
+    # 이전 시나리오에서 열린 브레이커나 소진된 재시도 예산이 이어지지 않도록 새로 시작
+    resilience.configure()
+    result = ENTRY_POINTS[entry](server, item_ids)
+    endpoint_stats = server.stats.snapshot()[result['endpoint']]
+    received = result['received'] & set(item_ids)
+    return {
+        'scenario': name,
+        'entry_point': entry,
+        'requested': len(item_ids),
+        'received': len(received),
+        'loss_rate': 1 - len(received) / len(item_ids),
+        'elapsed': result['elapsed'],
+        'goodput': len(received) / result['elapsed'] if result['elapsed'] else 0.0,
+        'server_requests': endpoint_stats['requests'],
+        'retry_amplification': endpoint_stats['requests'] / result['min_requests'],
+        'sleep_ratio': result['slept'] / result['elapsed'] if result['slept'] is not None else None,
+        'faults': endpoint_stats['faults'],
+        'budget_denied': result.get('budget_denied'),
+        'breaker_state': result.get('breaker_state'),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='API 장애 시나리오별 수집 경로 측정')
+    parser.add_argument('--snapshot', default='seoul_data.zip', help='목업 서버 데이터 스냅샷')
+    parser.add_argument('--items', type=int, default=60, help='items/list 경로에서 요청할 매물 수')
+    parser.add_argument('--detail-items', type=int, default=20, help='상세 API 경로에서 요청할 매물 수')
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help='실행할 시나리오 (기본: 전체)')
+    parser.add_argument('--entry-point', action='append', choices=list(ENTRY_POINTS),
+                        help='측정할 수집 경로 (기본: 전체)')
+    parser.add_argument('--seed', type=int, default=7, help='장애 발생 난수 seed (같은 seed면 같은 장애 순서)')
+    parser.add_argument('--json', help='결과를 JSON 파일로 저장')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    data = MockData.from_snapshot(args.snapshot)
+    all_ids = sorted(data.items)
+    if not all_ids:
+        print(f'❌ 스냅샷에 매물이 없습니다: {args.snapshot}')
+        sys.exit(1)
+
+    results = []
+    with MockServer(data) as server:
+        print(f'목업 API: {server.url} (매물 {len(all_ids)}개)\n')
+        print(f'{"시나리오":<12} {"수집 경로":<22} {"받음":>9} {"손실률":>7} {"시간":>7} '
+              f'{"goodput":>8} {"요청 수":>7} {"배율":>6} {"대기":>6} {"예산 거부":>7} {"브레이커":>9}')
+        for name in args.scenario or list(SCENARIOS):
+            for entry in args.entry_point or list(ENTRY_POINTS):
+                count = args.detail_items if entry == 'fetch_item_details' else args.items
+                r = run_scenario(server, name, entry, all_ids[:count], args.seed)
+                results.append(r)
+                sleep = '-' if r['sleep_ratio'] is None else f'{r["sleep_ratio"]:.0%}'
+                denied = '-' if r['budget_denied'] is None else r['budget_denied']
+                print(f'{name:<12} {entry:<22} {r["received"]:>4}/{r["requested"]:<4} '
+                      f'{r["loss_rate"]:>7.1%} {r["elapsed"]:>6.1f}s {r["goodput"]:>7.1f}/s '
+                      f'{r["server_requests"]:>7} {r["retry_amplification"]:>5.2f}x {sleep:>6} '
+                      f'{denied:>7} {r["breaker_state"] or "-":>9}')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'\n결과 저장: {args.json}')
+
+
+if __name__ == '__main__':
+    main()
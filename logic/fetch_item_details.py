@@ -7,15 +7,23 @@ item_id로 개별 매물의 상세 정보를 조회하여 저장
   python fetch_item_details.py 46979267 46979268 46979269  # 여러 item_id
   python fetch_item_details.py --file item_ids.txt         # 파일에서 읽기
   python fetch_item_details.py --csv zigbang_강남구.csv     # CSV의 item_id 컬럼 사용
+  python fetch_item_details.py --csv zigbang_강남구.csv --seen-set seen_ids  # 이미 조회한 매물 제외
 """
+import argparse
 import requests
 import json
 import csv
 import time
-import sys
-import os
 from datetime import datetime
 
+from seen_set import SeenSet, add_seen_set_argument
+from profiling import staged, add_profile_argument, start_profiling
+from singleflight import SingleFlight
+from detail_record import DetailRecord, detail_row, looks_complete, write_raw_json
+from resilience import (CircuitOpenError, DeferredQueue, send_with_retry,
+                        add_resilience_arguments, configure_from_args)
+from zigbang_api import API_BASE
+
 HEADERS = {
     'accept': 'application/json, text/plain, */*',
     'accept-language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7',
@@ -26,132 +34,43 @@ HEADERS = {
 }
 
 
-def fetch_item_detail(item_id: int) -> dict:
-    """개별 매물 상세 정보 조회"""
-    url = f'https://apis.zigbang.com/v3/items/{item_id}'
+# 같은 item_id 상세 요청이 동시에 진행 중이면 한 번만 보내고 결과 공유
+_detail_flight = SingleFlight()
+
+
+@staged('detail')
+def fetch_item_detail(item_id: int) -> DetailRecord:
+    """개별 매물 상세 정보 조회 (응답 바이트를 그대로 담은 DetailRecord, 필드는 읽을 때 해석)"""
+    return _detail_flight.do(int(item_id), _get_item_detail, item_id)
+
+
+def _get_item_detail(item_id: int) -> DetailRecord:
+    url = f'{API_BASE}/v3/items/{item_id}'
     params = {
         'version': '',
         'domain': 'zigbang',
     }
     
-    resp = requests.get(url, params=params, headers=HEADERS, timeout=15)
-    resp.raise_for_status()
-    return resp.json()
+    return send_with_retry(
+        'detail', lambda attempt: requests.get(url, params=params, headers=HEADERS, timeout=15),
+        parse=lambda r: _to_record(item_id, r))
 
 
-def parse_detail(data: dict) -> dict:
-    """상세 정보에서 필요한 필드 추출"""
-    item = data.get('item', {})
-    agent = data.get('agent', {})
-    realtor = data.get('realtor', {})
-    subways = data.get('subways', [])
-    
-    # 가격 정보
-    price = item.get('price', {})
-    
-    # 면적 정보
-    area = item.get('area', {})
-    
-    # 층 정보
-    floor_info = item.get('floor', {})
-    
-    # 관리비 정보
-    manage_cost = item.get('manageCost', {})
-    manage_detail = item.get('manageCostDetail', {})
-    
-    # 주소 정보
-    address_origin = item.get('addressOrigin', {})
-    
-    # 위치 정보
-    location = item.get('location', {}) or item.get('randomLocation', {})
-    
-    # 지하철 정보
-    subway_names = [f"{s.get('name', '')}({s.get('description', '')})" for s in subways]
-    
-    # 옵션 정보
-    options = item.get('options', [])
-    
-    # 주변 편의시설
-    neighborhoods = item.get('neighborhoods', {})
-    amenities = [a.get('title', '') for a in neighborhoods.get('amenities', [])]
-    
-    return {
-        # 기본 정보
-        'item_id': item.get('itemId'),
-        'sales_type': item.get('salesType'),  # 월세, 전세, 매매
-        'service_type': item.get('serviceType'),  # 원룸, 오피스텔 등
-        'room_type': item.get('roomType'),  # 분리형원룸 등
-        'residence_type': item.get('residenceType'),  # 단독주택, 다세대 등
-        'status': item.get('status'),
-        
-        # 가격 정보
-        'deposit': price.get('deposit'),  # 보증금 (만원)
-        'rent': price.get('rent'),  # 월세 (만원)
-        
-        # 면적 정보
-        'area_m2': area.get('전용면적M2'),
-        
-        # 층 정보
-        'floor': floor_info.get('floor'),
-        'all_floors': floor_info.get('allFloors'),
-        
-        # 관리비
-        'manage_cost': manage_cost.get('amount'),  # 관리비 (만원)
-        'manage_cost_includes': ', '.join(manage_cost.get('includes', [])),
-        'manage_cost_not_includes': ', '.join(manage_cost.get('notIncludes', [])),
-        
-        # 주소
-        'local1': address_origin.get('local1', ''),
-        'local2': address_origin.get('local2', ''),
-        'local3': address_origin.get('local3', ''),
-        'full_address': address_origin.get('fullText', ''),
-        'jibun_address': item.get('jibunAddress', ''),
-        
-        # 위치 (좌표)
-        'lat': location.get('lat'),
-        'lng': location.get('lng'),
-        
-        # 제목 및 설명
-        'title': item.get('title'),
-        'description': item.get('description', '')[:500] if item.get('description') else '',  # 500자 제한
-        
-        # 옵션
-        'options': ', '.join(options),
-        
-        # 기타 정보
-        'room_direction': item.get('roomDirection'),  # 방향 (S, N, E, W 등)
-        'direction_criterion': item.get('directionCriterion'),
-        'parking': item.get('parkingAvailableText'),
-        'elevator': item.get('elevator'),
-        'bathroom_count': item.get('bathroomCount'),
-        'movein_date': item.get('moveinDate'),
-        'approve_date': item.get('approveDate'),
-        
-        # 지하철
-        'subways': ', '.join(subway_names),
-        
-        # 주변 편의시설
-        'amenities': ', '.join(amenities),
-        
-        # 중개사 정보
-        'agent_name': agent.get('agentName'),
-        'agent_title': agent.get('agentTitle'),
-        'agent_phone': agent.get('agentPhone'),
-        'agent_address': agent.get('agentAddress'),
-        
-        # 태그
-        'tags': ', '.join(data.get('tags', [])),
-        
-        # 이미지
-        'thumbnail': item.get('imageThumbnail'),
-        'images': ', '.join(item.get('images', [])[:5]),  # 최대 5개
-        
-        # 메타 정보
-        'updated_at': item.get('updatedAt'),
-        'is_premium': item.get('isPremium'),
-    }
+def _to_record(item_id: int, resp) -> DetailRecord:
+    if not looks_complete(resp.content):
+        raise ValueError('응답이 잘렸습니다')
+    return DetailRecord(int(item_id), resp.content)
+
+
+@staged('parse')
+def parse_detail(data) -> dict:
+    """상세 정보에서 필요한 필드 추출 (DetailRecord 또는 해석된 응답 dict)"""
+    if isinstance(data, DetailRecord):
+        return data.row()
+    return detail_row(data)
 
 
+@staged('write')
 def save_to_csv(items: list, filename: str):
     """CSV 파일로 저장"""
     if not items:
@@ -169,10 +88,14 @@ def save_to_csv(items: list, filename: str):
     print(f'✅ CSV 저장 완료: {filename} ({len(items)}개)')
 
 
+@staged('write')
 def save_to_json(items: list, filename: str):
-    """JSON 파일로 저장 (전체 원본 데이터)"""
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(items, f, ensure_ascii=False, indent=2)
+    """JSON 파일로 저장 (전체 원본 데이터. DetailRecord는 받은 바이트 그대로)"""
+    if items and isinstance(items[0], DetailRecord):
+        write_raw_json(items, filename)
+    else:
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(items, f, ensure_ascii=False, indent=2)
     
     print(f'✅ JSON 저장 완료: {filename} ({len(items)}개)')
 
@@ -195,7 +118,24 @@ def load_item_ids_from_csv(filepath: str) -> list:
     return item_ids
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='직방 매물 상세 정보 조회')
+    parser.add_argument('item_ids', nargs='*', help='조회할 item_id')
+    parser.add_argument('--file', help='item_id 목록 텍스트 파일 (한 줄에 하나)')
+    parser.add_argument('--csv', help='item_id 컬럼이 있는 CSV 파일')
+    add_seen_set_argument(parser)
+    add_profile_argument(parser)
+    add_resilience_arguments(parser)
+    parser.add_argument('--defer-wait', type=float, default=600.0,
+                        help='API 차단으로 보류된 매물을 재시도하며 기다릴 최대 시간(초)')
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    start_profiling(args.profile)
+    configure_from_args(args)
+
     print('=' * 60)
     print('  직방 매물 상세 정보 조회')
     print('=' * 60)
@@ -203,26 +143,32 @@ def main():
     # 인자 파싱
     item_ids = []
     
-    if len(sys.argv) < 2:
+    if not (args.item_ids or args.file or args.csv):
         print('\n사용법:')
         print('  python fetch_item_details.py 46979267')
         print('  python fetch_item_details.py 46979267 46979268')
         print('  python fetch_item_details.py --file item_ids.txt')
         print('  python fetch_item_details.py --csv zigbang_강남구.csv')
+        print('  python fetch_item_details.py --csv zigbang_강남구.csv --seen-set seen_ids')
         return
     
-    if sys.argv[1] == '--file':
-        filepath = sys.argv[2]
+    if args.file:
+        filepath = args.file
         item_ids = load_item_ids_from_file(filepath)
         print(f'\n파일에서 {len(item_ids)}개 item_id 로드: {filepath}')
-    elif sys.argv[1] == '--csv':
-        filepath = sys.argv[2]
+    elif args.csv:
+        filepath = args.csv
         item_ids = load_item_ids_from_csv(filepath)
         print(f'\nCSV에서 {len(item_ids)}개 item_id 로드: {filepath}')
     else:
-        item_ids = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+        item_ids = [int(arg) for arg in args.item_ids if arg.isdigit()]
         print(f'\n{len(item_ids)}개 item_id 입력됨')
     
+    seen = SeenSet(args.seen_set) if args.seen_set else None
+    if seen is not None:
+        item_ids = seen.filter_new(item_ids)
+        print(f'이전에 수집하지 않은 item_id: {len(item_ids)}개')
+    
     if not item_ids:
         print('❌ item_id를 찾을 수 없습니다.')
         return
@@ -230,27 +176,51 @@ def main():
     print(f'\n총 {len(item_ids)}개 매물 조회 시작...\n')
     
     # 상세 정보 조회
-    raw_data = []  # 원본 JSON 저장용
+    raw_data = []  # 원본 응답(DetailRecord) 저장용
     parsed_data = []  # 파싱된 데이터 저장용
+    fetched_ids = []  # CSV 저장 후 seen-set에 추가할 item_id
     success_count = 0
     fail_count = 0
     
-    for idx, item_id in enumerate(item_ids, start=1):
+    deferred = DeferredQueue()  # API 차단으로 보류된 item_id
+    pending = list(enumerate(item_ids, start=1))
+    deadline = None
+    while pending:
+        idx, item_id = pending.pop(0)
         try:
             data = fetch_item_detail(item_id)
-            raw_data.append(data)
-            
             parsed = parse_detail(data)
+            raw_data.append(data)
             parsed_data.append(parsed)
+            fetched_ids.append(item_id)
             
             success_count += 1
             print(f'  [{idx}/{len(item_ids)}] {item_id}: ✅ {parsed.get("title", "")[:30]}...')
             
+        except CircuitOpenError as e:
+            deferred.park(e.endpoint, (idx, item_id))
+            print(f'  [{idx}/{len(item_ids)}] {item_id}: ⏸️ 보류 - {e}')
+            
         except Exception as e:
             fail_count += 1
             print(f'  [{idx}/{len(item_ids)}] {item_id}: ❌ {e}')
         
         time.sleep(0.5)  # API 부하 방지
+        
+        # 목록을 다 돈 뒤에는 보류된 item_id를 API가 복구될 때까지(최대 --defer-wait 초) 다시 시도
+        if not pending and deferred:
+            deadline = deadline or time.time() + args.defer_wait
+            if time.time() >= deadline:
+                break
+            wait = min(deferred.next_retry_at(), deadline) - time.time()
+            if wait > 0:
+                print(f'\n⏸️ 보류된 매물 {len(deferred)}개: {wait:.0f}초 후 재시도')
+                time.sleep(wait)
+            pending = deferred.pop_ready()
+    
+    if deferred:
+        print(f'❌ API가 복구되지 않아 {len(deferred)}개 매물을 조회하지 못했습니다')
+        fail_count += len(deferred)
     
     # 결과 저장
     print('\n' + '=' * 60)
@@ -265,6 +235,10 @@ def main():
         # JSON 저장 (원본 데이터)
         json_filename = f'zigbang_details_{timestamp}.json'
         save_to_json(raw_data, json_filename)
+        
+        # 저장까지 끝난 매물만 수집한 것으로 기록 (도중에 중단되면 다음 실행에서 다시 조회)
+        if seen is not None:
+            seen.add_many(fetched_ids)
     
     print(f'\n📊 결과:')
     print(f'   - 성공: {success_count}개')
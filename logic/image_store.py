@@ -0,0 +1,227 @@
+"""
+매물 이미지 다운로드 (선택 단계)
+CSV의 thumbnail / images URL을 동시 요청 수를 제한한 비동기 다운로드로 받아
+내용 해시(sha256) 기준 저장소에 저장 → 여러 매물에 재사용된 같은 사진은 한 번만 저장
+
+저장소 구성 (--store 폴더):
+- objects/ab/abcdef....jpg : 내용 해시 이름의 이미지 파일
+- index.jsonl              : URL별 결과 (해시 또는 오류). 한 줄씩 추가되므로 중단 후 재실행하면 이어서 진행
+- images.csv               : item_id, 종류(thumbnail/image), URL, 해시 매핑
+
+사용법:
+  python image_store.py seoul_data.zip
+  python image_store.py zigbang_details.csv --store images --concurrency 16
+  python image_store.py seoul_data/ --retry-failed
+
+로컬 테스트: python -m http.server 8000 으로 이미지 폴더를 띄우고 URL이 localhost인 CSV로 실행
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from snapshot_diff import iter_snapshot_rows
+
+HEADERS = {
+    'accept': 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8',
+    'referer': 'https://www.zigbang.com/',
+    'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
+}
+
+_CONTENT_TYPE_EXT = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp', 'image/gif': 'gif'}
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    # 스레드마다 세션 하나 (연결 재사용)
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+        session.headers.update(HEADERS)
+    return session
+
+
+def iter_image_urls(rows):
+    """(item_id, 종류, URL) 반환. images는 ', '로 이어진 최대 5개 URL"""
+    for row in rows:
+        item_id = row.get('item_id')
+        thumbnail = (row.get('thumbnail') or '').strip()
+        if thumbnail:
+            yield item_id, 'thumbnail', thumbnail
+        for url in (row.get('images') or '').split(','):
+            url = url.strip()
+            if url:
+                yield item_id, 'image', url
+
+
+class ImageStore:
+    def __init__(self, root: str):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.index_path = os.path.join(root, 'index.jsonl')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.done = {}    # URL → 해시
+        self.failed = {}  # URL → 오류 메시지
+        self._put_lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 중단 시 잘린 마지막 줄
+                if entry.get('sha256'):
+                    self.done[entry['url']] = entry['sha256']
+                    self.failed.pop(entry['url'], None)
+                else:
+                    self.failed[entry['url']] = entry.get('error')
+
+    def object_path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], f'{digest}.{ext}')
+
+    def put(self, data: bytes, ext: str) -> tuple:
+        """이미지 저장. (해시, 새로 저장했는지) 반환"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest, ext)
+        with self._put_lock:
+            if os.path.exists(path):
+                return digest, False
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest, True
+
+    def record(self, index_file, url: str, digest: str = None, size: int = 0, error: str = None):
+        entry = {'url': url, 'sha256': digest, 'size': size} if digest else {'url': url, 'error': error}
+        index_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        index_file.flush()
+        if digest:
+            self.done[url] = digest
+            self.failed.pop(url, None)
+        else:
+            self.failed[url] = error
+
+
+def _download(url: str, timeout: float) -> tuple:
+    resp = _session().get(url, timeout=timeout)
+    resp.raise_for_status()
+    content_type = resp.headers.get('content-type', '').split(';')[0].strip()
+    ext = _CONTENT_TYPE_EXT.get(content_type)
+    if ext is None:
+        tail = url.split('?')[0].rsplit('.', 1)
+        ext = tail[1].lower() if len(tail) == 2 and len(tail[1]) <= 4 else 'bin'
+    return resp.content, ext
+
+
+async def download_all(store: ImageStore, urls: list, concurrency: int = 8,
+                       retries: int = 2, timeout: float = 15.0) -> dict:
+    """URL 목록을 동시에 최대 concurrency개씩 다운로드. 결과 통계 반환"""
+    # asyncio.to_thread의 기본 스레드 풀(CPU 수 + 4)이 동시 다운로드 수를 제한하지 않도록 풀 크기를 맞춤
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {'downloaded': 0, 'stored': 0, 'duplicate': 0, 'failed': 0, 'bytes': 0}
+    total = len(urls)
+    start = time.time()
+
+    with open(store.index_path, 'a', encoding='utf-8') as index_file:
+        async def fetch(url: str):
+            async with semaphore:
+                data = ext = error = None
+                for attempt in range(retries + 1):
+                    try:
+                        data, ext = await asyncio.to_thread(_download, url, timeout)
+                        break
+                    except requests.RequestException as e:
+                        error = str(e)
+                        status = getattr(e.response, 'status_code', None)
+                        if status is not None and 400 <= status < 500 and status != 429:
+                            break  # 404 등은 다시 시도해도 같음
+                        if attempt < retries:
+                            await asyncio.sleep(1.0 * (attempt + 1))
+                if data is None:
+                    store.record(index_file, url, error=error)
+                    stats['failed'] += 1
+                    return
+                try:
+                    digest, created = await asyncio.to_thread(store.put, data, ext)
+                except OSError as e:
+                    # 디스크 부족/권한 오류 등은 이 이미지만 실패로 기록 (다른 다운로드는 계속)
+                    store.record(index_file, url, error=f'저장 실패: {e}')
+                    stats['failed'] += 1
+                    return
+                store.record(index_file, url, digest=digest, size=len(data))
+                stats['downloaded'] += 1
+                stats['bytes'] += len(data)
+                stats['stored' if created else 'duplicate'] += 1
+
+            finished = stats['downloaded'] + stats['failed']
+            if finished % 100 == 0 or finished == total:
+                print(f'  진행: {finished}/{total} ({time.time() - start:.1f}초)')
+
+        await asyncio.gather(*(fetch(url) for url in urls))
+    return stats
+
+
+def write_mapping(store: ImageStore, entries: list):
+    path = os.path.join(store.root, 'images.csv')
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['item_id', 'kind', 'url', 'sha256'])
+        for item_id, kind, url in entries:
+            writer.writerow([item_id, kind, url, store.done.get(url, '')])
+    return path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='매물 이미지 다운로드 (내용 해시 저장소)')
+    parser.add_argument('snapshot', help='thumbnail/images 컬럼이 있는 CSV, 구별 CSV 폴더 또는 zip')
+    parser.add_argument('--store', default='zigbang_images', help='이미지 저장소 폴더')
+    parser.add_argument('--concurrency', type=int, default=8, help='동시 다운로드 수')
+    parser.add_argument('--retries', type=int, default=2, help='URL별 재시도 횟수')
+    parser.add_argument('--timeout', type=float, default=15.0, help='요청 타임아웃 (초)')
+    parser.add_argument('--retry-failed', action='store_true', help='이전에 실패한 URL도 다시 시도')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    store = ImageStore(args.store)
+
+    entries = []
+    seen_entries = set()
+    for entry in iter_image_urls(iter_snapshot_rows(args.snapshot)):
+        if entry not in seen_entries:
+            seen_entries.add(entry)
+            entries.append(entry)
+    urls = list(dict.fromkeys(url for _, _, url in entries))
+    pending = [url for url in urls if url not in store.done
+               and (args.retry_failed or url not in store.failed)]
+
+    print(f'이미지 URL {len(urls)}개 (저장됨 {len(store.done)}개, 받을 URL {len(pending)}개)')
+    stats = {'downloaded': 0, 'stored': 0, 'duplicate': 0, 'failed': 0, 'bytes': 0}
+    if pending:
+        stats = asyncio.run(download_all(store, pending, args.concurrency, args.retries, args.timeout))
+    mapping_path = write_mapping(store, entries)
+
+    print(f'\n✅ 완료! ({args.store}/)')
+    print(f'   - 다운로드: {stats["downloaded"]}개 ({stats["bytes"] / 1024 / 1024:.1f}MB)')
+    print(f'   - 새로 저장: {stats["stored"]}개, 중복(이미 있는 사진): {stats["duplicate"]}개')
+    print(f'   - 실패: {stats["failed"]}개')
+    print(f'   - 매핑: {mapping_path}')
+
+
+if __name__ == '__main__':
+    main()
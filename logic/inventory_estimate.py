@@ -0,0 +1,307 @@
+"""
+구/동별 매물 수 빠른 추정 (표본 조사)
+전체 순회와 상세 조회 없이, 구마다 일부 동만 뽑아 지도 API(v2/items/oneroom)만 호출하고
+구별 매물 수와 95% 신뢰구간을 추정
+
+- 층화 표본: 구 = 층. 구마다 동 수에 비례해 --sample-frac 비율(최소 --min-per-gu 개)만큼 무작위 추출
+- 동 매물 수: 표본 동 좌표 주변 지도 응답 중 그 동 중심이 가장 가까운 매물만 셈
+  (이웃 동 상자와 겹치는 매물을 중복으로 세지 않도록 동 중심 기준 보로노이 영역으로 나눔)
+  조회 상자는 동마다 그 보로노이 영역 전체를 덮는 크기로 잡음 (영역 일부가 상자 밖이면 그만큼 덜 세어짐)
+  영역이 서울 밖으로 열린 외곽 동만 --radius 에서 자르므로, 그 바깥(대부분 서울 밖) 매물은 세지 않음
+- 추정: 구 합계 = 동 수 × 표본 평균, 분산 = 동 수² × (1 - 추출률) × 표본 분산 / 표본 수 (t 분포 95% 구간)
+  표본이 아닌 동은 같은 구 표본 평균으로 채움 (CSV의 sampled 컬럼으로 구분)
+- --prior 로 이전 스냅샷을 주면 비율 추정: 구 합계 = 이전 구 합계 × (표본 동 현재 합 / 표본 동 이전 합)
+  동별 매물 수는 동마다 크게 다르지만 날마다의 변화율은 비슷하므로 같은 표본으로 구간이 훨씬 좁아짐
+  표본이 아닌 동은 이전 매물 수 × 구 변화율로 채움
+- 동 좌표: --coords 파일에 캐시. 없으면 --coords-from 스냅샷의 동별 매물 평균 좌표, 그래도 없으면 지역 검색 API 1회
+
+사용법:
+  python inventory_estimate.py --sales-type 월세
+  python inventory_estimate.py --coords-from seoul_data.zip --sample-frac 0.3 --out estimate.csv
+  python inventory_estimate.py --prior seoul_data.zip --sales-type 월세   # 이전 스냅샷 기준 비율 추정
+  python inventory_estimate.py --census        # 모든 동 조사 (추정 검증용)
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import time
+
+from search_all_seoul import SEOUL_DISTRICTS, search_location, fetch_map_points
+from map_filters import add_filter_arguments, filters_from_args
+from snapshot_diff import iter_snapshot_rows
+
+# 자유도별 t 분포 97.5% 분위수 (30 초과는 정규분포 근사)
+T_975 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+         10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042}
+
+
+def t_quantile(df: int) -> float:
+    if df > 30:
+        return 1.96
+    return T_975[max(k for k in T_975 if k <= df)]
+
+
+def _distance_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    dy = (lat1 - lat2) * 111.0
+    dx = (lng1 - lng2) * 111.0 * math.cos(math.radians((lat1 + lat2) / 2))
+    return math.hypot(dx, dy)
+
+
+def load_coords(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            # 검색해도 찾지 못한 동은 null로 저장 (다시 검색하지 않음)
+            return {tuple(k.split(' ', 1)): tuple(v) if v else None for k, v in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_coords(path: str, coords: dict):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({f'{gu} {dong}': list(v) if v else None for (gu, dong), v in sorted(coords.items())},
+                  f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def coords_from_snapshot(path: str) -> dict:
+    """스냅샷의 (구, 동)별 매물 평균 좌표"""
+    sums = {}
+    for row in iter_snapshot_rows(path):
+        try:
+            lat, lng = float(row['lat']), float(row['lng'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        acc = sums.setdefault((row.get('local2'), row.get('local3')), [0.0, 0.0, 0])
+        acc[0] += lat
+        acc[1] += lng
+        acc[2] += 1
+    return {key: (acc[0] / acc[2], acc[1] / acc[2]) for key, acc in sums.items()}
+
+
+def ensure_coords(units: list, coords: dict, pause: float = 0.3) -> int:
+    """좌표가 없는 동을 지역 검색으로 채움. 검색 요청 수 반환"""
+    requests_made = 0
+    taken = {c: u for u, c in coords.items() if c}
+    for gu, dong in units:
+        if (gu, dong) in coords:
+            continue
+        try:
+            location = search_location(f'서울 {gu} {dong}')
+        except Exception as e:
+            print(f'  {gu} {dong}: ❌ 좌표 검색 실패 - {e}')
+            location = None
+        requests_made += 1
+        center = (location['lat'], location['lng']) if location and location.get('lat') is not None else None
+        if center in taken:
+            # 검색이 다른 동(예: 다른 구의 같은 이름 동)을 돌려줌 → 같은 중심이 두 번 세지지 않도록 제외
+            print(f'  {gu} {dong}: 검색 결과가 {" ".join(taken[center])}와 같은 좌표 → 제외')
+            center = None
+        coords[(gu, dong)] = center
+        if center:
+            taken[center] = (gu, dong)
+        time.sleep(pause)
+    return requests_made
+
+
+def allocate(strata: dict, sample_frac: float, min_per_gu: int) -> dict:
+    """구별 표본 동 수 (동 수에 비례, 최소 min_per_gu, 최대 전체)"""
+    return {gu: min(len(units), max(min_per_gu, round(sample_frac * len(units))))
+            for gu, units in strata.items()}
+
+
+def cell_radius(unit: tuple, coords: dict, max_radius_km: float, directions: int = 72) -> float:
+    """unit 동의 보로노이 영역(가장 가까운 중심이 이 동인 범위)을 덮는 fetch_map_points 조회 반경(km)
+
+    방향마다 이웃 중심과의 수직이등분선까지 거리(가장 가까운 것)를 구해 영역 경계점을 잡고,
+    경계점을 모두 담는 상자 크기를 반경으로 환산. 영역이 열려 있으면 max_radius_km 에서 자름
+    """
+    lat0, lng0 = coords[unit]
+    kx = 111.0 * math.cos(math.radians(lat0))
+    rivals = [((c[1] - lng0) * kx, (c[0] - lat0) * 111.0) for u, c in coords.items() if c and u != unit]
+    max_dx = max_dy = 0.0
+    for k in range(directions):
+        angle = 2 * math.pi * k / directions
+        ux, uy = math.cos(angle), math.sin(angle)
+        t = max_radius_km
+        for rx, ry in rivals:
+            dot = rx * ux + ry * uy
+            if dot > 0:
+                t = min(t, (rx * rx + ry * ry) / (2 * dot))
+        max_dx = max(max_dx, abs(t * ux))
+        max_dy = max(max_dy, abs(t * uy))
+    # 조회 상자의 반폭: 위도 방향 radius km, 경도 방향 radius × cos(위도) / 0.85 km
+    # 방향 사이의 꼭짓점을 놓치지 않도록 5% 여유
+    radius = max(max_dy, max_dx * 0.85 / math.cos(math.radians(lat0))) * 1.05
+    return min(radius, max_radius_km)
+
+
+def count_in_cell(unit: tuple, points: list, coords: dict, radius_km: float) -> int:
+    """points 중 unit 동 중심이 가장 가까운 매물 수"""
+    lat0, lng0 = coords[unit]
+    # 상자 안의 점보다 더 가까운 중심은 동 중심에서 상자 대각선의 2배 이내에만 있음
+    reach = radius_km * 3.2
+    rivals = [c for u, c in coords.items() if c and u != unit and _distance_km(lat0, lng0, *c) <= reach]
+    count = 0
+    for p in points:
+        own = _distance_km(p['lat'], p['lng'], lat0, lng0)
+        if all(_distance_km(p['lat'], p['lng'], *c) >= own for c in rivals):
+            count += 1
+    return count
+
+
+def in_box(lat: float, lng: float, center: tuple, radius_km: float) -> bool:
+    """fetch_map_points 조회 범위(동 중심 기준 상자) 안인지"""
+    return (abs(lat - center[0]) <= radius_km / 111.0 and
+            abs(lng - center[1]) <= radius_km / (111.0 * 0.85))
+
+
+def prior_counts(path: str, coords: dict, radii: dict) -> dict:
+    """이전 스냅샷 매물을 가장 가까운 동 중심에 배정한 동별 매물 수
+    (표본 조사와 같은 기준이 되도록 그 동의 조회 범위(radii) 밖 매물은 세지 않음)"""
+    centers = list(coords.items())
+    counts = dict.fromkeys(coords, 0)
+    seen = set()
+    for row in iter_snapshot_rows(path):
+        try:
+            lat, lng = float(row['lat']), float(row['lng'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if row.get('item_id') in seen:
+            continue
+        seen.add(row.get('item_id'))
+        unit, center = min(centers, key=lambda uc: _distance_km(lat, lng, *uc[1]))
+        if in_box(lat, lng, center, radii[unit]):
+            counts[unit] += 1
+    return counts
+
+
+def estimate_stratum(counts: list, population: int, prior: list = None, prior_total: float = None) -> dict:
+    """counts: 표본 동의 매물 수, prior: 같은 동의 이전 매물 수, prior_total: 구 전체 이전 매물 수"""
+    n = len(counts)
+    ratio = None
+    if prior is not None and sum(prior) > 0:
+        # 비율 추정: 잔차 d = y - R x 의 분산 사용
+        ratio = sum(counts) / sum(prior)
+        total = prior_total * ratio
+        residuals = [c - ratio * x for c, x in zip(counts, prior)]
+    else:
+        mean = sum(counts) / n if n else 0.0
+        total = population * mean
+        residuals = [c - mean for c in counts]
+    if n == population:
+        var_total, half = 0.0, 0.0
+    elif n < 2:
+        var_total, half = None, None
+    else:
+        var = sum(d * d for d in residuals) / (n - 1)
+        var_total = population ** 2 * (1 - n / population) * var / n
+        half = t_quantile(n - 1) * math.sqrt(var_total)
+    return {'sampled': n, 'dongs': population, 'mean': sum(counts) / n if n else 0.0, 'ratio': ratio,
+            'total': total, 'var': var_total, 'ci': half}
+
+
+def run_estimate(strata: dict, coords: dict, sizes: dict, filters: dict, radii: dict,
+                 seed: int, prior: dict = None, pause: float = 0.3) -> tuple:
+    """구별 추정치와 동별 결과 [(구, 동, 표본 여부, 매물 수)] 반환
+    radii: 동별 조회 반경(cell_radius), prior: 동별 이전 매물 수"""
+    rng = random.Random(seed)
+    results, dong_rows = {}, []
+    for gu, units in strata.items():
+        sample = sorted(rng.sample(units, sizes[gu]))
+        counts = {}
+        for unit in sample:
+            lat, lng = coords[unit]
+            points = fetch_map_points(lat, lng, radius_km=radii[unit], filters=filters)
+            counts[unit] = count_in_cell(unit, points, coords, radii[unit])
+            time.sleep(pause)
+        if prior is not None:
+            results[gu] = estimate_stratum(list(counts.values()), len(units),
+                                           [prior[u] for u in counts], sum(prior[u] for u in units))
+        else:
+            results[gu] = estimate_stratum(list(counts.values()), len(units))
+        r = results[gu]
+        for unit in units:
+            if unit in counts:
+                dong_rows.append((gu, unit[1], True, counts[unit]))
+            elif r['ratio'] is not None:
+                dong_rows.append((gu, unit[1], False, round(prior[unit] * r['ratio'], 1)))
+            else:
+                dong_rows.append((gu, unit[1], False, round(r['mean'], 1)))
+        ci = '±?' if r['ci'] is None else f'±{r["ci"]:.0f}'
+        print(f'  {gu:<6} {r["total"]:>8.0f} {ci:>8}  (동 {r["sampled"]}/{r["dongs"]}개 조사)')
+    return results, dong_rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='층화 표본으로 구/동별 매물 수 빠른 추정 (지도 API만 사용)')
+    parser.add_argument('--sample-frac', type=float, default=0.2, help='구마다 조사할 동 비율')
+    parser.add_argument('--min-per-gu', type=int, default=3, help='구마다 최소 조사 동 수 (신뢰구간에 2개 이상 필요)')
+    parser.add_argument('--census', action='store_true', help='모든 동 조사 (추정 검증용)')
+    parser.add_argument('--radius', type=float, default=3.0,
+                        help='동 중심 기준 최대 지도 조회 반경(km). 동마다 보로노이 영역을 덮는 반경을 쓰되 이 값에서 자름')
+    parser.add_argument('--coords', default='dong_coords.json', help='동 좌표 캐시 파일')
+    parser.add_argument('--coords-from', help='동 좌표를 채울 스냅샷 (CSV, 폴더 또는 zip)')
+    parser.add_argument('--prior', help='비율 추정에 쓸 이전 스냅샷 (CSV, 폴더 또는 zip)')
+    parser.add_argument('--seed', type=int, default=0, help='표본 추출 seed')
+    parser.add_argument('--out', help='동별 결과 CSV')
+    add_filter_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.time()
+    filters = filters_from_args(args)
+    units = [(gu, dong) for gu, dongs in SEOUL_DISTRICTS.items() for dong in dongs]
+
+    coords = load_coords(args.coords)
+    known = sum(1 for v in coords.values() if v)
+    if args.coords_from:
+        snapshot_coords = coords_from_snapshot(args.coords_from)
+        for unit in units:
+            if unit in snapshot_coords and not coords.get(unit):
+                coords[unit] = snapshot_coords[unit]
+    searches = ensure_coords(units, coords)
+    if searches or sum(1 for v in coords.values() if v) > known:
+        save_coords(args.coords, coords)
+
+    strata = {}
+    for gu, dong in units:
+        if coords.get((gu, dong)):
+            strata.setdefault(gu, []).append((gu, dong))
+    missing = len(units) - sum(len(v) for v in strata.values())
+    sizes = allocate(strata, 1.0 if args.census else args.sample_frac, args.min_per_gu)
+
+    print(f'동 {len(units)}개 중 좌표 있는 동 {len(units) - missing}개, 조사할 동 {sum(sizes.values())}개\n')
+    print(f'  {"구":<6} {"추정 매물 수":>8} {"95% 구간":>8}')
+    active = {u: coords[u] for units in strata.values() for u in units}
+    radii = {u: cell_radius(u, active, args.radius) for u in active}
+    prior = None
+    if args.prior:
+        prior = prior_counts(args.prior, active, radii)
+    results, dong_rows = run_estimate(strata, coords, sizes, filters, radii, args.seed, prior)
+
+    total = sum(r['total'] for r in results.values())
+    if any(r['ci'] is None for r in results.values()):
+        ci = '±? (표본 1개인 구 있음)'
+    else:
+        ci = f'±{1.96 * math.sqrt(sum(r["var"] for r in results.values())):.0f}'
+    print(f'\n📊 서울 전체 추정: {total:.0f}개 {ci}')
+    print(f'   요청: 지도 {sum(sizes.values())}회, 지역 검색 {searches}회 ({time.time() - start:.1f}초)')
+    if missing:
+        print(f'   좌표를 찾지 못해 제외한 동: {missing}개')
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['gu', 'dong', 'sampled', 'count'])
+            writer.writerows(dong_rows)
+        print(f'   동별 결과: {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,335 @@
+"""
+배열 기반 매물 저장소
+서울 전체 수집 결과처럼 많은 매물을 dict 목록 대신 열(column) 단위로 압축 저장
+
+- 정수 열(item_id, 보증금, 월세, 관리비)은 array('q'), 실수 열(면적, 좌표)은 array('d')
+  숫자가 아닌 값(예: '협의')은 NULL, 정수 열의 소수 값과 실수 열의 정수 값은 원래 표기대로 돌려줌
+  (CSV로 다시 쓸 때 '20' → '20.0', '1000.5' → '1000' 처럼 바뀌지 않도록)
+- 반복되는 문자열(구, 동, 서비스 유형 등)은 사전 코드로 저장 (고유 값 수에 따라 1/2/4바이트 코드)
+- 제목 등 고유한 문자열은 하나의 UTF-8 바이트 버퍼 + 오프셋 배열로 저장
+- item_id → 행 번호 인덱스는 오픈 어드레싱 해시 테이블(array)로 구성하여 O(1) 조회
+"""
+import math
+from array import array
+
+SEOUL_FIELDS = [
+    'search_gu', 'search_dong', 'item_id', 'title', 'address',
+    'local1', 'local2', 'local3',
+    'deposit', 'rent', 'size_m2', 'floor', 'service_type', 'manage_cost',
+    'lat', 'lng', 'thumbnail'
+]
+
+INT_FIELDS = {'item_id', 'deposit', 'rent', 'manage_cost'}
+FLOAT_FIELDS = {'size_m2', 'lat', 'lng'}
+TEXT_FIELDS = {'title', 'thumbnail', 'description', 'images'}
+
+INT_NULL = -2 ** 63
+THUMBNAIL_TEMPLATE = 'https://ic.zigbang.com/ic/items/{}/1.jpg'
+_TEMPLATE_MARK = b'\x00'
+
+
+def parse_number(value):
+    """CSV/API 값 → 숫자. 정수 표기는 int, 소수 표기는 float, 숫자가 아니면(예: '협의') None"""
+    if value is None or value == '' or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    text = str(value).strip()
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+class IntColumn:
+    def __init__(self):
+        self.values = array('q')
+        self.exceptions = {}  # 행 번호 → 정수 배열에 담을 수 없는 값 (소수, int64 범위 밖)
+
+    def convert(self, value):
+        return parse_number(value)
+
+    def push(self, number):
+        if number is None:
+            self.values.append(INT_NULL)
+        elif isinstance(number, int) and INT_NULL < number < 2 ** 63:
+            self.values.append(number)
+        else:
+            self.exceptions[len(self.values)] = number
+            self.values.append(0)
+
+    def append(self, value):
+        self.push(self.convert(value))
+
+    def __getitem__(self, i):
+        value = self.values[i]
+        if value == INT_NULL:
+            return None
+        if self.exceptions and i in self.exceptions:
+            return self.exceptions[i]
+        return value
+
+    def nbytes(self) -> int:
+        return self.values.itemsize * len(self.values)
+
+
+class FloatColumn:
+    def __init__(self):
+        self.values = array('d')
+        self.integral = array('B')  # 정수로 들어온 값 표시 (돌려줄 때 int로 변환)
+
+    def convert(self, value):
+        return parse_number(value)
+
+    def push(self, number):
+        if number is None:
+            self.values.append(math.nan)
+            self.integral.append(0)
+        else:
+            self.values.append(float(number))
+            self.integral.append(isinstance(number, int) and abs(number) < 2 ** 53)
+
+    def append(self, value):
+        self.push(self.convert(value))
+
+    def __getitem__(self, i):
+        value = self.values[i]
+        if value != value:
+            return None
+        return int(value) if self.integral[i] else value
+
+    def nbytes(self) -> int:
+        return self.values.itemsize * len(self.values) + len(self.integral)
+
+
+class CodedColumn:
+    """사전 코드 문자열 열 (코드 0은 None)"""
+
+    def __init__(self):
+        self.codes = array('B')
+        self.strings = [None]
+        self.lookup = {None: 0}
+
+    def encode(self, value) -> int:
+        if value == '':
+            value = None
+        elif value is not None and not isinstance(value, str):
+            value = str(value)
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.strings.append(value)
+            self.lookup[value] = code
+            if code >= 1 << (8 * self.codes.itemsize):
+                # 고유 값이 코드 범위를 넘으면 더 넓은 타입으로 변환
+                self.codes = array('H' if self.codes.typecode == 'B' else 'I', self.codes)
+        return code
+
+    def convert(self, value):
+        return value
+
+    def append(self, value):
+        code = self.encode(value)  # encode()에서 codes 배열이 교체될 수 있으므로 먼저 계산
+        self.codes.append(code)
+
+    push = append
+
+    def __getitem__(self, i):
+        return self.strings[self.codes[i]]
+
+    def nbytes(self) -> int:
+        return (self.codes.itemsize * len(self.codes)
+                + sum(len(s.encode('utf-8')) for s in self.strings if s))
+
+
+class TextColumn:
+    """고유 문자열 열: UTF-8 버퍼 하나 + 끝 오프셋 배열 (빈 값은 None)"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.ends = array('I')
+
+    def convert(self, value):
+        return None if value is None or value == '' else str(value).encode('utf-8')
+
+    def push(self, data):
+        if data:
+            self.buffer += data
+        self.ends.append(len(self.buffer))
+
+    def append(self, value):
+        self.push(self.convert(value))
+
+    def append_raw(self, data: bytes):
+        self.buffer += data
+        self.ends.append(len(self.buffer))
+
+    def raw(self, i) -> bytes:
+        start = self.ends[i - 1] if i > 0 else 0
+        return bytes(self.buffer[start:self.ends[i]])
+
+    def __getitem__(self, i):
+        data = self.raw(i)
+        return data.decode('utf-8') if data else None
+
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.ends.itemsize * len(self.ends)
+
+
+class IdIndex:
+    """item_id → 행 번호 오픈 어드레싱 해시 테이블"""
+
+    def __init__(self, capacity: int = 1024):
+        self._alloc(capacity)
+        self.size = 0
+
+    def _alloc(self, capacity: int):
+        self.mask = capacity - 1
+        self.keys = array('q', [INT_NULL]) * capacity
+        self.rows = array('i', [0]) * capacity
+
+    def _slot(self, key: int) -> int:
+        # 피보나치 해싱 후 선형 탐사
+        i = ((key * 0x9E3779B97F4A7C15) >> 17) & self.mask
+        keys = self.keys
+        while keys[i] != INT_NULL and keys[i] != key:
+            i = (i + 1) & self.mask
+        return i
+
+    def get(self, key: int, default=None):
+        i = self._slot(key)
+        return self.rows[i] if self.keys[i] == key else default
+
+    def put(self, key: int, row: int):
+        if (self.size + 1) * 2 > len(self.keys):
+            old_keys, old_rows = self.keys, self.rows
+            self._alloc(len(old_keys) * 2)
+            for k, r in zip(old_keys, old_rows):
+                if k != INT_NULL:
+                    i = self._slot(k)
+                    self.keys[i] = k
+                    self.rows[i] = r
+        i = self._slot(key)
+        if self.keys[i] != key:
+            self.size += 1
+        self.keys[i] = key
+        self.rows[i] = row
+
+    def nbytes(self) -> int:
+        return len(self.keys) * (self.keys.itemsize + self.rows.itemsize)
+
+
+def _make_column(field: str):
+    if field in INT_FIELDS:
+        return IntColumn()
+    if field in FLOAT_FIELDS:
+        return FloatColumn()
+    if field in TEXT_FIELDS:
+        return TextColumn()
+    return CodedColumn()
+
+
+class ListingStore:
+    """item_id 기준으로 중복 없이 매물을 저장하는 열 기반 저장소"""
+
+    def __init__(self, fields: list = None):
+        self.fields = list(fields or SEOUL_FIELDS)
+        if 'item_id' not in self.fields:
+            raise ValueError('fields에 item_id가 필요합니다')
+        self.columns = {f: _make_column(f) for f in self.fields}
+        self.index = IdIndex()
+        self.count = 0
+
+    @classmethod
+    def from_rows(cls, rows, fields: list = None) -> 'ListingStore':
+        store = cls(fields)
+        for row in rows:
+            store.add(row)
+        return store
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, item_id) -> bool:
+        try:
+            return self.index.get(int(item_id)) is not None
+        except (TypeError, ValueError):
+            return False
+
+    def add(self, row: dict) -> bool:
+        """매물 추가. item_id가 없거나 이미 있으면 False"""
+        item_id = parse_number(row.get('item_id'))
+        if not isinstance(item_id, int) or not INT_NULL < item_id < 2 ** 63:
+            return False
+        if self.index.get(item_id) is not None:
+            return False
+
+        # 모든 열 값을 먼저 변환한 뒤 추가 (중간에 실패해서 열 길이가 어긋나지 않도록)
+        converted = []
+        for field, column in self.columns.items():
+            value = row.get(field)
+            if field == 'thumbnail' and value == THUMBNAIL_TEMPLATE.format(item_id):
+                # 대부분의 썸네일은 item_id로 만들 수 있는 URL이므로 표시만 저장
+                converted.append((column, _TEMPLATE_MARK))
+            else:
+                converted.append((column, column.convert(value)))
+        for column, value in converted:
+            column.push(value)
+        self.index.put(item_id, self.count)
+        self.count += 1
+        return True
+
+    def value(self, i: int, field: str):
+        column = self.columns[field]
+        if field == 'thumbnail':
+            data = column.raw(i)
+            if data == _TEMPLATE_MARK:
+                return THUMBNAIL_TEMPLATE.format(self.columns['item_id'][i])
+            return data.decode('utf-8') if data else None
+        return column[i]
+
+    def row(self, i: int) -> dict:
+        """i번째 행을 dict로 반환"""
+        return {field: self.value(i, field) for field in self.fields}
+
+    def get(self, item_id, default=None):
+        """item_id로 매물 조회"""
+        i = self.index.get(int(item_id))
+        return default if i is None else self.row(i)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.row(i)
+
+    def iter_where(self, field: str, value):
+        """field == value 인 행만 반환 (사전 코드 열은 코드 비교로 빠르게 처리)"""
+        column = self.columns[field]
+        if isinstance(column, CodedColumn):
+            code = column.lookup.get(value)
+            if code is None:
+                return
+            for i, c in enumerate(column.codes):
+                if c == code:
+                    yield self.row(i)
+        else:
+            for i in range(self.count):
+                if self.value(i, field) == value:
+                    yield self.row(i)
+
+    def distinct(self, field: str) -> list:
+        """사전 코드 열의 고유 값 목록 (등장 순서)"""
+        column = self.columns[field]
+        if isinstance(column, CodedColumn):
+            return [s for s in column.strings[1:]]
+        return list(dict.fromkeys(self.value(i, field) for i in range(self.count)))
+
+    def nbytes(self) -> int:
+        """저장소가 사용하는 대략적인 바이트 수"""
+        return sum(c.nbytes() for c in self.columns.values()) + self.index.nbytes()
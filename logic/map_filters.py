@@ -0,0 +1,116 @@
+"""
+지도 API(v2/items/oneroom) 검색 조건 필터
+보증금/월세/면적 범위, 거래 유형(전세/월세), 서비스 유형(원룸/오피스텔 등)을
+지도 요청 파라미터로 전달하고, 상세 조회 결과에도 같은 조건을 다시 적용(안전장치)
+"""
+
+DEFAULT_SALES_TYPES = ['전세', '월세']
+
+
+def add_filter_arguments(parser):
+    """argparse 파서에 공통 필터 옵션 추가"""
+    group = parser.add_argument_group('검색 조건')
+    group.add_argument('--deposit-min', type=int, help='최소 보증금 (만원)')
+    group.add_argument('--deposit-max', type=int, help='최대 보증금 (만원)')
+    group.add_argument('--rent-min', type=int, help='최소 월세 (만원)')
+    group.add_argument('--rent-max', type=int, help='최대 월세 (만원)')
+    group.add_argument('--size-min', type=float, help='최소 전용면적 (m2)')
+    group.add_argument('--size-max', type=float, help='최대 전용면적 (m2)')
+    group.add_argument('--sales-type', action='append', choices=['전세', '월세', '매매'],
+                       help='거래 유형 (여러 번 지정 가능, 기본: 전세+월세)')
+    group.add_argument('--service-type', action='append',
+                       help='서비스 유형 (예: 원룸, 오피스텔, 빌라. 여러 번 지정 가능)')
+    return group
+
+
+def filters_from_args(args) -> dict:
+    """argparse 결과에서 필터 dict 생성 (지정하지 않은 조건은 None)"""
+    return {
+        'deposit_min': args.deposit_min,
+        'deposit_max': args.deposit_max,
+        'rent_min': args.rent_min,
+        'rent_max': args.rent_max,
+        'size_min': args.size_min,
+        'size_max': args.size_max,
+        'sales_types': args.sales_type,
+        'service_types': args.service_type,
+    }
+
+
+def apply_map_filters(params: dict, filters: dict = None, default_sales_types=DEFAULT_SALES_TYPES) -> dict:
+    """지도 API 파라미터에 필터 조건 반영한 새 dict 반환
+    default_sales_types: 거래 유형을 지정하지 않았을 때 보낼 값 (None이면 보내지 않음)"""
+    filters = filters or {}
+    params = {k: v for k, v in params.items() if not k.startswith(('salesTypes[', 'serviceType['))}
+
+    params['depositMin'] = str(filters.get('deposit_min') or 0)
+    params['rentMin'] = str(filters.get('rent_min') or 0)
+    if filters.get('deposit_max') is not None:
+        params['depositMax'] = str(filters['deposit_max'])
+    if filters.get('rent_max') is not None:
+        params['rentMax'] = str(filters['rent_max'])
+    if filters.get('size_min') is not None:
+        params['areaMin'] = str(filters['size_min'])
+    if filters.get('size_max') is not None:
+        params['areaMax'] = str(filters['size_max'])
+
+    for i, sales_type in enumerate(filters.get('sales_types') or default_sales_types or []):
+        params[f'salesTypes[{i}]'] = sales_type
+    for i, service_type in enumerate(filters.get('service_types') or []):
+        params[f'serviceType[{i}]'] = service_type
+    return params
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _in_range(value, low, high) -> bool:
+    if low is None and high is None:
+        return True
+    value = _number(value)
+    if value is None:
+        return False
+    if low is not None and value < low:
+        return False
+    if high is not None and value > high:
+        return False
+    return True
+
+
+def item_matches(item: dict, filters: dict = None) -> bool:
+    """상세 조회 응답(또는 파싱된 dict)이 필터 조건을 만족하는지 확인"""
+    if not filters:
+        return True
+
+    size_m2 = item.get('size_m2')
+    if not size_m2:
+        size_m2 = (item.get('전용면적') or {}).get('m2') or (item.get('공급면적') or {}).get('m2')
+
+    if not _in_range(item.get('deposit'), filters.get('deposit_min'), filters.get('deposit_max')):
+        return False
+    if not _in_range(item.get('rent'), filters.get('rent_min'), filters.get('rent_max')):
+        return False
+    if not _in_range(size_m2, filters.get('size_min'), filters.get('size_max')):
+        return False
+
+    sales_types = filters.get('sales_types')
+    sales_type = item.get('sales_type') or item.get('salesType')
+    if sales_types and sales_type and sales_type not in sales_types:
+        return False
+
+    service_types = filters.get('service_types')
+    service_type = item.get('service_type') or item.get('serviceType')
+    if service_types and service_type not in service_types:
+        return False
+    return True
+
+
+def filter_items(items: list, filters: dict = None) -> list:
+    """필터 조건을 만족하는 항목만 반환"""
+    if not filters:
+        return items
+    return [it for it in items if item_matches(it, filters)]
@@ -0,0 +1,166 @@
+"""
+지도 API(/v2/items/oneroom) 응답의 geohash 타일 캐시
+이웃한 동/지역 조회는 bbox가 크게 겹치는데 매번 bbox 전체를 새로 요청함
+→ 응답 점을 고정된 geohash 타일(기본 정밀도 6, 약 0.6km × 1km)에 나눠 담고 타일마다 받은 시각을 기록
+
+- query(bbox, params): bbox를 덮는 타일 중 없거나 ttl보다 오래된 타일만 요청하고 나머지는 캐시에서 꺼내 bbox로 거름
+  요청할 타일은 직사각형으로 묶어 요청 (처음 보는 bbox도 타일 경계로 넓힌 요청 1회)
+  겹친 부분을 빼고 남은 타일이 L자 등으로 나뉘면 감싸는 직사각형 하나로 요청 (slack 배 이하일 때)
+- 검색 조건(보증금, 월세 등 bbox 이외의 파라미터)이 다르면 다른 캐시 항목
+- 설정(ttl, 정밀도)은 모듈 전역 CACHE_SETTINGS, configure()로 변경 (ttl 0이면 캐시 없이 bbox 그대로 요청)
+
+사용 예:
+  _map_tiles = MapTileCache(_fetch_map_bbox)   # _fetch_map_bbox(bbox, params) → [{'itemId', 'lat', 'lng'}]
+  points = _map_tiles.query((south, north, west, east), params)
+"""
+import math
+import sys
+import threading
+import time
+
+try:
+    import pygeohash as pgh
+except ImportError:
+    print("pygeohash 설치 필요: pip install pygeohash")
+    sys.exit(1)
+
+# slack: 받아야 할 타일이 여러 직사각형으로 나뉠 때, 전체를 감싸는 직사각형이 받아야 할 타일 수의
+#        slack배 이하이면 (이미 있는 타일까지 새로 받더라도) 요청 한 번으로 묶음
+CACHE_SETTINGS = {'ttl': 600.0, 'precision': 6, 'slack': 2.0}
+BBOX_KEYS = {'latNorth', 'latSouth', 'lngEast', 'lngWest', 'geohash'}
+
+_caches = []
+
+
+def tile_size(precision: int) -> tuple:
+    """geohash 정밀도 → 타일 한 칸의 (위도, 경도) 크기 (도)"""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** (bits - bits // 2)
+
+
+def merge_tiles(tiles) -> list:
+    """(행, 열) 타일 목록 → 겹치지 않는 직사각형 (행 시작, 행 끝, 열 시작, 열 끝) 목록
+    행마다 연속된 열을 잇고, 바로 위 행과 열 구간이 같으면 위로 이어붙임"""
+    by_row = {}
+    for i, j in tiles:
+        by_row.setdefault(i, []).append(j)
+    rects, open_rects = [], {}  # (열 시작, 열 끝) → [행 시작, 행 끝]
+    for i in sorted(by_row):
+        runs = []
+        for j in sorted(by_row[i]):
+            if runs and runs[-1][1] == j - 1:
+                runs[-1][1] = j
+            else:
+                runs.append([j, j])
+        current = {}
+        for j0, j1 in runs:
+            rect = open_rects.pop((j0, j1), None)
+            if rect is not None and rect[1] == i - 1:
+                rect[1] = i
+            else:
+                if rect is not None:
+                    rects.append((rect[0], rect[1], j0, j1))
+                rect = [i, i]
+            current[(j0, j1)] = rect
+        rects.extend((r[0], r[1], j0, j1) for (j0, j1), r in open_rects.items())
+        open_rects = current
+    rects.extend((r[0], r[1], j0, j1) for (j0, j1), r in open_rects.items())
+    return rects
+
+
+def _params_key(params: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in (params or {}).items() if k not in BBOX_KEYS))
+
+
+def _in_bbox(point: dict, bbox: tuple) -> bool:
+    south, north, west, east = bbox
+    return south <= point['lat'] <= north and west <= point['lng'] <= east
+
+
+class MapTileCache:
+    def __init__(self, fetch):
+        """fetch(bbox, params) → bbox 안 매물 점 [{'itemId', 'lat', 'lng'}] (bbox = (south, north, west, east))"""
+        self.fetch = fetch
+        self.tiles = {}  # (검색 조건, geohash) → (받은 시각, 점 목록)
+        self.lock = threading.Lock()
+        self.stats = {'queries': 0, 'requests': 0, 'tiles_hit': 0, 'tiles_fetched': 0}
+        _caches.append(self)
+
+    def clear(self):
+        with self.lock:
+            self.tiles.clear()
+
+    def query(self, bbox: tuple, params: dict = None) -> list:
+        """bbox 안의 매물 점. 없거나 오래된 타일만 요청"""
+        ttl, precision = CACHE_SETTINGS['ttl'], CACHE_SETTINGS['precision']
+        self.stats['queries'] += 1
+        if ttl <= 0:
+            self.stats['requests'] += 1
+            return [p for p in self.fetch(bbox, params) if _in_bbox(p, bbox)]
+
+        south, north, west, east = bbox
+        dlat, dlng = tile_size(precision)
+        key = _params_key(params)
+        rows = range(math.floor((south + 90) / dlat), math.floor((north + 90) / dlat) + 1)
+        cols = range(math.floor((west + 180) / dlng), math.floor((east + 180) / dlng) + 1)
+        names = {(i, j): pgh.encode((i + 0.5) * dlat - 90, (j + 0.5) * dlng - 180, precision=precision)
+                 for i in rows for j in cols}
+
+        now = time.time()
+        with self.lock:
+            missing = [t for t, name in names.items()
+                       if now - self.tiles.get((key, name), (-math.inf,))[0] > ttl]
+
+        rects = merge_tiles(missing)
+        if len(rects) > 1:
+            i0, i1 = min(r[0] for r in rects), max(r[1] for r in rects)
+            j0, j1 = min(r[2] for r in rects), max(r[3] for r in rects)
+            if (i1 - i0 + 1) * (j1 - j0 + 1) <= CACHE_SETTINGS['slack'] * len(missing):
+                rects = [(i0, i1, j0, j1)]
+        self.stats['tiles_hit'] += len(names) - sum((r[1] - r[0] + 1) * (r[3] - r[2] + 1) for r in rects)
+
+        for i0, i1, j0, j1 in rects:
+            rect = (i0 * dlat - 90, (i1 + 1) * dlat - 90, j0 * dlng - 180, (j1 + 1) * dlng - 180)
+            points = self.fetch(rect, params)
+            fetched_at = time.time()
+            buckets = {(i, j): [] for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)}
+            for p in points:
+                bucket = buckets.get((math.floor((p['lat'] + 90) / dlat), math.floor((p['lng'] + 180) / dlng)))
+                if bucket is not None:
+                    bucket.append(p)
+            with self.lock:
+                for (i, j), tile_points in buckets.items():
+                    self.tiles[(key, names[(i, j)])] = (fetched_at, tile_points)
+            self.stats['requests'] += 1
+            self.stats['tiles_fetched'] += len(buckets)
+
+        with self.lock:
+            tiles = [self.tiles.get((key, name)) for name in names.values()]
+        return [p for tile in tiles if tile for p in tile[1] if _in_bbox(p, bbox)]
+
+
+def configure(ttl: float = None, precision: int = None):
+    """명령행 옵션 등으로 설정 변경 (정밀도가 바뀌면 기존 타일은 버림)"""
+    if ttl is not None:
+        CACHE_SETTINGS['ttl'] = ttl
+    if precision is not None and precision != CACHE_SETTINGS['precision']:
+        CACHE_SETTINGS['precision'] = precision
+        for cache in _caches:
+            cache.clear()
+
+
+def add_map_cache_arguments(parser, default_ttl: float = 600.0):
+    parser.add_argument('--map-cache-ttl', type=float, default=default_ttl,
+                        help='지도 응답 타일을 다시 요청하기 전까지 재사용할 시간(초, 0이면 캐시 사용 안 함)')
+    parser.add_argument('--map-cache-precision', type=int, default=6,
+                        help='지도 캐시 타일 geohash 정밀도 (6: 약 0.6km x 1km)')
+
+
+def configure_map_cache(args):
+    configure(ttl=args.map_cache_ttl, precision=args.map_cache_precision)
+
+
+def format_stats(cache: MapTileCache) -> str:
+    s = cache.stats
+    return (f'지도 캐시: 조회 {s["queries"]}회 → 요청 {s["requests"]}회 '
+            f'(타일 재사용 {s["tiles_hit"]}개, 새로 받음 {s["tiles_fetched"]}개)')
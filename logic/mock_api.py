@@ -0,0 +1,412 @@
+"""
+직방 API 로컬 목업 서버 (장애 주입 가능)
+스냅샷 데이터로 아래 API를 흉내 내고, 설정에 따라 429 폭주 / 느린 응답 / 연결 끊김 / 깨진 JSON 등을 섞어서 응답
+
+- GET  /v3/search                       (지역 검색)
+- GET  /v2/items/oneroom                (지도 bbox → itemId, 좌표)
+- POST /house/property/v1/items/list    (itemIds → 매물 목록)
+- GET  /v3/items/{item_id}              (매물 상세)
+- GET  /_mock/stats, POST /_mock/faults, POST /_mock/reset  (시나리오 실행기용 제어)
+
+크롤러는 ZIGBANG_API_BASE 환경 변수로 이 서버를 바라보게 하면 됨
+
+사용법:
+  python mock_api.py --snapshot seoul_data.zip --port 8900
+  python mock_api.py --burst-every 20 --burst-len 5 --drop-rate 0.05 --malformed-rate 0.05
+  python mock_api.py --synthetic 1000000                     # 합성 매물 100만 건으로 응답 (synthetic_listings)
+  ZIGBANG_API_BASE=http://127.0.0.1:8900 python search_all_seoul.py
+"""
+import argparse
+import json
+import math
+import random
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from snapshot_diff import iter_snapshot_rows
+from synthetic_listings import generate_rows, detail_payload
+
+DEFAULT_FAULTS = {
+    'burst_every': 0,        # N번째 요청마다 429 폭주 시작 (0이면 없음)
+    'burst_len': 0,          # 폭주 한 번에 연속으로 돌려줄 429 수
+    'error_rate': 0.0,       # 500 응답 확률
+    'slow_rate': 0.0,        # 느린 응답 확률
+    'slow_seconds': 0.0,     # 느린 응답 지연 시간
+    'drop_rate': 0.0,        # 응답 없이 연결을 끊을 확률
+    'malformed_rate': 0.0,   # 200이지만 잘린 JSON을 돌려줄 확률
+    'partial_rate': 0.0,     # items/list에서 일부 매물을 빼고 200으로 응답할 확률
+    'endpoints': None,       # 장애를 넣을 엔드포인트 이름 목록 (None이면 전체)
+}
+
+ENDPOINT_NAMES = ('search', 'map', 'list', 'detail')
+CELL_DEGREES = 0.01  # 지도 bbox 조회용 격자 칸 크기 (합성 매물 수백만 건에서도 bbox 안 칸만 확인)
+_DETAIL_RE = re.compile(r'^/v3/items/(\d+)$')
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class MockData:
+    """스냅샷 행을 API 응답 형태로 바꿔 주는 데이터 원본"""
+
+    def __init__(self, rows, seed: int = 0):
+        self.seed = seed
+        self.items = {}
+        self.cells = {}  # (위도 칸, 경도 칸) → (추가 순번, item_id) 목록
+        self.dongs = {}  # local3 → [local2, 매물 수, Σlat, Σlng] (처음 나온 순서)
+        for row in rows:
+            item_id = int(row['item_id'])
+            if item_id not in self.items and _number(row.get('lat')) is not None:
+                self.items[item_id] = row
+                lat, lng = float(row['lat']), float(row['lng'])
+                self.cells.setdefault(self._cell(lat, lng), []).append((len(self.items), item_id))
+                if row.get('local3'):
+                    dong = self.dongs.setdefault(row['local3'], [row.get('local2', ''), 0, 0.0, 0.0])
+                    dong[1] += 1
+                    dong[2] += lat
+                    dong[3] += lng
+
+    @classmethod
+    def from_snapshot(cls, path: str) -> 'MockData':
+        return cls(iter_snapshot_rows(path))
+
+    @classmethod
+    def from_synthetic(cls, rows: int, reference: str = 'seoul_data.zip', seed: int = 0) -> 'MockData':
+        return cls(generate_rows(rows, reference, seed), seed)
+
+    @staticmethod
+    def _cell(lat: float, lng: float) -> tuple:
+        return math.floor(lat / CELL_DEGREES), math.floor(lng / CELL_DEGREES)
+
+    def search(self, query: str) -> list:
+        matched = [(name, d) for name, d in self.dongs.items() if name in query or query.endswith(name)]
+        if not matched:
+            return []
+        count = sum(d[1] for _, d in matched)
+        lat = sum(d[2] for _, d in matched) / count
+        lng = sum(d[3] for _, d in matched) / count
+        name, (gu, *_) = matched[0]
+        return [{'type': 'address', 'name': name, 'description': f'{gu} {name}',
+                 'lat': lat, 'lng': lng}]
+
+    def map_items(self, params: dict) -> list:
+        south, north = _number(params.get('latSouth')), _number(params.get('latNorth'))
+        west, east = _number(params.get('lngWest')), _number(params.get('lngEast'))
+        if None in (south, north, west, east):
+            return []
+        limits = [('deposit', _number(params.get('depositMin')), _number(params.get('depositMax'))),
+                  ('rent', _number(params.get('rentMin')), _number(params.get('rentMax')))]
+        result = []
+        (south_cell, west_cell), (north_cell, east_cell) = self._cell(south, west), self._cell(north, east)
+        for item_id in self._ids_in_cells(south_cell, north_cell, west_cell, east_cell):
+            row = self.items[item_id]
+            lat, lng = float(row['lat']), float(row['lng'])
+            if not (south <= lat <= north and west <= lng <= east):
+                continue
+            ok = True
+            for field, low, high in limits:
+                value = _number(row.get(field))
+                if value is not None and ((low is not None and value < low) or
+                                          (high is not None and value > high)):
+                    ok = False
+            if ok:
+                result.append({'lat': lat, 'lng': lng, 'itemId': item_id, 'itemBmType': 'ZIGBANG'})
+        return result
+
+    def _ids_in_cells(self, south: int, north: int, west: int, east: int) -> list:
+        if (north - south + 1) * (east - west + 1) > len(self.cells):
+            entries = [e for (y, x), cell in self.cells.items() if south <= y <= north and west <= x <= east
+                       for e in cell]
+        else:
+            entries = [e for y in range(south, north + 1) for x in range(west, east + 1)
+                       for e in self.cells.get((y, x), ())]
+        # 칸 순서가 아니라 스냅샷 순서로 응답
+        entries.sort()
+        return [item_id for _, item_id in entries]
+
+    def list_item(self, item_id: int) -> dict:
+        row = self.items[item_id]
+        return {
+            'item_id': item_id,
+            'title': row.get('title'),
+            'addressOrigin': {'local1': row.get('local1', ''), 'local2': row.get('local2', ''),
+                              'local3': row.get('local3', ''), 'fullText': row.get('address', '')},
+            'deposit': _number(row.get('deposit')),
+            'rent': _number(row.get('rent')),
+            'size_m2': _number(row.get('size_m2')),
+            'floor': row.get('floor'),
+            'sales_type': '월세' if _number(row.get('rent')) else '전세',
+            'service_type': row.get('service_type'),
+            'manage_cost': row.get('manage_cost'),
+            'location': {'lat': float(row['lat']), 'lng': float(row['lng'])},
+            'images_thumbnail': row.get('thumbnail'),
+        }
+
+    def detail(self, item_id: int) -> dict:
+        row = self.items[item_id]
+        # 실제 API처럼 가격/면적/좌표는 숫자로 (CSV 스냅샷 행은 문자열)
+        return detail_payload(dict(row, deposit=_number(row.get('deposit')), rent=_number(row.get('rent')),
+                                   size_m2=_number(row.get('size_m2')),
+                                   lat=float(row['lat']), lng=float(row['lng'])), self.seed)
+
+
+class FaultInjector:
+    """요청마다 어떤 장애를 넣을지 결정 (seed 고정 시 재현 가능)"""
+
+    def __init__(self, faults: dict = None, seed: int = 0):
+        self.lock = threading.Lock()
+        self.configure(faults, seed)
+
+    def configure(self, faults: dict = None, seed: int = 0):
+        with self.lock:
+            self.faults = dict(DEFAULT_FAULTS, **(faults or {}))
+            self.random = random.Random(seed)
+            self.counter = 0
+
+    def decide(self, endpoint: str) -> tuple:
+        """(장애 종류 또는 None, 지연 시간) 반환"""
+        with self.lock:
+            f = self.faults
+            if f['endpoints'] and endpoint not in f['endpoints']:
+                return None, 0.0
+            self.counter += 1
+            delay = f['slow_seconds'] if self.random.random() < f['slow_rate'] else 0.0
+            if f['burst_every'] and (self.counter - 1) % f['burst_every'] < f['burst_len']:
+                return 'rate_limited', delay
+            roll = self.random.random()
+            for kind, rate in (('drop', f['drop_rate']), ('error', f['error_rate']),
+                               ('malformed', f['malformed_rate']), ('partial', f['partial_rate'])):
+                if roll < rate:
+                    return kind, delay
+                roll -= rate
+            return None, delay
+
+    def drop_some(self, items: list) -> list:
+        with self.lock:
+            keep = max(0, len(items) - max(1, len(items) // 3))
+            return self.random.sample(items, keep) if keep else []
+
+
+class MockStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.data = {name: {'requests': 0, 'ok': 0, 'faults': {}, 'ids_requested': 0,
+                                'items_served': 0} for name in ENDPOINT_NAMES}
+
+    def record(self, endpoint: str, fault: str = None, ids_requested: int = 0, items_served: int = 0):
+        with self.lock:
+            entry = self.data[endpoint]
+            entry['requests'] += 1
+            entry['ids_requested'] += ids_requested
+            entry['items_served'] += items_served
+            if fault:
+                entry['faults'][fault] = entry['faults'].get(fault, 0) + 1
+            if fault in (None, 'partial'):
+                entry['ok'] += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return json.loads(json.dumps(self.data))
+
+
+def make_handler(data: MockData, injector: FaultInjector, stats: MockStats):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send_json(self, status: int, payload, raw: bytes = None):
+            body = raw if raw is not None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _drop(self):
+            self.close_connection = True
+            try:
+                self.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+        def _serve(self, endpoint: str, build, ids_requested: int = 0):
+            """장애 결정 → 지연 → 응답. build(partial)은 (응답 객체, 매물 수) 반환"""
+            fault, delay = injector.decide(endpoint)
+            if delay:
+                time.sleep(delay)
+            if fault == 'drop':
+                stats.record(endpoint, fault, ids_requested)
+                self._drop()
+                return
+            if fault == 'rate_limited':
+                stats.record(endpoint, fault, ids_requested)
+                self._send_json(429, {'message': 'Too Many Requests'})
+                return
+            if fault == 'error':
+                stats.record(endpoint, fault, ids_requested)
+                self._send_json(500, {'message': 'Internal Server Error'})
+                return
+            payload, served = build(fault == 'partial')
+            if fault == 'malformed':
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                stats.record(endpoint, fault, ids_requested)
+                self._send_json(200, None, raw=body[:max(1, len(body) // 2)])
+                return
+            stats.record(endpoint, fault, ids_requested, served)
+            self._send_json(200, payload)
+
+        def _read_body(self) -> bytes:
+            length = int(self.headers.get('Content-Length') or 0)
+            return self.rfile.read(length) if length else b''
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            if url.path == '/_mock/stats':
+                self._send_json(200, stats.snapshot())
+            elif url.path == '/v3/search':
+                def build(_):
+                    items = data.search(params.get('q', ''))
+                    return {'success': bool(items), 'items': items}, len(items)
+                self._serve('search', build)
+            elif url.path == '/v2/items/oneroom':
+                def build(_):
+                    items = data.map_items(params)
+                    return {'items': items}, len(items)
+                self._serve('map', build)
+            elif _DETAIL_RE.match(url.path):
+                item_id = int(_DETAIL_RE.match(url.path).group(1))
+                if item_id not in data.items:
+                    stats.record('detail', 'not_found', 1)
+                    self._send_json(404, {'message': 'Not Found'})
+                    return
+                self._serve('detail', lambda _: (data.detail(item_id), 1), ids_requested=1)
+            else:
+                self._send_json(404, {'message': 'Not Found'})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            body = self._read_body()
+            if url.path == '/_mock/faults':
+                config = json.loads(body or b'{}')
+                injector.configure(config.get('faults'), config.get('seed', 0))
+                self._send_json(200, {'ok': True})
+            elif url.path == '/_mock/reset':
+                stats.reset()
+                self._send_json(200, {'ok': True})
+            elif url.path == '/house/property/v1/items/list':
+                try:
+                    ids = [int(i) for i in json.loads(body or b'{}').get('itemIds', [])]
+                except (ValueError, TypeError, AttributeError):
+                    self._send_json(400, {'message': 'Bad Request'})
+                    return
+
+                def build(partial):
+                    found = [i for i in ids if i in data.items]
+                    if partial:
+                        found = injector.drop_some(found)
+                    return {'items': [data.list_item(i) for i in found]}, len(found)
+                self._serve('list', build, ids_requested=len(ids))
+            else:
+                self._send_json(404, {'message': 'Not Found'})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class MockServer:
+    """백그라운드 스레드에서 도는 목업 서버 (port=0이면 빈 포트 자동 선택)"""
+
+    def __init__(self, data: MockData, faults: dict = None, seed: int = 0,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.data = data
+        self.injector = FaultInjector(faults, seed)
+        self.stats = MockStats()
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(data, self.injector, self.stats))
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'MockServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def configure(self, faults: dict = None, seed: int = 0):
+        self.injector.configure(faults, seed)
+        self.stats.reset()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='직방 API 로컬 목업 서버 (장애 주입)')
+    parser.add_argument('--snapshot', default='seoul_data.zip',
+                        help='응답 데이터로 쓸 스냅샷 (--synthetic 이면 분포를 가져올 기준 스냅샷)')
+    parser.add_argument('--synthetic', type=int, help='스냅샷 대신 합성 매물 N건으로 응답')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--seed', type=int, default=0, help='장애 발생 난수 seed')
+    parser.add_argument('--burst-every', type=int, default=0, help='N번째 요청마다 429 폭주 시작')
+    parser.add_argument('--burst-len', type=int, default=0, help='폭주 한 번의 연속 429 수')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='500 응답 확률')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='느린 응답 확률')
+    parser.add_argument('--slow-seconds', type=float, default=0.0, help='느린 응답 지연 (초)')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='연결 끊김 확률')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='깨진 JSON 확률')
+    parser.add_argument('--partial-rate', type=float, default=0.0, help='items/list 일부 누락 확률')
+    parser.add_argument('--endpoint', action='append', choices=ENDPOINT_NAMES,
+                        help='장애를 넣을 엔드포인트 (기본: 전체)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.synthetic:
+        data = MockData.from_synthetic(args.synthetic, args.snapshot, args.seed)
+    else:
+        data = MockData.from_snapshot(args.snapshot)
+    faults = {
+        'burst_every': args.burst_every, 'burst_len': args.burst_len,
+        'error_rate': args.error_rate, 'slow_rate': args.slow_rate, 'slow_seconds': args.slow_seconds,
+        'drop_rate': args.drop_rate, 'malformed_rate': args.malformed_rate,
+        'partial_rate': args.partial_rate, 'endpoints': args.endpoint,
+    }
+    server = MockServer(data, faults, args.seed, args.host, args.port)
+    print(f'🚀 목업 API: {server.url} (매물 {len(data.items)}개)')
+    print(f'   ZIGBANG_API_BASE={server.url} 로 크롤러 실행')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print('\n종료')
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+주변 시설(POI) 오프라인 보강
+지하철역 등 POI 목록(CSV)으로 KD-tree를 만들고 모든 매물 좌표에 대해
+가장 가까운 POI, 거리(m), 반경 내 POI 수를 한 번에 계산 (매물별 /v3/items/{id} 호출 없음)
+
+POI CSV 형식 (utf-8, 헤더 필수):
+  name,lat,lng[,category]
+  강남,37.497942,127.027621,subway
+
+사용법:
+  python poi_enrich.py seoul_data.zip --poi subway_stations.csv
+  python poi_enrich.py seoul_data/ --poi pois.csv --category subway --radius 500 --out enriched.csv
+"""
+import argparse
+import csv
+import math
+import sys
+import time
+
+from snapshot_diff import iter_snapshot_rows
+
+# 서울 근처에서 위경도를 평면 좌표(m)로 바꾸는 기준 위도
+_REF_LAT = 37.55
+_M_PER_DEG_LAT = 111320.0
+_M_PER_DEG_LNG = 111320.0 * math.cos(math.radians(_REF_LAT))
+
+
+def project(lat: float, lng: float) -> tuple:
+    """위경도 → 평면 좌표 (m). 서울 범위에서는 오차 1% 미만"""
+    return lng * _M_PER_DEG_LNG, lat * _M_PER_DEG_LAT
+
+
+class KDTree:
+    """2차원 KD-tree (최근접 이웃, 반경 내 개수)"""
+
+    def __init__(self, points: list):
+        # points: (x, y, payload) 목록
+        self.nodes = []  # (x, y, payload, 분할 축, 왼쪽 노드, 오른쪽 노드)
+        self.root = self._build(list(points), 0)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def _build(self, points: list, depth: int) -> int:
+        if not points:
+            return -1
+        axis = depth % 2
+        points.sort(key=lambda p: p[axis])
+        mid = len(points) // 2
+        x, y, payload = points[mid]
+        index = len(self.nodes)
+        self.nodes.append(None)
+        left = self._build(points[:mid], depth + 1)
+        right = self._build(points[mid + 1:], depth + 1)
+        self.nodes[index] = (x, y, payload, axis, left, right)
+        return index
+
+    def nearest(self, x: float, y: float) -> tuple:
+        """(거리, payload) 반환. 트리가 비어 있으면 (inf, None)"""
+        best = [math.inf, None]
+        nodes = self.nodes
+        stack = [self.root] if self.root >= 0 else []
+        while stack:
+            i = stack.pop()
+            nx, ny, payload, axis, left, right = nodes[i]
+            d2 = (nx - x) ** 2 + (ny - y) ** 2
+            if d2 < best[0]:
+                best[0], best[1] = d2, payload
+            diff = (x - nx) if axis == 0 else (y - ny)
+            near, far = (left, right) if diff < 0 else (right, left)
+            # 먼 쪽은 분할면까지 거리가 현재 최선보다 가까울 때만 탐색 (가까운 쪽을 나중에 넣어 먼저 탐색)
+            if far >= 0 and diff * diff < best[0]:
+                stack.append(far)
+            if near >= 0:
+                stack.append(near)
+        return math.sqrt(best[0]), best[1]
+
+    def count_within(self, x: float, y: float, radius: float) -> int:
+        r2 = radius * radius
+        count = 0
+        nodes = self.nodes
+        stack = [self.root] if self.root >= 0 else []
+        while stack:
+            i = stack.pop()
+            nx, ny, _, axis, left, right = nodes[i]
+            if (nx - x) ** 2 + (ny - y) ** 2 <= r2:
+                count += 1
+            diff = (x - nx) if axis == 0 else (y - ny)
+            if left >= 0 and diff <= radius:
+                stack.append(left)
+            if right >= 0 and diff >= -radius:
+                stack.append(right)
+        return count
+
+
+def load_pois(path: str, category: str = None) -> list:
+    """POI CSV → [{name, lat, lng, category}]"""
+    pois = []
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            if category and row.get('category') != category:
+                continue
+            try:
+                lat, lng = float(row['lat']), float(row['lng'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            pois.append({'name': row.get('name', ''), 'lat': lat, 'lng': lng,
+                         'category': row.get('category', '')})
+    return pois
+
+
+def build_tree(pois: list) -> KDTree:
+    return KDTree([project(p['lat'], p['lng']) + (p['name'],) for p in pois])
+
+
+def enrich_rows(rows, tree: KDTree, radius: float):
+    """매물 행에 nearest_poi, nearest_poi_m, poi_count 필드를 추가하여 반환"""
+    for row in rows:
+        try:
+            x, y = project(float(row['lat']), float(row['lng']))
+        except (KeyError, TypeError, ValueError):
+            row.update({'nearest_poi': '', 'nearest_poi_m': '', 'poi_count': ''})
+            yield row
+            continue
+        dist, name = tree.nearest(x, y)
+        row['nearest_poi'] = name or ''
+        row['nearest_poi_m'] = round(dist) if name is not None else ''
+        row['poi_count'] = tree.count_within(x, y, radius)
+        yield row
+
+
+def _unique_rows(path: str):
+    seen = set()
+    for row in iter_snapshot_rows(path):
+        if row['item_id'] not in seen:
+            seen.add(row['item_id'])
+            yield row
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='매물 좌표 기준 주변 POI 보강 (KD-tree)')
+    parser.add_argument('snapshot', help='스냅샷 (CSV 파일, 구별 CSV 폴더 또는 zip)')
+    parser.add_argument('--poi', required=True, help='POI CSV (name,lat,lng[,category])')
+    parser.add_argument('--category', help='사용할 POI category (기본: 전체)')
+    parser.add_argument('--radius', type=float, default=500, help='POI 수를 셀 반경 (m)')
+    parser.add_argument('--out', default='zigbang_poi_enriched.csv', help='결과 CSV')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    pois = load_pois(args.poi, args.category)
+    if not pois:
+        print(f'❌ POI를 찾을 수 없습니다: {args.poi}')
+        sys.exit(1)
+
+    start = time.time()
+    tree = build_tree(pois)
+    count = 0
+    with open(args.out, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = None
+        for row in enrich_rows(_unique_rows(args.snapshot), tree, args.radius):
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(row.keys()), extrasaction='ignore')
+                writer.writeheader()
+            writer.writerow(row)
+            count += 1
+
+    print(f'✅ 완료! POI {len(pois)}개, 매물 {count}개 보강 ({time.time() - start:.2f}초)')
+    print(f'   - 결과: {args.out}')
+
+
+if __name__ == '__main__':
+    main()
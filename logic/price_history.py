@@ -0,0 +1,344 @@
+"""
+매물별 가격 이력 저장소 (append-only)
+스냅샷을 넣을 때마다 이전 상태와 비교하여 바뀐 매물(신규/가격 변경/삭제)만 기록
+
+파일 구성:
+- price_history.bin       : 배치(스냅샷 1회분)가 뒤에 계속 붙는 이력 파일
+                            배치 = 헤더(날짜, 건수, item_id 범위, 길이) + zlib 압축 본문
+                            본문은 item_id 순 정렬, item_id/가격 모두 varint 델타 인코딩
+- price_history.bin.state : 매물별 최신 값 (다음 스냅샷 비교용, 매번 원자적으로 교체)
+                            + 마지막으로 반영한 날짜와 그때의 이력 파일 길이
+                            → 배치를 붙인 뒤 state 저장 전에 중단되면 다음 ingest에서 그 배치를 잘라내고 다시 씀
+
+저장 공간은 스냅샷 수가 아니라 변경 건수에 비례
+
+사용법:
+  python price_history.py ingest seoul_data.zip --date 2025-11-28
+  python price_history.py ingest seoul_data/ --date 2025-11-29
+  python price_history.py history 46766407
+  python price_history.py cuts 관악구 --since 2025-11-01
+"""
+import argparse
+import os
+import pickle
+import struct
+import sys
+import zlib
+from datetime import date, datetime
+
+from snapshot_diff import iter_snapshot_rows
+
+FILE_MAGIC = b'ZPH1'
+BATCH_HEADER = struct.Struct('<IIqqI')  # 날짜(yyyymmdd), 레코드 수, 최소/최대 item_id, 본문 길이
+PRICE_FIELDS = ['deposit', 'rent', 'manage_cost']
+
+KIND_NEW = 0
+KIND_CHANGED = 1
+KIND_REMOVED = 2
+KIND_NAMES = {KIND_NEW: 'new', KIND_CHANGED: 'changed', KIND_REMOVED: 'removed'}
+CLEARED = 'cleared'  # 가격 변경 델타: 값이 있다가 없어짐 (None은 변경 없음)
+
+
+# ----- varint 인코딩 -----
+
+def _write_varint(out: bytearray, value: int):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data: bytes, pos: int) -> tuple:
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def _to_int(value):
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return int(float(value))
+        except ValueError:
+            return None
+
+
+def date_key(value) -> int:
+    """'2025-11-28' / date → 20251128"""
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%Y-%m-%d').date()
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def _format_date(key: int) -> str:
+    return f'{key // 10000:04d}-{key // 100 % 100:02d}-{key % 100:02d}'
+
+
+# ----- 배치 인코딩 -----
+
+def encode_batch(records: list) -> bytes:
+    """records: (item_id, kind, gu, [deposit, rent, manage_cost 델타, None 또는 CLEARED]) 목록 (item_id 순)"""
+    gus = []
+    gu_codes = {}
+    for _, _, gu, _ in records:
+        if gu not in gu_codes:
+            gu_codes[gu] = len(gus)
+            gus.append(gu)
+
+    body = bytearray()
+    _write_varint(body, len(gus))
+    for gu in gus:
+        raw = (gu or '').encode('utf-8')
+        _write_varint(body, len(raw))
+        body += raw
+
+    prev_id = 0
+    for item_id, kind, gu, deltas in records:
+        _write_varint(body, item_id - prev_id)
+        prev_id = item_id
+        # 하위 2비트: 종류, 그 위 3비트: 필드별 값 없음(None) 표시, 그 위 3비트: 값이 없어짐(CLEARED) 표시
+        flags = kind
+        for i, delta in enumerate(deltas):
+            if delta is None:
+                flags |= 1 << (2 + i)
+            elif delta is CLEARED:
+                flags |= 1 << (5 + i)
+        body.append(flags)
+        _write_varint(body, gu_codes[gu])
+        for delta in deltas:
+            if delta is not None and delta is not CLEARED:
+                _write_varint(body, _zigzag(delta))
+    return zlib.compress(bytes(body), 6)
+
+
+def decode_batch(compressed: bytes):
+    """(item_id, 종류, 구, 델타 목록) 반환"""
+    data = zlib.decompress(compressed)
+    count, pos = _read_varint(data, 0)
+    gus = []
+    for _ in range(count):
+        length, pos = _read_varint(data, pos)
+        gus.append(data[pos:pos + length].decode('utf-8') or None)
+        pos += length
+
+    item_id = 0
+    while pos < len(data):
+        delta_id, pos = _read_varint(data, pos)
+        item_id += delta_id
+        flags = data[pos]
+        pos += 1
+        gu_code, pos = _read_varint(data, pos)
+        deltas = []
+        for i in range(len(PRICE_FIELDS)):
+            if flags & (1 << (2 + i)):
+                deltas.append(None)
+            elif flags & (1 << (5 + i)):
+                deltas.append(CLEARED)
+            else:
+                value, pos = _read_varint(data, pos)
+                deltas.append(_unzigzag(value))
+        yield item_id, flags & 0x3, gus[gu_code], deltas
+
+
+class PriceHistory:
+    def __init__(self, path: str = 'price_history.bin'):
+        self.path = path
+        self.state_path = path + '.state'
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(FILE_MAGIC)
+
+    def _load_state(self) -> dict:
+        if not os.path.exists(self.state_path):
+            # state가 없으면 반영된 배치가 없는 것 → 매직 뒤는 모두 중단된 배치
+            return {'last_date': 0, 'items': {}, 'log_size': len(FILE_MAGIC)}
+        with open(self.state_path, 'rb') as f:
+            return pickle.load(f)
+
+    def _save_state(self, state: dict):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.state_path)
+
+    def iter_batches(self, since: int = 0, item_id: int = None):
+        """(날짜, 압축 본문) 반환. 헤더만 읽고 조건에 맞지 않는 배치는 건너뜀"""
+        with open(self.path, 'rb') as f:
+            if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                raise ValueError(f'가격 이력 파일 형식이 아닙니다: {self.path}')
+            while True:
+                header = f.read(BATCH_HEADER.size)
+                if len(header) < BATCH_HEADER.size:
+                    return
+                day, count, min_id, max_id, length = BATCH_HEADER.unpack(header)
+                if day < since or (item_id is not None and not min_id <= item_id <= max_id):
+                    f.seek(length, os.SEEK_CUR)
+                    continue
+                body = f.read(length)
+                if len(body) < length:
+                    return  # 쓰는 도중 중단된 배치
+                yield day, body
+
+    def ingest(self, rows, day: int) -> dict:
+        """스냅샷 행을 넣고 변경분만 배치로 추가. 종류별 건수 반환"""
+        state = self._load_state()
+        if day <= state['last_date']:
+            raise ValueError(f'마지막으로 넣은 스냅샷({_format_date(state["last_date"])}) '
+                             f'이후 날짜만 넣을 수 있습니다: {_format_date(day)}')
+        items = state['items']
+        seen = set()
+        records = []
+        counts = {'new': 0, 'changed': 0, 'removed': 0}
+
+        for row in rows:
+            item_id = _to_int(row.get('item_id'))
+            if item_id is None or item_id in seen:
+                continue
+            seen.add(item_id)
+            gu = row.get('local2') or row.get('search_gu') or None
+            values = tuple(_to_int(row.get(f)) for f in PRICE_FIELDS)
+            prev = items.get(item_id)
+            if prev is None:
+                records.append((item_id, KIND_NEW, gu, list(values)))
+                counts['new'] += 1
+            elif prev[1:] != values:
+                deltas = [None if v == p else CLEARED if v is None else v - (p or 0)
+                          for v, p in zip(values, prev[1:])]
+                records.append((item_id, KIND_CHANGED, gu, deltas))
+                counts['changed'] += 1
+            elif prev[0] == gu:
+                continue
+            # 가격이 같아도 구가 바뀌었으면 저장된 구를 갱신 (삭제 기록에 쓰임)
+            items[item_id] = (gu,) + values
+
+        for item_id in [iid for iid in items if iid not in seen]:
+            gu = items.pop(item_id)[0]
+            records.append((item_id, KIND_REMOVED, gu, [None] * len(PRICE_FIELDS)))
+            counts['removed'] += 1
+
+        # state에 기록된 길이 뒤는 state 저장 전에 중단된 배치이므로 잘라내고 이어 씀
+        # (state 교체가 반영 완료 시점 → 같은 날짜를 다시 넣어도 델타가 두 번 적용되지 않음)
+        with open(self.path, 'r+b') as f:
+            f.truncate(state.get('log_size', len(FILE_MAGIC)))
+            f.seek(0, os.SEEK_END)
+            if records:
+                records.sort(key=lambda r: r[0])
+                body = encode_batch(records)
+                header = BATCH_HEADER.pack(day, len(records), records[0][0], records[-1][0], len(body))
+                f.write(header + body)
+                f.flush()
+                os.fsync(f.fileno())
+            state['log_size'] = f.tell()
+
+        state['last_date'] = day
+        self._save_state(state)
+        return counts
+
+    def history(self, item_id: int) -> list:
+        """매물 하나의 이력 [{date, event, deposit, rent, manage_cost, gu}]"""
+        result = []
+        current = [None] * len(PRICE_FIELDS)
+        for day, body in self.iter_batches(item_id=item_id):
+            for iid, kind, gu, deltas in decode_batch(body):
+                if iid < item_id:
+                    continue
+                if iid > item_id:
+                    break
+                if kind == KIND_NEW:
+                    current = list(deltas)
+                elif kind == KIND_CHANGED:
+                    current = [c if d is None else None if d is CLEARED else (c or 0) + d
+                               for c, d in zip(current, deltas)]
+                entry = {'date': _format_date(day), 'event': KIND_NAMES[kind], 'gu': gu}
+                if kind != KIND_REMOVED:
+                    entry.update(zip(PRICE_FIELDS, current))
+                result.append(entry)
+                break
+        return result
+
+    def price_cuts(self, gu: str, since: int) -> list:
+        """since 이후 gu에서 보증금 또는 월세가 내려간 변경 [{date, item_id, deposit_delta, ...}]"""
+        cuts = []
+        for day, body in self.iter_batches(since=since):
+            for iid, kind, record_gu, deltas in decode_batch(body):
+                if kind != KIND_CHANGED or record_gu != gu:
+                    continue
+                deltas = [None if d is CLEARED else d for d in deltas]
+                deposit_delta, rent_delta, _ = deltas
+                if (deposit_delta or 0) < 0 or (rent_delta or 0) < 0:
+                    entry = {'date': _format_date(day), 'item_id': iid}
+                    entry.update({f'{f}_delta': d for f, d in zip(PRICE_FIELDS, deltas)})
+                    cuts.append(entry)
+        return cuts
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='매물별 가격 이력 저장소')
+    parser.add_argument('--store', default='price_history.bin', help='이력 파일 경로')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('ingest', help='스냅샷을 넣고 변경분 기록')
+    p.add_argument('snapshot', help='스냅샷 (CSV 파일, 구별 CSV 폴더 또는 zip)')
+    p.add_argument('--date', default=date.today().isoformat(), help='스냅샷 날짜 (YYYY-MM-DD)')
+
+    p = sub.add_parser('history', help='매물 하나의 가격 이력')
+    p.add_argument('item_id', type=int)
+
+    p = sub.add_parser('cuts', help='구별 가격 인하 목록')
+    p.add_argument('gu', help='구 이름 (예: 관악구)')
+    p.add_argument('--since', required=True, help='시작 날짜 (YYYY-MM-DD)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    store = PriceHistory(args.store)
+
+    if args.command == 'ingest':
+        try:
+            counts = store.ingest(iter_snapshot_rows(args.snapshot), date_key(args.date))
+        except ValueError as e:
+            print(f'❌ {e}')
+            sys.exit(1)
+        print(f'✅ {args.date} 스냅샷 반영: 신규 {counts["new"]}개, '
+              f'가격 변경 {counts["changed"]}개, 삭제 {counts["removed"]}개')
+        print(f'   이력 파일 크기: {os.path.getsize(args.store):,} bytes')
+    elif args.command == 'history':
+        entries = store.history(args.item_id)
+        if not entries:
+            print(f'❌ {args.item_id}: 이력이 없습니다.')
+        for e in entries:
+            prices = '' if e['event'] == 'removed' else \
+                f' 보증금 {e["deposit"]} / 월세 {e["rent"]} / 관리비 {e["manage_cost"]}'
+            print(f'  {e["date"]} [{e["event"]}]{prices}')
+    elif args.command == 'cuts':
+        cuts = store.price_cuts(args.gu, date_key(args.since))
+        for c in cuts:
+            print(f'  {c["date"]} {c["item_id"]}: 보증금 {c["deposit_delta"] or 0:+d} / '
+                  f'월세 {c["rent_delta"] or 0:+d}')
+        print(f'\n{args.gu} 가격 인하: {len(cuts)}건 ({args.since} 이후)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+수집 스크립트 공용 --profile 옵션
+단계(search / map / list / detail / parse / write)별로 시간과 메모리 할당을 태그하여 기록
+
+- 단계 태그: 함수에 @staged('list') 를 붙이거나 with stage('write'): 블록 사용
+  프로파일링이 꺼져 있으면 전역 변수 하나만 확인하고 바로 실행
+- CPU: 별도 스레드가 주기적으로(기본 10ms) 모든 스레드의 스택을 샘플링하여
+  flamegraph.pl / speedscope 에서 바로 읽을 수 있는 collapsed stack(.folded) 파일로 저장
+  (각 스택 맨 앞에 당시 단계 태그가 붙음)
+- 메모리: tracemalloc(프레임 1개)으로 단계별 순 할당량과 상위 할당 위치 보고서(.txt) 작성
+
+운영 실행 중에도 켜 둘 수 있도록 샘플링 방식만 사용 (함수 호출마다 훅을 걸지 않음)
+
+사용법 (각 스크립트):
+  python search_all_seoul.py --profile                # profile.folded, profile.txt
+  python search_properties.py 망원동 --profile prof/mangwon
+  flamegraph.pl profile.folded > profile.svg
+"""
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+_active = None  # 실행 중인 Profiler
+
+
+class Profiler:
+    def __init__(self, prefix: str, interval: float = 0.01, trace_memory: bool = True,
+                 top_allocations: int = 25):
+        self.prefix = prefix
+        self.interval = interval
+        self.trace_memory = trace_memory
+        self.top_allocations = top_allocations
+        self.stacks = {}         # 스레드 id → 단계 스택
+        self.samples = {}        # collapsed stack → 샘플 수
+        self.stage_stats = {}    # 단계 경로 → [호출 수, 누적 시간, 순 할당 바이트]
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.started_at = None
+
+    # ----- 단계 기록 -----
+
+    def enter(self) -> list:
+        ident = threading.get_ident()
+        stack = self.stacks.get(ident)
+        if stack is None:
+            stack = self.stacks[ident] = []
+        return stack
+
+    def record(self, path: str, elapsed: float, allocated: int):
+        with self.lock:
+            entry = self.stage_stats.get(path)
+            if entry is None:
+                entry = self.stage_stats[path] = [0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += allocated
+
+    # ----- 샘플링 -----
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                    frame = frame.f_back
+                names.reverse()
+                stages = self.stacks.get(ident)
+                prefix = ['stage:' + (stages[-1] if stages else 'other')]
+                key = ';'.join(prefix + names)
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+    def start(self):
+        self.started_at = time.time()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+        self._thread = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write_reports()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    # ----- 보고서 -----
+
+    def write_reports(self):
+        directory = os.path.dirname(self.prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        folded_path = self.prefix + '.folded'
+        with open(folded_path, 'w', encoding='utf-8') as f:
+            for key, count in sorted(self.samples.items()):
+                f.write(f'{key} {count}\n')
+
+        report_path = self.prefix + '.txt'
+        elapsed = time.time() - self.started_at
+        total_samples = sum(self.samples.values()) or 1
+        by_stage = {}
+        for key, count in self.samples.items():
+            stage_name = key.split(';', 1)[0][len('stage:'):]
+            by_stage[stage_name] = by_stage.get(stage_name, 0) + count
+
+        lines = [f'전체 실행 시간: {elapsed:.2f}초, 샘플 {sum(self.samples.values())}개 '
+                 f'(간격 {self.interval * 1000:.0f}ms)', '', '[단계별 시간/할당]',
+                 f'{"단계":<24} {"호출":>8} {"누적 시간":>10} {"순 할당":>12}']
+        for path, (calls, seconds, allocated) in sorted(self.stage_stats.items(),
+                                                        key=lambda kv: -kv[1][1]):
+            lines.append(f'{path:<24} {calls:>8} {seconds:>9.2f}s {allocated / 1024:>10.1f}KB')
+
+        lines += ['', '[단계별 CPU 샘플 비율] (모든 스레드 기준, 대기 중인 스레드 포함)']
+        for stage_name, count in sorted(by_stage.items(), key=lambda kv: -kv[1]):
+            lines.append(f'{stage_name:<24} {count / total_samples:>7.1%}')
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            lines += ['', f'[메모리] 현재 {current / 1024 / 1024:.1f}MB, 최대 {peak / 1024 / 1024:.1f}MB',
+                      f'[상위 {self.top_allocations}개 할당 위치]']
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ])
+            for stat in snapshot.statistics('lineno')[:self.top_allocations]:
+                frame = stat.traceback[0]
+                lines.append(f'{stat.size / 1024:>10.1f}KB {stat.count:>8}개  '
+                             f'{frame.filename}:{frame.lineno}')
+
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        print(f'\n📈 프로파일 저장: {folded_path}, {report_path}')
+
+
+@contextmanager
+def stage(name: str):
+    """코드 블록을 단계 name으로 태그 (중첩 시 'write;parse' 형태의 경로로 기록)"""
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    stack = profiler.enter()
+    stack.append(name)
+    tracing = tracemalloc.is_tracing()
+    mem_before = tracemalloc.get_traced_memory()[0] if tracing else 0
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        allocated = tracemalloc.get_traced_memory()[0] - mem_before if tracing else 0
+        profiler.record(';'.join(stack), elapsed, allocated)
+        stack.pop()
+
+
+def staged(name: str):
+    """함수 전체를 단계 name으로 태그하는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_profile_argument(parser):
+    parser.add_argument('--profile', nargs='?', const='profile', metavar='PREFIX',
+                        help='단계별 CPU 샘플링(PREFIX.folded) 및 메모리 보고서(PREFIX.txt) 저장')
+
+
+def start_profiling(prefix: str, interval: float = 0.01):
+    """prefix가 있으면 프로파일링 시작. 종료 시(sys.exit 포함) 보고서를 자동으로 저장"""
+    global _active
+    if not prefix or _active is not None:
+        return _active
+    profiler = Profiler(prefix, interval=interval)
+    profiler.start()
+    _active = profiler
+
+    def finish():
+        global _active
+        _active = None
+        profiler.stop()
+
+    atexit.register(finish)
+    return profiler
@@ -0,0 +1,371 @@
+"""
+매물 조회용 로컬 HTTP 서비스 (읽기 전용)
+최신 스냅샷을 메모리 인덱스(ListingStore + 격자/구/동 인덱스)로 올려 두고 JSON으로 응답
+
+- GET /listings?bbox=37.55,37.57,126.90,126.93&gu=마포구&dong=망원동
+        &deposit_max=1000&rent_max=70&service_type=원룸&page=1&page_size=50
+  (bbox 순서: latSouth,latNorth,lngWest,lngEast)
+- GET /listings/<item_id>
+- GET /health
+- 자주 들어오는 같은 조회는 LRU 캐시에서 바로 응답
+- 스냅샷 파일이 바뀌면 백그라운드에서 새 인덱스를 만든 뒤 참조만 교체 (중단 없이 재로드)
+- 날짜별 스냅샷을 모아 둔 폴더나 glob 패턴을 주면 가장 최근 스냅샷(이름의 YYYYMMDD, 같으면 수정 시각)을
+  읽고, 더 새 스냅샷이 생기면 그것으로 재로드
+
+사용법:
+  python query_server.py seoul_data.zip
+  python query_server.py seoul_data/ --port 8080 --reload-interval 60
+  python query_server.py snapshots/                  # snapshots/seoul_data_YYYYMMDD/, *.zip 중 최신
+  python query_server.py 'seoul_data_*.zip'          # 패턴에 맞는 스냅샷 중 최신
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from listing_store import ListingStore, CodedColumn
+from snapshot_diff import iter_snapshot_rows, list_snapshot_files
+from snapshot_loader import load_store
+
+GRID_SIZE = 0.01  # 격자 셀 크기 (도, 약 1km)
+MAX_PAGE_SIZE = 500
+SNAPSHOT_DATE_RE = re.compile(r'\d{8}')  # seoul_data_20261019.zip 등 이름의 날짜
+
+# 쿼리 파라미터 → (열 이름, 비교)
+RANGE_PARAMS = {
+    'deposit_min': ('deposit', 'min'), 'deposit_max': ('deposit', 'max'),
+    'rent_min': ('rent', 'min'), 'rent_max': ('rent', 'max'),
+    'size_min': ('size_m2', 'min'), 'size_max': ('size_m2', 'max'),
+}
+
+
+def snapshot_mtime(path: str) -> float:
+    """스냅샷 변경 감지용 수정 시각 (폴더면 안의 CSV 중 가장 최근 값)"""
+    if os.path.isdir(path):
+        return max((os.path.getmtime(p) for p in list_snapshot_files(path)), default=0.0)
+    return os.path.getmtime(path)
+
+
+def _is_snapshot(path: str) -> bool:
+    if os.path.isdir(path):
+        return bool(list_snapshot_files(path))
+    return path.lower().endswith(('.zip', '.csv'))
+
+
+def _snapshot_order(path: str) -> tuple:
+    dates = SNAPSHOT_DATE_RE.findall(os.path.basename(os.path.normpath(path)))
+    return (dates[-1] if dates else '', snapshot_mtime(path))
+
+
+def resolve_snapshot(spec: str) -> str:
+    """스냅샷 지정 → 실제로 읽을 스냅샷 경로
+    glob 패턴이거나 CSV가 없는 폴더(날짜별 스냅샷을 모아 둔 폴더)면 그 안의 가장 최근 스냅샷"""
+    if any(c in spec for c in '*?['):
+        candidates = glob.glob(spec)
+    elif os.path.isdir(spec) and not list_snapshot_files(spec):
+        candidates = [os.path.join(spec, name) for name in os.listdir(spec)]
+    else:
+        return spec
+    candidates = [p for p in candidates if _is_snapshot(p)]
+    if not candidates:
+        raise FileNotFoundError(f'스냅샷을 찾을 수 없습니다: {spec}')
+    return max(candidates, key=_snapshot_order)
+
+
+def load_snapshot_store(path: str) -> ListingStore:
+    if path.lower().endswith('.zip'):
+        return load_store(path)
+    return ListingStore.from_rows(iter_snapshot_rows(path))
+
+
+def _cell(lat: float, lng: float) -> tuple:
+    return int(lat // GRID_SIZE), int(lng // GRID_SIZE)
+
+
+class SnapshotIndex:
+    """스냅샷 하나의 조회 인덱스 (만든 뒤에는 변경하지 않으므로 여러 스레드가 동시에 읽어도 안전)"""
+
+    def __init__(self, store: ListingStore, source: str, generation: int):
+        self.store = store
+        self.source = source
+        self.generation = generation
+        self.loaded_at = time.strftime('%Y-%m-%d %H:%M:%S')
+
+        lat_col = store.columns['lat']
+        lng_col = store.columns['lng']
+        self.grid = {}
+        for i in range(len(store)):
+            lat, lng = lat_col[i], lng_col[i]
+            if lat is None or lng is None:
+                continue
+            self.grid.setdefault(_cell(lat, lng), array('i')).append(i)
+
+        self.by_field = {}
+        for field in ('local2', 'local3', 'service_type'):
+            column = store.columns.get(field)
+            if not isinstance(column, CodedColumn):
+                continue
+            rows = {}
+            for i, code in enumerate(column.codes):
+                rows.setdefault(code, array('i')).append(i)
+            self.by_field[field] = {column.strings[c]: r for c, r in rows.items()}
+
+    def _bbox_rows(self, bbox: tuple) -> list:
+        lat_south, lat_north, lng_west, lng_east = bbox
+        lat_col = self.store.columns['lat']
+        lng_col = self.store.columns['lng']
+        (r0, c0), (r1, c1) = _cell(lat_south, lng_west), _cell(lat_north, lng_east)
+        if (r1 - r0 + 1) * (c1 - c0 + 1) > len(self.grid):
+            # bbox가 데이터가 있는 칸 수보다 넓으면 (예: 전 세계 범위) 빈 칸을 돌지 않고 있는 칸만 확인
+            cells = [cell for cell in self.grid if r0 <= cell[0] <= r1 and c0 <= cell[1] <= c1]
+        else:
+            cells = [(r, c) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+        rows = []
+        for cell in cells:
+            for i in self.grid.get(cell, ()):
+                if lat_south <= lat_col[i] <= lat_north and lng_west <= lng_col[i] <= lng_east:
+                    rows.append(i)
+        rows.sort()
+        return rows
+
+    def query(self, params: dict) -> dict:
+        """조회 조건으로 매물 검색. {total, page, page_size, items} 반환"""
+        # 가장 좁은 인덱스로 후보 행을 고른 뒤 나머지 조건은 열 값으로 확인
+        candidates = None
+        if params.get('bbox'):
+            candidates = self._bbox_rows(params['bbox'])
+        equals = [(field, params[name]) for name, field in
+                  (('dong', 'local3'), ('gu', 'local2'), ('service_type', 'service_type'))
+                  if params.get(name)]
+        for field, value in equals:
+            rows = self.by_field.get(field, {}).get(value, ())
+            if candidates is None or len(rows) < len(candidates):
+                smaller, other = rows, candidates
+            else:
+                smaller, other = candidates, rows
+            if other is None:
+                candidates = list(smaller)
+            else:
+                other_set = set(other)
+                candidates = [i for i in smaller if i in other_set]
+        if candidates is None:
+            candidates = range(len(self.store))
+
+        ranges = [(RANGE_PARAMS[name], value) for name, value in params.items() if name in RANGE_PARAMS]
+        if ranges:
+            columns = self.store.columns
+            matched = []
+            for i in candidates:
+                for (field, kind), limit in ranges:
+                    value = columns[field][i]
+                    if value is None or (value < limit if kind == 'min' else value > limit):
+                        break
+                else:
+                    matched.append(i)
+            candidates = matched
+
+        page = params.get('page', 1)
+        page_size = params.get('page_size', 50)
+        start = (page - 1) * page_size
+        items = [self.store.row(i) for i in candidates[start:start + page_size]]
+        return {'total': len(candidates), 'page': page, 'page_size': page_size, 'items': items}
+
+
+class LRUCache:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def _finite(name: str, text: str) -> float:
+    try:
+        value = float(text)
+    except ValueError:
+        raise ValueError(f'{name} 값이 숫자가 아닙니다: {text}') from None
+    if not math.isfinite(value):
+        raise ValueError(f'{name} 값은 유한한 숫자여야 합니다 (inf, nan 불가): {text}')
+    return value
+
+
+def parse_query(query: dict) -> dict:
+    """쿼리 문자열 → 조회 조건. 잘못된 값이면 ValueError"""
+    params = {}
+    if 'bbox' in query:
+        bbox = tuple(_finite('bbox', v) for v in query['bbox'].split(','))
+        if len(bbox) != 4:
+            raise ValueError('bbox는 latSouth,latNorth,lngWest,lngEast 네 값이 필요합니다')
+        params['bbox'] = bbox
+    for name in ('gu', 'dong', 'service_type'):
+        if query.get(name):
+            params[name] = query[name]
+    for name in RANGE_PARAMS:
+        if query.get(name):
+            params[name] = _finite(name, query[name])
+    params['page'] = max(1, int(query.get('page', 1)))
+    params['page_size'] = min(MAX_PAGE_SIZE, max(1, int(query.get('page_size', 50))))
+    return params
+
+
+class QueryService:
+    """현재 인덱스 참조 + 캐시 + 스냅샷 재로드"""
+
+    def __init__(self, snapshot_path: str, cache_size: int = 256):
+        self.snapshot_path = snapshot_path
+        self.cache = LRUCache(cache_size)
+        self.reload_lock = threading.Lock()
+        self.index = None
+        self._version = None
+        self.reload()
+
+    def reload(self) -> bool:
+        """스냅샷이 바뀌었거나 더 새 스냅샷이 생겼으면 새 인덱스를 만들어 교체. 교체했으면 True"""
+        with self.reload_lock:
+            path = resolve_snapshot(self.snapshot_path)
+            version = (path, snapshot_mtime(path))
+            if self.index is not None and version == self._version:
+                return False
+            start = time.time()
+            generation = self.index.generation + 1 if self.index else 1
+            index = SnapshotIndex(load_snapshot_store(path), path, generation)
+            # 참조 교체는 원자적이므로 처리 중인 요청은 이전 인덱스로 끝까지 응답
+            self.index = index
+            self._version = version
+            self.cache.clear()
+            print(f'✅ 스냅샷 로드 (세대 {generation}): {path}, {len(index.store)}개 매물 '
+                  f'({time.time() - start:.2f}초)')
+            return True
+
+    def watch(self, interval: float):
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload()
+                except Exception as e:
+                    # 새 스냅샷이 아직 쓰는 중이거나 깨졌으면 이전 인덱스를 계속 사용
+                    print(f'⚠️  재로드 실패: {e}')
+
+        threading.Thread(target=loop, daemon=True).start()
+
+    def listings(self, query: dict) -> bytes:
+        index = self.index
+        params = parse_query(query)
+        key = (index.generation, tuple(sorted(params.items())))
+        body = self.cache.get(key)
+        if body is None:
+            result = index.query(params)
+            body = json.dumps(result, ensure_ascii=False).encode('utf-8')
+            self.cache.put(key, body)
+        return body
+
+    def health(self) -> bytes:
+        index = self.index
+        return json.dumps({
+            'snapshot': index.source,
+            'generation': index.generation,
+            'listings': len(index.store),
+            'loaded_at': index.loaded_at,
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+        }, ensure_ascii=False).encode('utf-8')
+
+
+def make_handler(service: QueryService):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: bytes):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status: int, message: str):
+            self._send(status, json.dumps({'error': message}, ensure_ascii=False).encode('utf-8'))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                if url.path == '/listings':
+                    self._send(200, service.listings(query))
+                elif url.path.startswith('/listings/'):
+                    item = service.index.store.get(url.path.rsplit('/', 1)[1])
+                    if item is None:
+                        self._error(404, '매물을 찾을 수 없습니다')
+                    else:
+                        self._send(200, json.dumps(item, ensure_ascii=False).encode('utf-8'))
+                elif url.path == '/health':
+                    self._send(200, service.health())
+                else:
+                    self._error(404, '알 수 없는 경로')
+            except ValueError as e:
+                self._error(400, str(e))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='매물 조회 HTTP 서비스 (읽기 전용)')
+    parser.add_argument('snapshot', nargs='?', default='seoul_data.zip',
+                        help='스냅샷 (CSV 파일, 구별 CSV 폴더, zip, 또는 최신 스냅샷을 고를 폴더/glob 패턴)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--cache-size', type=int, default=256, help='LRU 캐시 항목 수')
+    parser.add_argument('--reload-interval', type=float, default=30,
+                        help='스냅샷 변경 확인 주기 (초, 0이면 재로드 안 함)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    service = QueryService(args.snapshot, cache_size=args.cache_size)
+    if args.reload_interval > 0:
+        service.watch(args.reload_interval)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f'🚀 http://{args.host}:{args.port}/listings 에서 조회 대기 중 (Ctrl+C로 종료)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('\n종료')
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+API 종류별 서킷 브레이커와 전체 재시도 예산
+items/list 등이 장애일 때 청크마다 3번씩 다시 두드리며 실행 시간을 버리지 않도록 함
+
+- CircuitBreaker: API 종류(search / map / list / detail)별 상태
+    closed    : 정상. 연속 실패가 failure_threshold 회가 되면 open
+    open      : 요청을 보내지 않고 바로 CircuitOpenError. reset_timeout 초가 지나면 half-open
+    half-open : 시험 요청 하나만 허용. 성공하면 closed, 실패하면 다시 open (대기 시간 2배, 최대 max_timeout)
+- RetryBudget: 재시도 횟수를 실행 전체 요청 수의 ratio 비율(+ 초기 여유 min_retries)로 제한
+  예산이 없으면 재시도하지 않고 실패로 처리
+- DeferredQueue: 브레이커가 열려 처리하지 못한 작업을 보관했다가 해당 API가 다시 열리면 재실행
+
+사용법 (각 스크립트):
+  resp = send_with_retry('list', lambda attempt: requests.post(url, json=payload, timeout=25))
+  except CircuitOpenError → 작업을 DeferredQueue에 넣고 다음 작업으로
+"""
+import threading
+import time
+
+import requests
+
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, endpoint: str, retry_at: float):
+        super().__init__(f'{endpoint} API 차단 중 ({max(retry_at - time.time(), 0):.0f}초 후 재시도)')
+        self.endpoint = endpoint
+        self.retry_at = retry_at
+
+
+class CircuitBreaker:
+    def __init__(self, endpoint: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 max_timeout: float = 300.0):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.timeout = reset_timeout
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def retry_at(self) -> float:
+        return self.opened_at + self.timeout
+
+    def allow(self) -> bool:
+        """요청을 보내도 되는지. half-open에서는 시험 요청 하나만 허용"""
+        with self.lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open':
+                if time.time() < self.retry_at:
+                    return False
+                self.state = 'half-open'
+                self.probing = False
+            if self.probing:
+                return False
+            self.probing = True
+            return True
+
+    def ready(self) -> bool:
+        """요청을 허용할 상태인지 (allow와 달리 상태를 바꾸지 않음)"""
+        with self.lock:
+            if self.state == 'open':
+                return time.time() >= self.retry_at
+            return not (self.state == 'half-open' and self.probing)
+
+    def record_success(self):
+        with self.lock:
+            if self.state != 'closed':
+                print(f'  🔌 {self.endpoint} API 복구 → 정상 상태')
+            self.state = 'closed'
+            self.failures = 0
+            self.timeout = self.reset_timeout
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == 'half-open':
+                self.timeout = min(self.timeout * 2, self.max_timeout)
+            elif self.state == 'closed' and self.failures < self.failure_threshold:
+                return
+            elif self.state == 'open':
+                return
+            self.state = 'open'
+            self.opened_at = time.time()
+            self.probing = False
+            print(f'  🔌 {self.endpoint} API 연속 실패 {self.failures}회 → {self.timeout:.0f}초 동안 차단')
+
+
+class RetryBudget:
+    def __init__(self, ratio: float = 0.1, min_retries: int = 10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+        self.lock = threading.Lock()
+
+    def record_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def try_spend(self) -> bool:
+        """재시도 하나를 쓸 수 있으면 True"""
+        with self.lock:
+            if self.retries < self.min_retries + self.ratio * self.requests:
+                self.retries += 1
+                return True
+            self.denied += 1
+            return False
+
+
+class DeferredQueue:
+    """브레이커가 열려 보류된 작업 (API 종류, 작업) 목록"""
+
+    def __init__(self):
+        self.items = []
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def park(self, endpoint: str, work):
+        self.items.append((endpoint, work))
+
+    def pop_ready(self) -> list:
+        """API가 다시 요청을 받을 수 있는 작업을 꺼내 반환 (보류된 순서)"""
+        ready, waiting = [], []
+        for endpoint, work in self.items:
+            (ready if get_breaker(endpoint).ready() else waiting).append((endpoint, work))
+        self.items = waiting
+        return [work for _, work in ready]
+
+    def next_retry_at(self) -> float:
+        return min((get_breaker(endpoint).retry_at for endpoint, _ in self.items), default=time.time())
+
+
+BREAKER_SETTINGS = {'failure_threshold': 5, 'reset_timeout': 30.0}
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+budget = RetryBudget()
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(endpoint, **BREAKER_SETTINGS)
+        return breaker
+
+
+def configure(failure_threshold: int = None, reset_timeout: float = None,
+              retry_ratio: float = None, min_retries: int = None):
+    """명령행 옵션 등으로 설정 변경 (브레이커 상태와 재시도 예산은 새로 시작)"""
+    global budget
+    if failure_threshold is not None:
+        BREAKER_SETTINGS['failure_threshold'] = failure_threshold
+    if reset_timeout is not None:
+        BREAKER_SETTINGS['reset_timeout'] = reset_timeout
+    with _breakers_lock:
+        _breakers.clear()
+    budget = RetryBudget(retry_ratio if retry_ratio is not None else budget.ratio,
+                         min_retries if min_retries is not None else budget.min_retries)
+
+
+def send_with_retry(endpoint: str, send, attempts: int = 3, backoff: float = 1.0, parse=None):
+    """send(attempt)로 요청. 429/5xx/연결 오류는 재시도 예산 안에서 최대 attempts회까지 시도
+
+    parse가 없으면 마지막 응답을 반환 (끝내 연결 오류면 예외 발생)
+    parse가 있으면 200 응답을 parse(resp)로 변환해 반환하고 ValueError(깨진 JSON 등)도 재시도.
+    실패하면 requests.HTTPError 또는 마지막 예외 발생
+    브레이커가 열려 있으면 요청하지 않고 CircuitOpenError
+    """
+    breaker = get_breaker(endpoint)
+    resp = error = None
+    for attempt in range(1, attempts + 1):
+        if attempt > 1:
+            if not budget.try_spend():
+                break
+            time.sleep(backoff * (attempt - 1))
+        if not breaker.allow():
+            raise CircuitOpenError(endpoint, breaker.retry_at)
+        budget.record_request()
+        try:
+            resp = send(attempt)
+        except Exception as e:
+            resp, error = None, e
+            breaker.record_failure()
+            continue
+        if resp.status_code in RETRYABLE_STATUS:
+            breaker.record_failure()
+            error = requests.HTTPError(f'HTTP {resp.status_code}', response=resp)
+            continue
+        breaker.record_success()
+        if parse is None:
+            return resp
+        if resp.status_code != 200:
+            # 4xx 등은 다시 시도해도 같음
+            raise requests.HTTPError(f'HTTP {resp.status_code}', response=resp)
+        try:
+            return parse(resp)
+        except ValueError as e:
+            error = e
+            breaker.record_failure()
+    if parse is None and resp is not None:
+        return resp
+    raise error
+
+
+def add_resilience_arguments(parser):
+    parser.add_argument('--breaker-failures', type=int, default=5,
+                        help='API 연속 실패가 이 횟수가 되면 일정 시간 요청 중단')
+    parser.add_argument('--breaker-timeout', type=float, default=30.0,
+                        help='차단 후 시험 요청까지 대기 시간(초, 계속 실패하면 2배씩 증가)')
+    parser.add_argument('--retry-budget', type=float, default=0.1,
+                        help='전체 요청 수 대비 허용 재시도 비율')
+
+
+def configure_from_args(args):
+    configure(failure_threshold=args.breaker_failures, reset_timeout=args.breaker_timeout,
+              retry_ratio=args.retry_budget)
@@ -0,0 +1,338 @@
+"""
+구/동/서비스 유형별 매물 통계 롤업
+스냅샷을 저장할 때 한 번 집계해 두고, 이후에는 스냅샷 차이(신규/삭제/변경)만 반영하여 갱신
+(search_all_seoul.py --rollups 로 스냅샷 CSV를 저장하면서 롤업 파일도 함께 저장)
+
+- 집계 단위: (local2, local3, service_type) 그룹별 매물 수, 보증금/월세/m²당 월세 분위수 스케치
+- 분위수는 병합 가능한 로그 버킷 스케치(DDSketch 방식, 상대 오차 1%)로 계산하므로
+  동 → 구 → 서울 전체 값은 그룹 스케치를 더하기만 하면 됨 (CSV 재스캔 없음)
+- 스케치는 버킷 카운트라서 삭제/가격 변경도 카운트 차감으로 반영 가능
+  구/동/유형/면적이 바뀐 매물은 이전 그룹에서 빼고 새 그룹에 더함 (--old/--new 로 갱신할 때)
+
+사용법:
+  python rollups.py build seoul_data.zip --out rollups.pkl
+  python rollups.py update rollups.pkl --diff-dir diff_1128
+  python rollups.py update rollups.pkl --old seoul_data_1127/ --new seoul_data_1128/
+  python rollups.py show rollups.pkl --level gu
+  python rollups.py show rollups.pkl --level dong --gu 관악구
+"""
+import argparse
+import csv
+import math
+import os
+import pickle
+import sys
+import tempfile
+
+from listing_store import ListingStore, CodedColumn
+from snapshot_diff import iter_snapshot_rows, external_sort, diff_snapshots, DIFF_FIELDS
+from snapshot_loader import load_store
+
+GROUP_FIELDS = ['local2', 'local3', 'service_type']
+METRICS = ['deposit', 'rent', 'rent_per_m2']
+
+# show --level 별로 남길 그룹 필드 위치
+LEVELS = {
+    'city': (),
+    'gu': (0,),
+    'dong': (0, 1),
+    'service': (2,),
+    'gu_service': (0, 2),
+    'all': (0, 1, 2),
+}
+
+
+class QuantileSketch:
+    """상대 오차가 보장되는 로그 버킷 분위수 스케치 (병합/삭제 가능)"""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(gamma)
+        self.buckets = {}
+        self.zeros = 0  # 0 이하 값 (보증금 0 등)
+        self.count = 0
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        # 버킷 [gamma^(i-1), gamma^i] 의 대표값
+        gamma = math.exp(self._log_gamma)
+        return 2 * gamma ** index / (gamma + 1)
+
+    def add(self, value: float, weight: int = 1):
+        if value <= 0:
+            self.zeros += weight
+        else:
+            i = self._index(value)
+            self.buckets[i] = self.buckets.get(i, 0) + weight
+            if self.buckets[i] <= 0:
+                del self.buckets[i]
+        self.count += weight
+
+    def remove(self, value: float):
+        self.add(value, -1)
+
+    def merge(self, other: 'QuantileSketch'):
+        for i, c in other.buckets.items():
+            total = self.buckets.get(i, 0) + c
+            if total:
+                self.buckets[i] = total
+            else:
+                self.buckets.pop(i, None)
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q: float):
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if rank < seen:
+                return self._value(i)
+        return self._value(max(self.buckets)) if self.buckets else 0.0
+
+
+class GroupStats:
+    """그룹 하나의 매물 수 + 지표별 스케치"""
+
+    def __init__(self):
+        self.count = 0
+        self.sketches = {m: QuantileSketch() for m in METRICS}
+
+    def apply(self, values: dict, sign: int):
+        self.count += sign
+        for metric, value in values.items():
+            if value is not None:
+                self.sketches[metric].add(value, sign)
+
+    def merge(self, other: 'GroupStats'):
+        self.count += other.count
+        for metric in METRICS:
+            self.sketches[metric].merge(other.sketches[metric])
+
+    def summary(self) -> dict:
+        result = {'count': self.count}
+        for metric in METRICS:
+            result[f'{metric}_median'] = self.sketches[metric].quantile(0.5)
+        return result
+
+
+def _to_number(value):
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def metric_values(deposit, rent, size_m2) -> dict:
+    deposit = _to_number(deposit)
+    rent = _to_number(rent)
+    size_m2 = _to_number(size_m2)
+    per_m2 = rent / size_m2 if rent is not None and size_m2 else None
+    return {'deposit': deposit, 'rent': rent, 'rent_per_m2': per_m2}
+
+
+class Rollups:
+    def __init__(self):
+        self.groups = {}  # (local2, local3, service_type) → GroupStats
+
+    def _group(self, key: tuple) -> GroupStats:
+        stats = self.groups.get(key)
+        if stats is None:
+            stats = self.groups[key] = GroupStats()
+        return stats
+
+    @classmethod
+    def from_store(cls, store: ListingStore) -> 'Rollups':
+        """열 기반 저장소에서 한 번에 집계 (그룹 키는 사전 코드 튜플로 묶어서 처리)"""
+        rollups = cls()
+        columns = store.columns
+        key_columns = [columns[f] for f in GROUP_FIELDS]
+        code_arrays = [c.codes if isinstance(c, CodedColumn) else [c[i] for i in range(len(store))]
+                       for c in key_columns]
+        deposit = [store.value(i, 'deposit') for i in range(len(store))]
+        rent = [store.value(i, 'rent') for i in range(len(store))]
+        size = [store.value(i, 'size_m2') for i in range(len(store))]
+
+        # 코드 튜플별 행 번호 목록을 먼저 만든 뒤 그룹 단위로 스케치에 넣음
+        by_codes = {}
+        for i, codes in enumerate(zip(*code_arrays)):
+            by_codes.setdefault(codes, []).append(i)
+
+        for codes, rows in by_codes.items():
+            key = tuple(col.strings[c] if isinstance(col, CodedColumn) else c
+                        for col, c in zip(key_columns, codes))
+            stats = rollups._group(key)
+            for i in rows:
+                stats.apply(metric_values(deposit[i], rent[i], size[i]), 1)
+        return rollups
+
+    def add_row(self, row: dict, sign: int = 1):
+        key = tuple(row.get(f) or None for f in GROUP_FIELDS)
+        stats = self._group(key)
+        stats.apply(metric_values(row.get('deposit'), row.get('rent'), row.get('size_m2')), sign)
+        if stats.count <= 0:
+            del self.groups[key]
+
+    def apply_diff(self, kind: str, row: dict, changes: dict = None):
+        """snapshot_diff 결과 한 건 반영 (changed는 이전 값/그룹에서 빼고 새 값/그룹에 더함)"""
+        if kind == 'added':
+            self.add_row(row, 1)
+        elif kind == 'removed':
+            self.add_row(row, -1)
+        elif kind == 'changed':
+            before = dict(row)
+            for field, (old_value, _) in (changes or {}).items():
+                before[field] = old_value
+            self.add_row(before, -1)
+            self.add_row(row, 1)
+
+    def aggregate(self, level: str, gu: str = None) -> dict:
+        """집계 단위를 level로 줄여서 {키: GroupStats} 반환 (그룹 스케치 병합)"""
+        positions = LEVELS[level]
+        result = {}
+        for key, stats in self.groups.items():
+            if gu and key[0] != gu:
+                continue
+            reduced = tuple(key[p] for p in positions)
+            if reduced not in result:
+                result[reduced] = GroupStats()
+            result[reduced].merge(stats)
+        return result
+
+    def save(self, path: str):
+        # 클래스 대신 기본 타입으로 저장하여 모듈 경로와 무관하게 읽을 수 있도록 함
+        payload = {
+            key: (stats.count, {m: (sk.buckets, sk.zeros, sk.count) for m, sk in stats.sketches.items()})
+            for key, stats in self.groups.items()
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'Rollups':
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+        rollups = cls()
+        for key, (count, sketches) in payload.items():
+            stats = rollups._group(key)
+            stats.count = count
+            for metric, (buckets, zeros, sketch_count) in sketches.items():
+                sketch = stats.sketches[metric]
+                sketch.buckets, sketch.zeros, sketch.count = buckets, zeros, sketch_count
+        return rollups
+
+
+def iter_diff_dir(diff_dir: str):
+    """snapshot_diff.py 출력 폴더(added/removed/changed.csv)를 diff 항목으로 반환"""
+    for kind in ('added', 'removed', 'changed'):
+        path = os.path.join(diff_dir, f'{kind}.csv')
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                changes = None
+                if kind == 'changed':
+                    # snapshot_diff.py 결과는 가격 필드의 _before만 있으므로 있는 컬럼만 사용
+                    # (구/동/유형 이동은 --old/--new 로 갱신할 때만 반영됨)
+                    changes = {field: (row[f'{field}_before'], row.get(field))
+                               for field in DIFF_FIELDS if f'{field}_before' in row}
+                yield kind, row, changes
+
+
+def add_rollups_argument(parser):
+    parser.add_argument('--rollups', metavar='PATH',
+                        help='스냅샷을 저장할 때 구/동/유형별 롤업도 함께 저장할 파일 (예: rollups.pkl)')
+
+
+def save_store_rollups(store: ListingStore, path: str) -> 'Rollups':
+    """저장한 스냅샷(메모리의 저장소)으로 롤업을 만들어 저장"""
+    rollups = Rollups.from_store(store)
+    rollups.save(path)
+    return rollups
+
+
+def load_snapshot_store(path: str) -> ListingStore:
+    if path.lower().endswith('.zip'):
+        return load_store(path)
+    return ListingStore.from_rows(iter_snapshot_rows(path))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='구/동/서비스 유형별 매물 통계 롤업')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('build', help='스냅샷 전체로 롤업 생성')
+    p.add_argument('snapshot', help='스냅샷 (CSV 파일, 구별 CSV 폴더 또는 zip)')
+    p.add_argument('--out', default='rollups.pkl', help='롤업 파일 경로')
+
+    p = sub.add_parser('update', help='스냅샷 차이만 반영하여 롤업 갱신')
+    p.add_argument('rollups', help='롤업 파일 경로')
+    p.add_argument('--diff-dir', help='snapshot_diff.py 결과 폴더')
+    p.add_argument('--old', help='이전 스냅샷 (--diff-dir 대신 직접 비교)')
+    p.add_argument('--new', help='새 스냅샷')
+
+    p = sub.add_parser('show', help='롤업 출력')
+    p.add_argument('rollups', help='롤업 파일 경로')
+    p.add_argument('--level', choices=list(LEVELS), default='gu', help='집계 단위')
+    p.add_argument('--gu', help='특정 구만 출력')
+    return parser.parse_args()
+
+
+def _format(value, digits: int = 0) -> str:
+    return '-' if value is None else f'{value:,.{digits}f}'
+
+
+def main():
+    args = parse_args()
+
+    if args.command == 'build':
+        store = load_snapshot_store(args.snapshot)
+        rollups = save_store_rollups(store, args.out)
+        print(f'✅ 롤업 생성: {len(store)}개 매물, {len(rollups.groups)}개 그룹 → {args.out}')
+
+    elif args.command == 'update':
+        rollups = Rollups.load(args.rollups)
+        counts = {'added': 0, 'removed': 0, 'changed': 0}
+        if args.diff_dir:
+            for kind, row, changes in iter_diff_dir(args.diff_dir):
+                rollups.apply_diff(kind, row, changes)
+                counts[kind] += 1
+        elif args.old and args.new:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                old_sorted = external_sort(iter_snapshot_rows(args.old), tmp_dir)
+                new_sorted = external_sort(iter_snapshot_rows(args.new), tmp_dir)
+                # 가격 외에 구/동/유형/면적 변경도 받아 그룹 이동까지 반영
+                for kind, row, changes in diff_snapshots(old_sorted, new_sorted, fields=DIFF_FIELDS):
+                    rollups.apply_diff(kind, row, changes)
+                    counts[kind] += 1
+        else:
+            print('❌ --diff-dir 또는 --old/--new 를 지정하세요.')
+            sys.exit(1)
+        rollups.save(args.rollups)
+        print(f'✅ 롤업 갱신: 신규 {counts["added"]}개, 삭제 {counts["removed"]}개, '
+              f'변경 {counts["changed"]}개')
+
+    elif args.command == 'show':
+        rollups = Rollups.load(args.rollups)
+        result = rollups.aggregate(args.level, gu=args.gu)
+        print(f'{"그룹":<30} {"매물 수":>8} {"보증금 중앙값":>12} {"월세 중앙값":>10} {"m²당 월세":>10}')
+        for key in sorted(result, key=lambda k: tuple(v or '' for v in k)):
+            s = result[key].summary()
+            name = ' / '.join(v or '-' for v in key) or '서울 전체'
+            print(f'{name:<30} {s["count"]:>8,} {_format(s["deposit_median"]):>12} '
+                  f'{_format(s["rent_median"]):>10} {_format(s["rent_per_m2_median"], 2):>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,44 @@
 """
 서울시 전체 동 매물 검색 스크립트
 모든 동을 순회하며 매물 정보를 CSV로 저장
+
+사용법:
+  python search_all_seoul.py                                   # 단일 프로세스 실행
+  python search_all_seoul.py --sales-type 월세 --rent-max 80    # 검색 조건 지정
+  python search_all_seoul.py --seen-set seen_ids               # 이전 실행까지 수집한 매물 제외
+  python search_all_seoul.py --queue seoul_queue.db --init     # 작업 큐 생성
+  python search_all_seoul.py --queue seoul_queue.db --worker   # 워커 실행 (여러 프로세스/노드 가능)
+  python search_all_seoul.py --queue seoul_queue.db --worker --threads 4  # 한 프로세스에서 워커 4개
+  python search_all_seoul.py --queue seoul_queue.db --merge    # 결과 병합 후 CSV 저장
+  python search_all_seoul.py --plan --plan-workers 4           # API 호출 없이 요청 수/소요 시간 추정
+  python search_all_seoul.py --boundaries seoul_dong.geojson   # 매물을 좌표가 속한 법정동 폴리곤의 구/동에 귀속
+  python search_all_seoul.py --rollups rollups.pkl             # CSV 저장 시 구/동/유형별 롤업도 저장
 """
+import argparse
 import requests
 import csv
 import time
 import sys
 import os
+import threading
 from math import ceil
 from datetime import datetime
 
+from work_queue import WorkQueue, LeaseKeeper, default_worker_id
+from map_filters import add_filter_arguments, filters_from_args, apply_map_filters, filter_items
+from listing_store import ListingStore
+from seen_set import SeenSet, add_seen_set_argument
+from profiling import staged, add_profile_argument, start_profiling
+from singleflight import BatchCoalescer
+from resilience import (CircuitOpenError, DeferredQueue, send_with_retry,
+                        add_resilience_arguments, configure_from_args)
+from crawl_plan import (add_plan_arguments, start_recording, record_request, record_items, load_metrics,
+                        estimate, list_calls_per_unit, print_plan, save_plan)
+from district_boundaries import add_boundary_arguments, index_from_args, attribute
+from map_tile_cache import MapTileCache, add_map_cache_arguments, configure_map_cache, format_stats
+from rollups import add_rollups_argument, save_store_rollups
+from zigbang_api import API_BASE
+
 try:
     import pygeohash as pgh
 except ImportError:
@@ -27,6 +56,9 @@ HEADERS = {
     'x-zigbang-platform': 'www',
 }
 
+# 구/동 경계 폴리곤 인덱스 (--boundaries). 없으면 매물을 처음 찾은 동에 귀속
+BOUNDARIES = None
+
 # 서울시 구별 동 목록
 SEOUL_DISTRICTS = {
     '강남구': ['개포동', '논현동', '대치동', '도곡동', '삼성동', '세곡동', '수서동', '신사동', '압구정동', '역삼동', '율현동', '일원동', '자곡동', '청담동'],
@@ -57,14 +89,19 @@ SEOUL_DISTRICTS = {
 }
 
 
+@staged('search')
 def search_location(query: str) -> dict:
     """직방 API로 지역 검색"""
-    url = 'https://apis.zigbang.com/v3/search'
+    url = f'{API_BASE}/v3/search'
     params = {'q': query, 'type': 'dong'}
     
-    resp = requests.get(url, params=params, headers=HEADERS, timeout=10)
-    resp.raise_for_status()
-    data = resp.json()
+    def send(attempt):
+        resp = requests.get(url, params=params, headers=HEADERS, timeout=10)
+        record_request('search', resp, attempt=attempt)
+        return resp
+    
+    data = send_with_retry('search', send, parse=lambda r: r.json())
+    record_items('search', len(data.get('items') or []))
     
     if not data.get('success') or not data.get('items'):
         return None
@@ -87,42 +124,31 @@ def search_location(query: str) -> dict:
     }
 
 
-def fetch_item_ids(lat: float, lng: float, radius_km: float = 1.0) -> list:
-    """지역 좌표 기준 매물 item_ids 조회"""
-    url = 'https://apis.zigbang.com/v2/items/oneroom'
-    
-    geohash = pgh.encode(lat, lng, precision=4)
-    lat_delta = radius_km / 111.0
-    lng_delta = radius_km / (111.0 * 0.85)
+def _fetch_map_bbox(bbox: tuple, params: dict) -> list:
+    """지도 API로 bbox (south, north, west, east) 안의 매물 점 [{'itemId', 'lat', 'lng'}] 조회"""
+    url = f'{API_BASE}/v2/items/oneroom'
+    lat_south, lat_north, lng_west, lng_east = bbox
     
-    lat_north = lat + lat_delta
-    lat_south = lat - lat_delta
-    lng_east = lng + lng_delta
-    lng_west = lng - lng_delta
-    
-    params = {
-        'geohash': geohash,
-        'depositMin': '0',
-        'rentMin': '0',
-        'salesTypes[0]': '전세',
-        'salesTypes[1]': '월세',
+    params = dict(params, **{
+        'geohash': pgh.encode((lat_south + lat_north) / 2, (lng_west + lng_east) / 2, precision=4),
         'latNorth': str(lat_north),
         'latSouth': str(lat_south),
         'lngEast': str(lng_east),
         'lngWest': str(lng_west),
-        'domain': 'zigbang',
-        'checkAnyItemWithoutFilter': 'true',
-    }
+    })
+    
+    def send(attempt):
+        resp = requests.get(url, params=params, headers=HEADERS, timeout=15)
+        record_request('map', resp, attempt=attempt)
+        return resp
     
-    resp = requests.get(url, params=params, headers=HEADERS, timeout=15)
-    resp.raise_for_status()
-    data = resp.json()
+    data = send_with_retry('map', send, parse=lambda r: r.json())
     
     items = data.get('items') if isinstance(data, dict) else data
     if not items:
         return []
     
-    filtered_items = []
+    points = []
     for it in items:
         item_lat = it.get('lat', 0)
         item_lng = it.get('lng', 0)
@@ -130,47 +156,66 @@ def fetch_item_ids(lat: float, lng: float, radius_km: float = 1.0) -> list:
             lng_west <= item_lng <= lng_east):
             iid = it.get('itemId') or it.get('item_id')
             if iid:
-                filtered_items.append(int(iid))
+                points.append({'itemId': int(iid), 'lat': item_lat, 'lng': item_lng})
     
-    return sorted(set(filtered_items))
+    record_items('map', len(points))
+    return points
+
 
+# 지도 응답 타일 캐시 (이웃한 동의 겹치는 범위는 다시 요청하지 않음)
+_map_tiles = MapTileCache(_fetch_map_bbox)
 
+
+@staged('map')
+def fetch_map_points(lat: float, lng: float, radius_km: float = 1.0, filters: dict = None) -> list:
+    """지역 좌표 기준 범위 안의 매물 점 [{'itemId', 'lat', 'lng'}] 조회 (filters: 지도 API 검색 조건)"""
+    lat_delta = radius_km / 111.0
+    lng_delta = radius_km / (111.0 * 0.85)
+    bbox = (lat - lat_delta, lat + lat_delta, lng - lng_delta, lng + lng_delta)
+    params = apply_map_filters({
+        'domain': 'zigbang',
+        'checkAnyItemWithoutFilter': 'true',
+    }, filters)
+    return _map_tiles.query(bbox, params)
+
+
+def fetch_item_ids(lat: float, lng: float, radius_km: float = 1.0, filters: dict = None) -> list:
+    """지역 좌표 기준 매물 item_ids 조회 (filters: 지도 API에 전달할 검색 조건)"""
+    return sorted({p['itemId'] for p in fetch_map_points(lat, lng, radius_km, filters)})
+
+
+def _fetch_list_chunk(chunk: list) -> list:
+    """items/list 한 청크 요청 (재시도 포함, 실패 시 빈 목록. API 차단 중이면 CircuitOpenError)"""
+    url = f'{API_BASE}/house/property/v1/items/list'
+    payload = {'itemIds': chunk}
+    
+    def send(attempt):
+        resp = requests.post(url, headers=HEADERS, json=payload, timeout=25)
+        record_request('list', resp, attempt=attempt)
+        return resp
+    
+    try:
+        data = send_with_retry('list', send, parse=lambda r: r.json())
+    except CircuitOpenError:
+        raise
+    except Exception:
+        return []
+    return data.get('items', [])
+
+
+# 여러 워커 스레드가 같은 item_id를 동시에 요청하면 한 번만 보내고 결과 공유
+_list_batches = BatchCoalescer(_fetch_list_chunk, chunk_size=10, pause=0.8)
+
+
+@staged('list')
 def fetch_details(item_ids: list, chunk_size: int = 10) -> list:
     """item_ids로 상세 정보 조회"""
     if not item_ids:
         return []
-    
-    url = 'https://apis.zigbang.com/house/property/v1/items/list'
-    all_items = []
-    
-    for i in range(0, len(item_ids), chunk_size):
-        chunk = item_ids[i:i+chunk_size]
-        payload = {'itemIds': chunk}
-        
-        for attempt in range(1, 4):
-            try:
-                resp = requests.post(url, headers=HEADERS, json=payload, timeout=25)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    items = data.get('items', [])
-                    all_items.extend(items)
-                    break
-                elif resp.status_code in (429, 500, 502, 503, 504):
-                    if attempt < 3:
-                        time.sleep(1 * attempt)
-                        continue
-                else:
-                    break
-            except Exception:
-                if attempt < 3:
-                    time.sleep(1 * attempt)
-                    continue
-        
-        time.sleep(0.8)
-    
-    return all_items
+    return _list_batches.fetch(item_ids, chunk_size)
 
 
+@staged('parse')
 def parse_item(item: dict, gu: str, dong: str) -> dict:
     """매물 정보 파싱"""
     item_id = item.get('item_id') or item.get('id') or item.get('itemId')
@@ -204,24 +249,314 @@ def parse_item(item: dict, gu: str, dong: str) -> dict:
     }
 
 
+def iter_units() -> list:
+    """단일 프로세스 순회 순서 그대로의 (구, 동) 작업 단위 목록"""
+    return [(gu, dong) for gu, dongs in SEOUL_DISTRICTS.items() for dong in dongs]
+
+
+def crawl_dong(gu: str, dong: str, skip_ids, filters: dict = None, seen: SeenSet = None) -> tuple:
+    """한 동을 검색하여 (지역 찾음 여부, 새 매물 id 목록, 파싱된 매물 목록) 반환
+
+    skip_ids: 이미 수집된 item_id (set 또는 item_id 목록을 받아 set을 반환하는 함수)
+    filters: 지도 API에 전달하고 상세 정보에도 다시 적용할 검색 조건
+    seen: 이전 실행까지 수집한 item_id (크롤러 공용 seen-set, 조회만 함)
+          결과를 저장한 뒤 호출한 쪽에서 mark_saved로 기록
+    """
+    query = f"서울 {gu} {dong}"
+
+    # 1. 지역 검색
+    location = search_location(query)
+    if not location:
+        return False, [], []
+
+    # 2. 매물 ID 조회
+    item_ids = fetch_item_ids(location['lat'], location['lng'], radius_km=1.0, filters=filters)
+
+    # 중복 제거
+    known = skip_ids(item_ids) if callable(skip_ids) else skip_ids
+    new_ids = [iid for iid in item_ids if iid not in known]
+    if seen is not None:
+        new_ids = seen.filter_new(new_ids)
+    if not new_ids:
+        return True, item_ids, []
+
+    # 3. 상세 정보 조회 및 파싱
+    # 거래 유형(salesType)은 파싱 결과에 없으므로 원본 상세 정보에 조건 적용 후 파싱
+    items = filter_items(fetch_details(new_ids), filters)
+    parsed = [parse_item(it, gu, dong) for it in items]
+    if BOUNDARIES is not None:
+        attribute(parsed, BOUNDARIES)
+    return True, item_ids, parsed
+
+
+def mark_saved(seen: SeenSet, rows):
+    """저장(CSV 또는 큐 반영)까지 끝난 매물만 seen-set에 기록
+    lease 만료로 버린 결과, 저장 전 중단, 검색 조건으로 거른 매물은 다음 처리에서 다시 수집"""
+    if seen is not None:
+        seen.add_many(p['item_id'] for p in rows if p['item_id'])
+
+
+def run_worker(queue_path: str, lease_seconds: float = 300.0, filters: dict = None,
+               seen: SeenSet = None, worker_id: str = None):
+    """큐에서 작업 단위를 하나씩 가져와 처리하는 워커 루프"""
+    queue = WorkQueue(queue_path, lease_seconds=lease_seconds)
+    worker_id = worker_id or default_worker_id()
+    print(f'워커 시작: {worker_id} (큐: {queue_path})')
+    done = 0
+
+    while True:
+        unit = queue.claim(worker_id)
+        if unit is None:
+            break
+
+        gu, dong = unit['gu'], unit['dong']
+        keeper = LeaseKeeper(queue_path, unit['seq'], worker_id, lease_seconds)
+        keeper.start()
+        try:
+            found, item_ids, parsed = crawl_dong(gu, dong, queue.known_ids, filters, seen)
+        except CircuitOpenError as e:
+            # 시도 횟수를 쓰지 않고 큐에 돌려놓은 뒤 API 차단이 풀릴 때까지 대기
+            keeper.stop()
+            queue.release(unit, worker_id)
+            print(f'  [{gu}] {dong}: ⏸️ 보류 - {e}')
+            time.sleep(max(e.retry_at - time.time(), 0))
+            continue
+        except Exception as e:
+            keeper.stop()
+            print(f'  [{gu}] {dong}: ❌ 오류 - {e}')
+            queue.fail(unit, worker_id, str(e))
+            continue
+        keeper.stop()
+
+        if not found:
+            print(f'  [{gu}] {dong}: ❌ 지역 못찾음')
+            queue.fail(unit, worker_id, '지역 못찾음')
+            continue
+
+        # 다른 작업 단위가 먼저 저장한 매물도 순회 순서상 앞선 동에 귀속
+        queue.claim_ids(unit, item_ids)
+        if keeper.lost or not queue.complete(unit, worker_id, parsed):
+            print(f'  [{gu}] {dong}: lease 만료로 결과 폐기 (다른 워커가 처리)')
+            continue
+        mark_saved(seen, parsed)
+
+        done += 1
+        print(f'  [{gu}] {dong}: {len(parsed)}개 (워커 처리 {done}개 동)')
+        time.sleep(0.5)
+
+    print(f'워커 종료: {done}개 동 처리, 큐 상태 {queue.stats()}')
+    queue.close()
+
+
+def run_worker_threads(queue_path: str, threads: int, lease_seconds: float = 300.0,
+                       filters: dict = None, seen_prefix: str = None):
+    """한 프로세스에서 워커 threads개를 동시에 실행 (같은 item_id 요청은 프로세스 안에서 한 번만 전송)"""
+    base_id = default_worker_id()
+
+    def work(index: int):
+        # 큐(SQLite)와 seen-set 파일 핸들은 스레드마다 따로 엶
+        seen = SeenSet(seen_prefix) if seen_prefix else None
+        run_worker(queue_path, lease_seconds, filters, seen, worker_id=f'{base_id}-t{index}')
+
+    workers = [threading.Thread(target=work, args=(i,), name=f'worker-{i}') for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    stats = _list_batches.stats
+    print(f'상세 요청 공유: 요청 {stats["requested"]}개 중 {stats["shared"]}개는 '
+          f'다른 스레드의 진행 중인 요청 결과 사용')
+    print(format_stats(_map_tiles))
+
+
+@staged('write')
+def save_outputs(all_items: ListingStore, output_dir: str) -> str:
+    """구별 CSV와 전체 CSV 저장 후 전체 파일 경로 반환"""
+    for gu in SEOUL_DISTRICTS:
+        gu_items = list(all_items.iter_where('search_gu', gu))
+        if gu_items:
+            save_csv(gu_items, os.path.join(output_dir, f'zigbang_{gu}.csv'))
+            print(f'  → {gu} 저장: {len(gu_items)}개')
+
+    return save_all_csv(all_items, output_dir)
+
+
+@staged('write')
+def save_all_csv(all_items, output_dir: str) -> str:
+    """전체 CSV(타임스탬프 포함 파일명) 저장 후 경로 반환"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    all_filename = os.path.join(output_dir, f'zigbang_서울_전체_{timestamp}.csv')
+    save_csv(all_items, all_filename)
+    return all_filename
+
+
+@staged('write')
+def save_rollups(all_items: ListingStore, path: str):
+    """--rollups: 저장한 스냅샷의 구/동/유형별 롤업을 함께 저장"""
+    if not path:
+        return
+    rollups = save_store_rollups(all_items, path)
+    print(f'  → 롤업 저장: {len(rollups.groups)}개 그룹 ({path})')
+
+
+def merge_queue(queue_path: str, output_dir: str, rollups_path: str = None):
+    """큐에 병합된 결과를 단일 프로세스 실행과 같은 형태의 CSV로 저장"""
+    queue = WorkQueue(queue_path)
+    stats = queue.stats()
+    pending = sum(v for k, v in stats.items() if k not in ('done', 'failed'))
+    if pending:
+        print(f'⚠️  아직 처리되지 않은 작업 단위가 있습니다: {stats}')
+
+    os.makedirs(output_dir, exist_ok=True)
+    rows = queue.iter_items()
+    if BOUNDARIES is not None:
+        # 경계 없이 실행한 워커의 결과도 폴리곤 기준 구/동으로 다시 귀속
+        rows = list(rows)
+        print(f'경계 폴리곤 기준으로 {attribute(rows, BOUNDARIES)}개 매물의 구/동 변경')
+    all_items = ListingStore.from_rows(rows)
+    queue.close()
+
+    all_filename = save_outputs(all_items, output_dir)
+    save_rollups(all_items, rollups_path)
+    print(f'\n✅ 병합 완료!')
+    print(f'   - 작업 단위: {stats}')
+    print(f'   - 총 매물 수: {len(all_items)}개')
+    print(f'   - 전체 파일: {all_filename}')
+
+
+def plan_crawl(args):
+    """API 호출 없이 동 단위 작업 목록과 요청 수/전송량/소요 시간 추정 출력"""
+    metrics = load_metrics(args.metrics).get('search_all_seoul', {})
+    units = iter_units()
+    chunks = list_calls_per_unit(metrics, chunk_size=10)
+    plan = estimate(len(units), {'search': 1, 'map': 1, 'list': chunks}, metrics,
+                    unit_sleep=0.5, call_sleep={'list': 0.8},
+                    workers=args.plan_workers, rate=args.plan_rate)
+    print_plan(f'서울 전체 {len(SEOUL_DISTRICTS)}개 구', plan)
+    print(f'   동당 상세 청크 {chunks:.1f}개 (10개씩)')
+    if args.plan_out:
+        work = [{'gu': gu, 'dong': dong, 'search': 1, 'map': 1, 'list': round(chunks, 2)}
+                for gu, dong in units]
+        save_plan(args.plan_out, plan, work)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='서울시 전체 동 매물 검색')
+    parser.add_argument('--queue', help='작업 큐 SQLite 파일 (여러 워커 프로세스로 분산 실행)')
+    parser.add_argument('--init', action='store_true', help='큐에 전체 동 작업 단위 등록')
+    parser.add_argument('--worker', action='store_true', help='큐의 작업 단위를 처리하는 워커 실행')
+    parser.add_argument('--merge', action='store_true', help='큐에 모인 결과를 CSV로 저장')
+    parser.add_argument('--lease', type=float, default=300.0, help='작업 lease 시간(초)')
+    parser.add_argument('--threads', type=int, default=1, help='--worker 에서 동시에 실행할 워커 스레드 수')
+    parser.add_argument('--output-dir', default='seoul_data', help='출력 디렉토리')
+    add_seen_set_argument(parser)
+    add_filter_arguments(parser)
+    add_profile_argument(parser)
+    add_plan_arguments(parser)
+    add_resilience_arguments(parser)
+    add_boundary_arguments(parser)
+    add_map_cache_arguments(parser)
+    add_rollups_argument(parser)
+    parser.add_argument('--defer-wait', type=float, default=600.0,
+                        help='순회 후 API 차단으로 보류된 동을 재처리하며 기다릴 최대 시간(초)')
+    args = parser.parse_args()
+    if (args.init or args.worker or args.merge) and not args.queue:
+        parser.error('--init/--worker/--merge 는 --queue 와 함께 사용해야 합니다')
+    return args
+
+
 def main():
+    global BOUNDARIES
+    args = parse_args()
+    if args.plan:
+        plan_crawl(args)
+        return
+    BOUNDARIES = index_from_args(args)
+    start_profiling(args.profile)
+    start_recording('search_all_seoul', args.metrics)
+    configure_from_args(args)
+    configure_map_cache(args)
+    filters = filters_from_args(args)
+    seen = SeenSet(args.seen_set) if args.seen_set else None
+
+    if args.queue:
+        if args.init:
+            queue = WorkQueue(args.queue, lease_seconds=args.lease)
+            count = queue.init_units(iter_units())
+            print(f'큐 준비 완료: {args.queue} ({count}개 작업 단위, 상태 {queue.stats()})')
+            queue.close()
+        if args.worker and args.threads > 1:
+            run_worker_threads(args.queue, args.threads, lease_seconds=args.lease,
+                               filters=filters, seen_prefix=args.seen_set)
+        elif args.worker:
+            run_worker(args.queue, lease_seconds=args.lease, filters=filters, seen=seen)
+        if args.merge:
+            merge_queue(args.queue, args.output_dir, args.rollups)
+        return
+
     print('=' * 60)
     print('  서울시 전체 동 매물 검색')
     print('=' * 60)
     
     # 출력 디렉토리
-    output_dir = 'seoul_data'
+    output_dir = args.output_dir
     os.makedirs(output_dir, exist_ok=True)
     
-    # 전체 매물 저장용
-    all_items = []
-    all_item_ids = set()  # 중복 제거용
+    # 전체 매물 저장용 (item_id 인덱스로 중복 제거도 겸함)
+    all_items = ListingStore()
     
     # 통계
     total_dongs = sum(len(dongs) for dongs in SEOUL_DISTRICTS.values())
     processed = 0
     success_count = 0
     fail_count = 0
+    gu_counts = dict.fromkeys(SEOUL_DISTRICTS, 0)
+    done_gus = set()  # 순회를 마치고 구별 CSV를 저장한 구
+    late_gus = set()  # 구별 CSV 저장 후에 매물이 추가되어 다시 저장해야 하는 구 (보류 재처리, 경계 귀속)
+    deferred = DeferredQueue()  # API 차단으로 보류된 (구, 동)
+    
+    def process(gu: str, dong: str, label: str) -> int:
+        """한 동 처리 후 새로 저장한 매물 수 반환 (API 차단 중이면 보류)"""
+        nonlocal success_count, fail_count
+        try:
+            found, _, parsed_items = crawl_dong(gu, dong, all_items, filters, seen)
+        except CircuitOpenError as e:
+            deferred.park(e.endpoint, (gu, dong))
+            print(f'  {dong}: ⏸️ 보류 - {e}')
+            return 0
+        except Exception as e:
+            print(f'  {dong}: ❌ 오류 - {e}')
+            fail_count += 1
+            return 0
+        
+        if not found:
+            print(f'  {dong}: ❌ 지역 못찾음')
+            fail_count += 1
+            return 0
+        
+        success_count += 1
+        if not parsed_items:
+            print(f'  {dong}: 0개 (중복 제외)')
+            return 0
+        
+        # 저장 (--boundaries 면 검색한 동이 아니라 좌표가 속한 구에 집계)
+        added = 0
+        for parsed in parsed_items:
+            if all_items.add(parsed):
+                added += 1
+                owner = parsed['search_gu']
+                gu_counts[owner] = gu_counts.get(owner, 0) + 1
+                if owner in done_gus:
+                    late_gus.add(owner)
+        print(f'  {dong}: {len(parsed_items)}개 ({label})')
+        return added
+    
+    def replay_ready():
+        """차단이 풀린 API의 보류 작업 재처리"""
+        for gu, dong in deferred.pop_ready():
+            print(f'  ↻ [{gu}] {dong} 보류 작업 재처리')
+            process(gu, dong, '보류 후 재처리')
+            time.sleep(0.5)
     
     print(f'\n총 {len(SEOUL_DISTRICTS)}개 구, {total_dongs}개 동 검색 시작...\n')
     
@@ -229,61 +564,43 @@ def main():
         print(f'\n[{gu}] ({len(dongs)}개 동)')
         print('-' * 40)
         
-        gu_items = []
-        
         for dong in dongs:
             processed += 1
-            query = f"서울 {gu} {dong}"
-            
-            try:
-                # 1. 지역 검색
-                location = search_location(query)
-                if not location:
-                    print(f'  {dong}: ❌ 지역 못찾음')
-                    fail_count += 1
-                    continue
-                
-                # 2. 매물 ID 조회
-                item_ids = fetch_item_ids(location['lat'], location['lng'], radius_km=1.0)
-                
-                # 중복 제거
-                new_ids = [iid for iid in item_ids if iid not in all_item_ids]
-                
-                if not new_ids:
-                    print(f'  {dong}: 0개 (중복 제외)')
-                    success_count += 1
-                    continue
-                
-                # 3. 상세 정보 조회
-                items = fetch_details(new_ids)
-                
-                # 파싱 및 저장
-                for it in items:
-                    parsed = parse_item(it, gu, dong)
-                    gu_items.append(parsed)
-                    all_items.append(parsed)
-                    all_item_ids.add(parsed['item_id'])
-                
-                print(f'  {dong}: {len(items)}개 ({processed}/{total_dongs})')
-                success_count += 1
-                
-            except Exception as e:
-                print(f'  {dong}: ❌ 오류 - {e}')
-                fail_count += 1
-            
+            replay_ready()
+            process(gu, dong, f'{processed}/{total_dongs}')
             time.sleep(0.5)
         
         # 구별 CSV 저장
-        if gu_items:
+        done_gus.add(gu)
+        if gu_counts[gu]:
             gu_filename = os.path.join(output_dir, f'zigbang_{gu}.csv')
+            gu_items = list(all_items.iter_where('search_gu', gu))
             save_csv(gu_items, gu_filename)
-            print(f'  → {gu} 저장: {len(gu_items)}개')
+            mark_saved(seen, gu_items)
+            print(f'  → {gu} 저장: {gu_counts[gu]}개')
+    
+    # 남은 보류 작업은 API가 복구될 때까지 최대 --defer-wait 초 기다리며 재처리
+    deadline = time.time() + args.defer_wait
+    while deferred and time.time() < deadline:
+        wait = min(deferred.next_retry_at(), deadline) - time.time()
+        if wait > 0:
+            print(f'\n⏸️ 보류된 동 {len(deferred)}개: {wait:.0f}초 후 재시도')
+            time.sleep(wait)
+        replay_ready()
+    if deferred:
+        print(f'\n❌ API가 복구되지 않아 {len(deferred)}개 동을 처리하지 못했습니다')
+        fail_count += len(deferred)
+    for gu in sorted(late_gus):
+        gu_items = list(all_items.iter_where('search_gu', gu))
+        save_csv(gu_items, os.path.join(output_dir, f'zigbang_{gu}.csv'))
+        mark_saved(seen, gu_items)
+        print(f'  → {gu} 다시 저장: {gu_counts[gu]}개')
     
     # 전체 CSV 저장
     print('\n' + '=' * 60)
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    all_filename = os.path.join(output_dir, f'zigbang_서울_전체_{timestamp}.csv')
-    save_csv(all_items, all_filename)
+    all_filename = save_all_csv(all_items, output_dir)
+    mark_saved(seen, all_items)
+    save_rollups(all_items, args.rollups)
     
     print(f'\n✅ 완료!')
     print(f'   - 검색 성공: {success_count}개 동')
@@ -291,8 +608,10 @@ def main():
     print(f'   - 총 매물 수: {len(all_items)}개')
     print(f'   - 전체 파일: {all_filename}')
     print(f'   - 구별 파일: {output_dir}/ 폴더')
+    print(f'   - {format_stats(_map_tiles)}')
 
 
+@staged('write')
 def save_csv(items: list, filename: str):
     """CSV 파일 저장"""
     if not items:
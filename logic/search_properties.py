@@ -1,18 +1,28 @@
 """
 직방 매물 검색 CLI 스크립트
-사용법: python search_properties.py [지역명]
+사용법: python search_properties.py [지역명] [검색 조건]
 
 예시:
   python search_properties.py 망원동
   python search_properties.py "서울 마포구 망원동"
   python search_properties.py "강남구 역삼동"
+  python search_properties.py 망원동 --sales-type 월세 --deposit-max 1000 --rent-max 70
+  python search_properties.py --batch 망원동 합정동 서교동        # 여러 지역 한 번에
+  python search_properties.py --regions-file regions.txt         # 파일의 지역 목록
 """
+import argparse
 import requests
 import csv
 import time
 import sys
 from math import ceil
 
+from map_filters import add_filter_arguments, filters_from_args, apply_map_filters, filter_items
+from seen_set import SeenSet, add_seen_set_argument
+from profiling import staged, add_profile_argument, start_profiling
+from map_tile_cache import MapTileCache
+from zigbang_api import API_BASE
+
 try:
     import pygeohash as pgh
 except ImportError:
@@ -31,9 +41,10 @@ HEADERS = {
 }
 
 
+@staged('search')
 def search_location(query: str) -> dict:
     """직방 API로 지역 검색하여 좌표 정보 획득"""
-    url = 'https://apis.zigbang.com/v3/search'
+    url = f'{API_BASE}/v3/search'
     params = {'q': query, 'type': 'dong'}
     
     print(f'[1/5] 지역 검색 중: {query}')
@@ -68,44 +79,43 @@ def search_location(query: str) -> dict:
     return result
 
 
-def fetch_item_ids(lat: float, lng: float, radius_km: float = 1.5) -> list:
-    """지역 좌표 기준 매물 item_ids 조회"""
-    url = 'https://apis.zigbang.com/v2/items/oneroom'
-    
-    # geohash 생성
-    geohash = pgh.encode(lat, lng, precision=4)
-    
-    # bbox 범위 계산
+def region_bbox(lat: float, lng: float, radius_km: float = 1.5) -> tuple:
+    """중심 좌표 기준 검색 범위 (latSouth, latNorth, lngWest, lngEast)"""
     lat_delta = radius_km / 111.0
     lng_delta = radius_km / (111.0 * 0.85)
+    return (lat - lat_delta, lat + lat_delta, lng - lng_delta, lng + lng_delta)
+
+
+def map_params(filters: dict = None) -> dict:
+    """지도 API의 bbox 이외 파라미터 (검색 조건 포함)"""
+    return apply_map_filters({
+        'domain': 'zigbang',
+        'checkAnyItemWithoutFilter': 'true',
+    }, filters)
+
+
+def _request_bbox(bbox: tuple, params: dict) -> tuple:
+    url = f'{API_BASE}/v2/items/oneroom'
+    lat_south, lat_north, lng_west, lng_east = bbox
     
-    lat_north = lat + lat_delta
-    lat_south = lat - lat_delta
-    lng_east = lng + lng_delta
-    lng_west = lng - lng_delta
+    # geohash 생성 (bbox 중심 기준)
+    geohash = pgh.encode((lat_south + lat_north) / 2, (lng_west + lng_east) / 2, precision=4)
     
-    params = {
+    params = dict(params, **{
         'geohash': geohash,
-        'depositMin': '0',
-        'rentMin': '0',
-        'salesTypes[0]': '전세',
-        'salesTypes[1]': '월세',
         'latNorth': str(lat_north),
         'latSouth': str(lat_south),
         'lngEast': str(lng_east),
         'lngWest': str(lng_west),
-        'domain': 'zigbang',
-        'checkAnyItemWithoutFilter': 'true',
-    }
+    })
     
-    print(f'[2/5] 매물 ID 조회 중... (geohash: {geohash})')
     resp = requests.get(url, params=params, headers=HEADERS, timeout=15)
     resp.raise_for_status()
     data = resp.json()
     
     items = data.get('items') if isinstance(data, dict) else data
     if not items:
-        return []
+        return 0, []
     
     # bbox 범위 내의 매물만 필터링
     filtered_items = []
@@ -116,19 +126,86 @@ def fetch_item_ids(lat: float, lng: float, radius_km: float = 1.5) -> list:
             lng_west <= item_lng <= lng_east):
             iid = it.get('itemId') or it.get('item_id')
             if iid:
-                filtered_items.append(int(iid))
+                filtered_items.append({'itemId': int(iid), 'lat': item_lat, 'lng': item_lng})
+    return len(items), filtered_items
+
+
+def _fetch_map_points(bbox: tuple, params: dict) -> list:
+    return _request_bbox(bbox, params)[1]
+
+
+# 지도 응답 타일 캐시 (한 프로세스에서 이웃 지역을 다시 조회할 때 겹치는 타일은 요청하지 않음)
+_map_tiles = MapTileCache(_fetch_map_points)
+
+
+@staged('map')
+def query_map_bbox(bbox: tuple, params: dict) -> list:
+    """bbox 범위 매물 {itemId, lat, lng} 목록 (지도 타일 캐시 사용)"""
+    return _map_tiles.query(bbox, params)
+
+
+@staged('map')
+def fetch_item_ids(lat: float, lng: float, radius_km: float = 1.5, filters: dict = None) -> list:
+    """지역 좌표 기준 매물 item_ids 조회 (filters: 지도 API에 전달할 검색 조건)"""
+    bbox = region_bbox(lat, lng, radius_km)
+    geohash = pgh.encode(lat, lng, precision=4)
     
-    unique_ids = sorted(set(filtered_items))
-    print(f'      → 전체 응답: {len(items)}개 / 범위 내 매물: {len(unique_ids)}개')
+    print(f'[2/5] 매물 ID 조회 중... (geohash: {geohash})')
+    requests_before = _map_tiles.stats['requests']
+    points = _map_tiles.query(bbox, map_params(filters))
+    
+    unique_ids = sorted({p['itemId'] for p in points})
+    print(f'      → 범위 내 매물: {len(unique_ids)}개 '
+          f'(지도 요청 {_map_tiles.stats["requests"] - requests_before}회)')
     return unique_ids
 
 
+def _area(bbox: tuple) -> float:
+    return max(bbox[1] - bbox[0], 0.0) * max(bbox[3] - bbox[2], 0.0)
+
+
+def _overlap(a: tuple, b: tuple) -> float:
+    return _area((max(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), min(a[3], b[3])))
+
+
+def plan_bboxes(bboxes: list, slack: float = 1.5) -> list:
+    """겹치거나 이웃한 지역 bbox를 묶어 지도 요청 수를 줄임
+
+    두 묶음을 감싸는 bbox의 넓이가 두 묶음이 덮는 넓이(겹친 부분은 한 번)의 slack배 이하이면 하나로 합침
+    → 크게 겹치는 지역은 요청 1회, 멀리 떨어진 지역은 각자 요청
+    """
+    groups = [(tuple(b), _area(b)) for b in bboxes]  # (감싸는 bbox, 덮는 넓이)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(groups)):
+            for j in range(i + 1, len(groups)):
+                (a, area_a), (b, area_b) = groups[i], groups[j]
+                union = (min(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3]))
+                covered = area_a + area_b - _overlap(a, b)
+                if _area(union) <= slack * covered:
+                    groups[i] = (union, covered)
+                    del groups[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return [bbox for bbox, _ in groups]
+
+
+def load_regions_file(filepath: str) -> list:
+    """텍스트 파일에서 지역명 목록 읽기 (한 줄에 하나, # 주석 무시)"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+@staged('list')
 def fetch_details(item_ids: list, chunk_size: int = 10) -> list:
     """item_ids로 상세 정보 조회 (재시도 로직 포함)"""
     if not item_ids:
         return []
     
-    url = 'https://apis.zigbang.com/house/property/v1/items/list'
+    url = f'{API_BASE}/house/property/v1/items/list'
     all_items = []
     total_chunks = ceil(len(item_ids) / chunk_size)
     
@@ -169,6 +246,7 @@ def fetch_details(item_ids: list, chunk_size: int = 10) -> list:
     return all_items
 
 
+@staged('parse')
 def parse_item(item: dict) -> dict:
     """매물 정보 파싱"""
     item_id = item.get('item_id') or item.get('id') or item.get('itemId')
@@ -200,6 +278,7 @@ def parse_item(item: dict) -> dict:
     }
 
 
+@staged('write')
 def save_csv(items: list, filename: str):
     """CSV 파일 저장"""
     if not items:
@@ -225,14 +304,116 @@ def save_csv(items: list, filename: str):
     print(f'   파일: {filename}')
 
 
+def mark_saved(seen: SeenSet, items: list):
+    """CSV에 저장한 매물만 seen-set에 기록
+    (저장 전에 중단되거나 검색 조건으로 거른 매물은 다음 실행에서 다시 수집)"""
+    if seen is not None:
+        seen.add_many(p['item_id'] for p in map(parse_item, items) if p['item_id'])
+
+
+def run_batch(regions: list, filters: dict = None, radius_km: float = 1.5, seen: SeenSet = None):
+    """여러 지역을 한 프로세스에서 처리 (겹치는 범위와 중복 item_id는 한 번만 조회)"""
+    print(f'[1/5] 지역 검색 중: {len(regions)}개 지역')
+    located = []
+    for query in regions:
+        try:
+            location = search_location(query)
+        except ValueError as e:
+            print(f'      ❌ {e}')
+            continue
+        located.append((query, location, region_bbox(location['lat'], location['lng'], radius_km)))
+        time.sleep(0.3)
+    
+    if not located:
+        print('\n❌ 검색된 지역이 없습니다.')
+        return
+    
+    # 2. 겹치는 지역 bbox를 묶어 조회 (지도 타일 캐시를 거치므로 이미 받은 타일은 다시 요청하지 않음)
+    planned = plan_bboxes([bbox for _, _, bbox in located])
+    print(f'[2/5] 매물 ID 조회 중... ({len(located)}개 지역 → {len(planned)}개 bbox)')
+    points = {}
+    params = map_params(filters)
+    for idx, bbox in enumerate(planned, start=1):
+        requests_before = _map_tiles.stats['requests']
+        found = query_map_bbox(bbox, params)
+        for p in found:
+            points[p['itemId']] = p
+        print(f'      bbox {idx}/{len(planned)}: 범위 내 {len(found)}개 '
+              f'(지도 요청 {_map_tiles.stats["requests"] - requests_before}회)')
+        time.sleep(0.5)
+    
+    region_ids = []
+    for query, location, (south, north, west, east) in located:
+        ids = sorted(iid for iid, p in points.items()
+                     if south <= p['lat'] <= north and west <= p['lng'] <= east)
+        region_ids.append(ids)
+    
+    # 3. 전체 고유 item_id로 상세 정보 한 번만 조회
+    unique_ids = sorted(points)
+    requested = sum(len(ids) for ids in region_ids)
+    print(f'      → 고유 매물 {len(unique_ids)}개 (지역별 합계 {requested}개)')
+    if seen is not None:
+        unique_ids = seen.filter_new(unique_ids)
+        print(f'      → 이전에 수집하지 않은 매물 {len(unique_ids)}개')
+    items = fetch_details(unique_ids)
+    items = filter_items(items, filters)
+    by_id = {}
+    for it in items:
+        iid = it.get('item_id') or it.get('id') or it.get('itemId')
+        if iid:
+            by_id[int(iid)] = it
+    
+    # 4. 지역별 CSV 저장 (같은 지역으로 검색된 질의는 파일명 뒤에 번호를 붙여 덮어쓰지 않음)
+    used_names = {}
+    for (query, location, _), ids in zip(located, region_ids):
+        region_items = [by_id[iid] for iid in ids if iid in by_id]
+        safe_name = location['description'].replace(' ', '_')
+        used_names[safe_name] = used_names.get(safe_name, 0) + 1
+        if used_names[safe_name] > 1:
+            safe_name = f'{safe_name}_{used_names[safe_name]}'
+        save_csv(region_items, f'zigbang_{safe_name}.csv')
+        mark_saved(seen, region_items)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='직방 매물 검색 CLI')
+    parser.add_argument('query', nargs='*', help='지역명 (예: 망원동, 강남구 역삼동)')
+    parser.add_argument('--batch', action='store_true',
+                        help='인자 하나를 지역 하나로 보고 여러 지역을 한 번에 처리')
+    parser.add_argument('--regions-file', help='지역명 목록 파일 (한 줄에 하나, 배치 모드)')
+    add_seen_set_argument(parser)
+    add_filter_arguments(parser)
+    add_profile_argument(parser)
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    start_profiling(args.profile)
+    filters = filters_from_args(args)
+    seen = SeenSet(args.seen_set) if args.seen_set else None
+
     print('=' * 50)
     print('  직방 매물 검색 CLI')
     print('=' * 50)
     
+    if args.batch or args.regions_file:
+        regions = list(args.query)
+        if args.regions_file:
+            regions.extend(load_regions_file(args.regions_file))
+        if not regions:
+            print('지역명을 입력해주세요.')
+            return
+        print()
+        try:
+            run_batch(regions, filters, seen=seen)
+        except Exception as e:
+            print(f'\n❌ 오류 발생: {e}')
+        return
+    
     # 지역명 입력 받기
-    if len(sys.argv) > 1:
-        query = ' '.join(sys.argv[1:])
+    if args.query:
+        query = ' '.join(args.query)
     else:
         print('\n지역명을 입력하세요 (예: 망원동, 강남구 역삼동)')
         query = input('지역명: ').strip()
@@ -248,7 +429,11 @@ def main():
         location = search_location(query)
         
         # 2. 매물 ID 조회 (반경 1.5km)
-        item_ids = fetch_item_ids(location['lat'], location['lng'], radius_km=1.5)
+        item_ids = fetch_item_ids(location['lat'], location['lng'], radius_km=1.5, filters=filters)
+        
+        if seen is not None:
+            item_ids = seen.filter_new(item_ids)
+            print(f'      → 이전에 수집하지 않은 매물: {len(item_ids)}개')
         
         if not item_ids:
             print('\n❌ 해당 지역에서 매물을 찾지 못했습니다.')
@@ -257,10 +442,14 @@ def main():
         # 3. 상세 정보 조회
         items = fetch_details(item_ids)
         
+        # 지도 API가 일부 조건을 무시하는 경우를 대비해 상세 정보로 한 번 더 필터링
+        items = filter_items(items, filters)
+        
         # 4. CSV 저장
         safe_name = location['description'].replace(' ', '_')
         filename = f'zigbang_{safe_name}.csv'
         save_csv(items, filename)
+        mark_saved(seen, items)
         
     except ValueError as e:
         print(f'\n❌ 오류: {e}')
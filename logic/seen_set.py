@@ -0,0 +1,330 @@
+"""
+디스크 기반 item_id seen-set
+여러 크롤러가 공유하는 "이미 수집한 매물인가?" 집합을 파일로 유지
+
+파일 구성 (경로 접두사 기준, 예: seen_ids):
+- seen_ids.bin   : 정렬된 uint64 item_id 배열 (mmap으로 열어 이진 탐색, 파이썬 객체로 올리지 않음)
+- seen_ids.bloom : 블룸 필터 비트 배열 (mmap). 대부분의 "처음 보는 id" 조회를 O(1)로 걸러냄
+- seen_ids.log   : 마지막 압축 이후 추가된 id (8바이트씩 append). 메모리에는 이 부분만 set으로 보관
+- seen_ids.lock  : 여러 프로세스가 동시에 추가/압축할 때 사용하는 잠금 파일
+
+log가 커지면 compact()로 bin에 병합하고 블룸 필터를 다시 만듦
+
+사용법:
+  python seen_set.py seen_ids --stats
+  python seen_set.py seen_ids --add-csv seoul_data/zigbang_강남구.csv
+  python seen_set.py seen_ids --compact
+"""
+import argparse
+import bisect
+import csv
+import math
+import mmap
+import os
+import struct
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 동작
+    fcntl = None
+
+_BLOOM_HEADER = struct.Struct('<4sIQ')  # magic, 해시 개수(k), 비트 수(m)
+_BLOOM_MAGIC = b'SEEN'
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(x: int) -> int:
+    """splitmix64 해시"""
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+class _FileLock:
+    def __init__(self, path: str):
+        self.path = path
+        self.f = None
+
+    def __enter__(self):
+        self.f = open(self.path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self.f, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.f, fcntl.LOCK_UN)
+        self.f.close()
+
+
+class SeenSet:
+    """정렬 배열 + 블룸 필터 + 추가 로그로 구성된 영구 item_id 집합"""
+
+    def __init__(self, prefix: str, fp_rate: float = 0.01, compact_threshold: int = 200000):
+        self.prefix = prefix
+        self.fp_rate = fp_rate
+        self.compact_threshold = compact_threshold
+        self.bin_path = prefix + '.bin'
+        self.bloom_path = prefix + '.bloom'
+        self.log_path = prefix + '.log'
+        self.lock_path = prefix + '.lock'
+        directory = os.path.dirname(os.path.abspath(prefix))
+        os.makedirs(directory, exist_ok=True)
+
+        self._base = None
+        self._base_mm = None
+        self._bloom_mm = None
+        self._bin_ino = None
+        self.pending = set()
+        self._log_offset = 0
+
+        with _FileLock(self.lock_path):
+            if not os.path.exists(self.bin_path):
+                open(self.bin_path, 'wb').close()
+            if not os.path.exists(self.bloom_path):
+                self._write_bloom(self._iter_base_file(), 0)
+            self._open_files()
+        self.refresh()
+
+    # ----- 파일 열기/닫기 -----
+
+    def _open_files(self):
+        self._close_maps()
+        st = os.stat(self.bin_path)
+        self._bin_ino = (st.st_ino, st.st_mtime_ns)
+        if st.st_size:
+            with open(self.bin_path, 'rb') as f:
+                self._base_mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._base = memoryview(self._base_mm).cast('Q')
+        with open(self.bloom_path, 'r+b') as f:
+            self._bloom_mm = mmap.mmap(f.fileno(), 0)
+        _, self.k, self.m = _BLOOM_HEADER.unpack_from(self._bloom_mm, 0)
+        self._log_offset = 0
+        self.pending = set()
+
+    def _close_maps(self):
+        if self._base is not None:
+            self._base.release()
+            self._base = None
+        for mm in (self._base_mm, self._bloom_mm):
+            if mm is not None:
+                mm.close()
+        self._base_mm = None
+        self._bloom_mm = None
+
+    def close(self):
+        self._close_maps()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----- 블룸 필터 -----
+
+    def _positions(self, item_id: int, k: int, m: int):
+        h = _mix64(item_id)
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        return [(h1 + i * h2) % m for i in range(k)]
+
+    def _bloom_has(self, item_id: int) -> bool:
+        mm = self._bloom_mm
+        offset = _BLOOM_HEADER.size
+        for pos in self._positions(item_id, self.k, self.m):
+            if not mm[offset + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def _bloom_add(self, item_id: int):
+        mm = self._bloom_mm
+        offset = _BLOOM_HEADER.size
+        for pos in self._positions(item_id, self.k, self.m):
+            idx = offset + (pos >> 3)
+            mm[idx] = mm[idx] | (1 << (pos & 7))
+
+    def _write_bloom(self, ids, count: int):
+        """count개(+여유분) 기준으로 블룸 필터를 새로 만들어 원자적으로 교체"""
+        capacity = max(int((count + self.compact_threshold) * 1.5), 1024)
+        m = int(-capacity * math.log(self.fp_rate) / (math.log(2) ** 2))
+        m = (m + 7) // 8 * 8
+        k = max(1, round(m / capacity * math.log(2)))
+        bits = bytearray(m // 8)
+        for item_id in ids:
+            for pos in self._positions(item_id, k, m):
+                bits[pos >> 3] |= 1 << (pos & 7)
+        tmp_path = self.bloom_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_BLOOM_HEADER.pack(_BLOOM_MAGIC, k, m))
+            f.write(bits)
+        os.replace(tmp_path, self.bloom_path)
+
+    # ----- 조회/추가 -----
+
+    def refresh(self):
+        """다른 프로세스가 추가한 id(log)와 압축 결과(bin 교체)를 반영"""
+        while True:
+            st = os.stat(self.bin_path)
+            if (st.st_ino, st.st_mtime_ns) != self._bin_ino:
+                self._open_files()
+            try:
+                with open(self.log_path, 'rb') as f:
+                    if os.fstat(f.fileno()).st_size < self._log_offset:
+                        # 읽은 위치보다 짧아졌으면 압축으로 비워진 log → bin을 다시 열고 처음부터
+                        self._bin_ino = None
+                        continue
+                    f.seek(self._log_offset)
+                    data = f.read()
+            except FileNotFoundError:
+                data = b''
+            # 압축은 bin 교체 후 log를 비우므로, 읽은 뒤에도 bin이 그대로면 읽은 log는 현재 bin 기준
+            st = os.stat(self.bin_path)
+            if (st.st_ino, st.st_mtime_ns) == self._bin_ino:
+                break
+        usable = len(data) - len(data) % 8
+        if usable:
+            self.pending.update(struct.unpack(f'<{usable // 8}Q', data[:usable]))
+            self._log_offset += usable
+
+    def _in_base(self, item_id: int) -> bool:
+        base = self._base
+        if base is None:
+            return False
+        i = bisect.bisect_left(base, item_id)
+        return i < len(base) and base[i] == item_id
+
+    def __contains__(self, item_id) -> bool:
+        item_id = int(item_id)
+        if item_id in self.pending:
+            return True
+        if not self._bloom_has(item_id):
+            return False
+        return self._in_base(item_id)
+
+    def __len__(self) -> int:
+        base = len(self._base) if self._base is not None else 0
+        return base + len(self.pending)
+
+    def filter_new(self, item_ids) -> list:
+        """아직 보지 못한 item_id만 순서대로 반환"""
+        self.refresh()
+        return [iid for iid in item_ids if iid not in self]
+
+    def add_many(self, item_ids) -> int:
+        """item_id 추가 (이미 있는 id는 무시). 새로 추가된 수 반환"""
+        with _FileLock(self.lock_path):
+            self.refresh()
+            new_ids = []
+            batch = set()
+            for iid in item_ids:
+                iid = int(iid)
+                if iid not in batch and iid not in self:
+                    batch.add(iid)
+                    new_ids.append(iid)
+            if new_ids:
+                with open(self.log_path, 'ab') as f:
+                    f.write(struct.pack(f'<{len(new_ids)}Q', *new_ids))
+                    self._log_offset += 8 * len(new_ids)
+                for iid in new_ids:
+                    self._bloom_add(iid)
+                    self.pending.add(iid)
+            if len(self.pending) >= self.compact_threshold:
+                self._compact_locked()
+        return len(new_ids)
+
+    def add(self, item_id) -> bool:
+        return self.add_many([item_id]) == 1
+
+    # ----- 압축 -----
+
+    def _iter_base_file(self):
+        return self._iter_ids(self.bin_path)
+
+    def _iter_ids(self, path: str):
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(8 * 65536)
+                if not chunk:
+                    break
+                yield from struct.unpack(f'<{len(chunk) // 8}Q', chunk)
+
+    def _compact_locked(self):
+        self.refresh()
+        pending = sorted(self.pending)
+        total = len(self)
+
+        # 정렬된 bin과 pending을 병합하여 새 bin 작성
+        tmp_path = self.bin_path + '.tmp'
+        with open(tmp_path, 'wb') as out:
+            buffer = []
+            last = None
+            base = self._base if self._base is not None else []
+            i = j = 0
+            while i < len(base) or j < len(pending):
+                if j >= len(pending) or (i < len(base) and base[i] <= pending[j]):
+                    value = base[i]
+                    i += 1
+                else:
+                    value = pending[j]
+                    j += 1
+                if value == last:
+                    continue
+                last = value
+                buffer.append(value)
+                if len(buffer) >= 65536:
+                    out.write(struct.pack(f'<{len(buffer)}Q', *buffer))
+                    buffer = []
+            if buffer:
+                out.write(struct.pack(f'<{len(buffer)}Q', *buffer))
+
+        # 블룸을 먼저 교체 (bin만 바뀐 상태로 중단되면 새 id를 블룸이 걸러 버림)
+        self._write_bloom(self._iter_ids(tmp_path), total)
+        self._close_maps()
+        os.replace(tmp_path, self.bin_path)
+        open(self.log_path, 'wb').close()
+        self._open_files()
+
+    def compact(self):
+        """log의 id를 정렬 배열에 병합하고 블룸 필터 재생성"""
+        with _FileLock(self.lock_path):
+            self._compact_locked()
+
+
+def add_seen_set_argument(parser):
+    parser.add_argument('--seen-set', metavar='PREFIX',
+                        help='크롤러 공용 seen-set 경로 접두사 (이미 수집한 item_id는 상세 조회 생략)')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='디스크 기반 item_id seen-set 관리')
+    parser.add_argument('prefix', help='seen-set 경로 접두사 (예: seen_ids)')
+    parser.add_argument('--add-csv', action='append', help='CSV의 item_id 컬럼을 추가')
+    parser.add_argument('--check', type=int, action='append', help='item_id 포함 여부 확인')
+    parser.add_argument('--compact', action='store_true', help='log를 정렬 배열로 병합')
+    parser.add_argument('--stats', action='store_true', help='통계 출력')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with SeenSet(args.prefix) as seen:
+        for filepath in args.add_csv or []:
+            with open(filepath, 'r', encoding='utf-8-sig') as f:
+                ids = [int(row['item_id']) for row in csv.DictReader(f)
+                       if (row.get('item_id') or '').isdigit()]
+            added = seen.add_many(ids)
+            print(f'{filepath}: {len(ids)}개 중 {added}개 추가')
+        for item_id in args.check or []:
+            print(f'{item_id}: {"있음" if item_id in seen else "없음"}')
+        if args.compact:
+            seen.compact()
+            print('압축 완료')
+        if args.stats or not (args.add_csv or args.check or args.compact):
+            print(f'전체 id: {len(seen)}개 (압축 대기 {len(seen.pending)}개, '
+                  f'블룸 필터 {seen.m // 8 // 1024}KB, 해시 {seen.k}개)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+같은 요청이 동시에 진행 중일 때 한 번만 보내고 결과를 공유 (singleflight)
+여러 스레드가 이웃한 동을 동시에 수집하면 같은 item_id의 items/list, v3/items/{id} 요청이 겹침
+
+- SingleFlight: 키(예: item_id)별로 진행 중인 호출이 있으면 새로 보내지 않고 그 결과(또는 예외)를 기다림
+- BatchCoalescer: item_id 묶음 요청용. 요청한 id 중 다른 호출이 이미 가져오는 중인 id는 그 결과를 기다리고,
+  나머지만 청크로 나눠 요청 → 같은 id는 동시에 한 번만 요청되고 요청한 모든 호출이 결과를 받음
+  (완료된 결과는 보관하지 않음. 이미 수집한 id 제외는 기존 seen-set / known_ids 가 담당)
+
+사용 예:
+  _details = BatchCoalescer(_post_chunk, chunk_size=10, pause=0.8)
+  items = _details.fetch(item_ids)
+"""
+import threading
+import time
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+    def resolve(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.event.set()
+
+    def wait(self):
+        self.event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def item_key(item: dict):
+    iid = item.get('item_id') or item.get('id') or item.get('itemId')
+    return int(iid) if iid is not None else None
+
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.stats = {'calls': 0, 'shared': 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        """key에 대해 진행 중인 호출이 있으면 그 결과를, 없으면 fn(*args, **kwargs)를 실행한 결과를 반환"""
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                self.stats['shared'] += 1
+                owner = False
+            else:
+                call = self.calls[key] = _Call()
+                self.stats['calls'] += 1
+                owner = True
+        if not owner:
+            return call.wait()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result=result)
+        return result
+
+    def _finish(self, key, call, result=None, error=None):
+        with self.lock:
+            self.calls.pop(key, None)
+        call.resolve(result, error)
+
+
+class BatchCoalescer:
+    def __init__(self, fetch_chunk, chunk_size: int = 10, pause: float = 0.0, key=item_key):
+        """fetch_chunk(id 목록) → 매물 목록. pause: 직접 보낸 청크 사이 대기 시간(초)"""
+        self.fetch_chunk = fetch_chunk
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.key = key
+        self.lock = threading.Lock()
+        self.inflight = {}  # item_id → _Call
+        self.stats = {'requested': 0, 'fetched': 0, 'shared': 0}
+
+    def fetch(self, item_ids, chunk_size: int = None) -> list:
+        """item_ids의 매물 목록(요청 순서, 응답에 없는 id는 제외) 반환"""
+        chunk_size = chunk_size or self.chunk_size
+        ids = list(dict.fromkeys(int(i) for i in item_ids))
+        own, calls = [], {}
+        with self.lock:
+            for iid in ids:
+                call = self.inflight.get(iid)
+                if call is None:
+                    call = self.inflight[iid] = _Call()
+                    own.append(iid)
+                calls[iid] = call
+            self.stats['requested'] += len(ids)
+            self.stats['fetched'] += len(own)
+            self.stats['shared'] += len(ids) - len(own)
+
+        for start in range(0, len(own), chunk_size):
+            chunk = own[start:start + chunk_size]
+            try:
+                items = self.fetch_chunk(chunk)
+            except BaseException as e:
+                # 아직 보내지 않은 청크를 기다리는 호출도 풀어줌
+                self._resolve(own[start:], {}, e)
+                raise
+            by_id = {}
+            for item in items or []:
+                iid = self.key(item)
+                if iid is not None:
+                    by_id[iid] = item
+            self._resolve(chunk, by_id)
+            if self.pause and start + chunk_size < len(own):
+                time.sleep(self.pause)
+
+        results = []
+        for iid in ids:
+            item = calls[iid].wait()
+            if item is not None:
+                results.append(item)
+        return results
+
+    def _resolve(self, chunk: list, by_id: dict, error=None):
+        with self.lock:
+            for iid in chunk:
+                call = self.inflight.pop(iid, None)
+                if call is not None:
+                    call.resolve(by_id.get(iid), error)
@@ -0,0 +1,211 @@
+"""
+매물 스냅샷 비교 스크립트
+두 스냅샷(CSV 파일, 구별 CSV가 들어있는 폴더 또는 seoul_data.zip 형태의 아카이브)을 item_id 기준 외부 정렬-병합으로 비교하여
+신규(added) / 삭제(removed) / 가격 변경(changed: 보증금, 월세, 관리비) 매물을 스트림으로 출력
+
+스냅샷 크기와 관계없이 메모리에는 run 하나(기본 10만 행)만 올라감
+
+사용법:
+  python snapshot_diff.py <이전 스냅샷> <새 스냅샷>
+  python snapshot_diff.py seoul_data_1127/ seoul_data_1128/ --out-dir diff_1128
+  python snapshot_diff.py old.csv new.csv --run-size 50000
+  python snapshot_diff.py seoul_data_1127.zip seoul_data_1128.zip
+"""
+import argparse
+import csv
+import heapq
+import os
+import sys
+import tempfile
+
+from snapshot_loader import iter_zip_rows
+
+PRICE_FIELDS = ['deposit', 'rent', 'manage_cost']
+# 가격 외에 롤업 그룹/지표가 달라지는 필드 (rollups.py가 diff_snapshots(fields=DIFF_FIELDS)로 이동을 추적)
+ATTRIBUTE_FIELDS = ['local2', 'local3', 'service_type', 'size_m2']
+DIFF_FIELDS = PRICE_FIELDS + ATTRIBUTE_FIELDS
+
+
+def list_snapshot_files(path: str) -> list:
+    """스냅샷 경로를 CSV 파일 목록으로 변환 (폴더면 zigbang_*.csv 전체, 전체 합본 제외)"""
+    if os.path.isdir(path):
+        return [os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.endswith('.csv') and '_전체_' not in name]
+    return [path]
+
+
+def iter_snapshot_rows(path: str):
+    """스냅샷의 모든 행을 순서대로 반환 (item_id가 없는 행은 제외)"""
+    if path.lower().endswith('.zip'):
+        # zip은 압축을 풀지 않고 구별 멤버를 바로 스트리밍
+        for row in iter_zip_rows(path, typed=False):
+            item_id = row.get('item_id')
+            if item_id and item_id.isdigit():
+                yield row
+        return
+    for filepath in list_snapshot_files(path):
+        with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                item_id = row.get('item_id')
+                if item_id and item_id.isdigit():
+                    yield row
+
+
+def _sort_key(row: dict) -> int:
+    return int(row['item_id'])
+
+
+def _write_run(rows: list, fieldnames: list, tmp_dir: str) -> str:
+    rows.sort(key=_sort_key)
+    fd, run_path = tempfile.mkstemp(suffix='.csv', dir=tmp_dir)
+    with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+    return run_path
+
+
+def _read_run(run_path: str):
+    with open(run_path, 'r', encoding='utf-8', newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def external_sort(rows, tmp_dir: str, run_size: int = 100000):
+    """행 스트림을 item_id 순으로 정렬하여 반환 (run_size 행씩 정렬한 임시 파일을 k-way 병합)
+
+    같은 item_id가 여러 번 나오면 처음 나온 행만 유지
+    """
+    run_paths = []
+    buffer = []
+    fieldnames = None
+    for row in rows:
+        if fieldnames is None:
+            fieldnames = list(row.keys())
+        buffer.append(row)
+        if len(buffer) >= run_size:
+            run_paths.append(_write_run(buffer, fieldnames, tmp_dir))
+            buffer = []
+    if buffer:
+        run_paths.append(_write_run(buffer, fieldnames, tmp_dir))
+
+    # heapq.merge는 안정 병합이므로 같은 키는 앞선 run(먼저 읽은 행)이 먼저 나옴
+    last_id = None
+    for row in heapq.merge(*[_read_run(p) for p in run_paths], key=_sort_key):
+        item_id = _sort_key(row)
+        if item_id == last_id:
+            continue
+        last_id = item_id
+        yield row
+
+
+def _changes(old: dict, new: dict, fields: list) -> dict:
+    changes = {}
+    for field in fields:
+        before = (old.get(field) or '').strip()
+        after = (new.get(field) or '').strip()
+        if _normalize(before) != _normalize(after):
+            changes[field] = (before, after)
+    return changes
+
+
+def _normalize(value: str):
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def diff_snapshots(old_rows, new_rows, fields: list = PRICE_FIELDS):
+    """정렬된 두 행 스트림을 병합하며 ('added'|'removed'|'changed', 행, 변경 내역) 반환
+    변경 내역은 fields 중 값이 바뀐 필드의 {필드: (이전 값, 새 값)}"""
+    old_iter = iter(old_rows)
+    new_iter = iter(new_rows)
+    old = next(old_iter, None)
+    new = next(new_iter, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and _sort_key(old) < _sort_key(new)):
+            yield 'removed', old, None
+            old = next(old_iter, None)
+        elif old is None or _sort_key(new) < _sort_key(old):
+            yield 'added', new, None
+            new = next(new_iter, None)
+        else:
+            changes = _changes(old, new, fields)
+            if changes:
+                yield 'changed', new, changes
+            old = next(old_iter, None)
+            new = next(new_iter, None)
+
+
+class DiffWriter:
+    """added/removed/changed 결과를 각각의 CSV 파일로 스트리밍 저장"""
+
+    def __init__(self, out_dir: str, fields: list = PRICE_FIELDS):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.fields = fields  # changed.csv에 {필드}_before 로 이전 값을 기록할 필드
+        self.files = {}
+        self.writers = {}
+        self.counts = {'added': 0, 'removed': 0, 'changed': 0}
+
+    def _writer(self, kind: str, row: dict):
+        if kind not in self.writers:
+            fieldnames = list(row.keys())
+            if kind == 'changed':
+                fieldnames += [f'{field}_before' for field in self.fields]
+            f = open(os.path.join(self.out_dir, f'{kind}.csv'), 'w', encoding='utf-8-sig', newline='')
+            self.files[kind] = f
+            self.writers[kind] = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            self.writers[kind].writeheader()
+        return self.writers[kind]
+
+    def write(self, kind: str, row: dict, changes: dict = None):
+        writer = self._writer(kind, row)
+        if kind == 'changed':
+            row = dict(row)
+            for field in self.fields:
+                row[f'{field}_before'] = changes[field][0] if field in changes else row.get(field)
+        writer.writerow(row)
+        self.counts[kind] += 1
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='매물 스냅샷 비교 (added/removed/changed)')
+    parser.add_argument('old', help='이전 스냅샷 (CSV 파일, 구별 CSV 폴더 또는 zip)')
+    parser.add_argument('new', help='새 스냅샷 (CSV 파일, 구별 CSV 폴더 또는 zip)')
+    parser.add_argument('--out-dir', default='snapshot_diff', help='결과 저장 폴더')
+    parser.add_argument('--run-size', type=int, default=100000, help='정렬 run 하나의 최대 행 수 (메모리 상한)')
+    parser.add_argument('--tmp-dir', help='임시 run 파일 위치 (기본: 시스템 임시 폴더)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    for path in (args.old, args.new):
+        if not os.path.exists(path):
+            print(f'❌ 스냅샷을 찾을 수 없습니다: {path}')
+            sys.exit(1)
+
+    print(f'스냅샷 비교: {args.old} → {args.new}')
+    writer = DiffWriter(args.out_dir)
+    with tempfile.TemporaryDirectory(dir=args.tmp_dir) as tmp_dir:
+        old_sorted = external_sort(iter_snapshot_rows(args.old), tmp_dir, args.run_size)
+        new_sorted = external_sort(iter_snapshot_rows(args.new), tmp_dir, args.run_size)
+        try:
+            for kind, row, changes in diff_snapshots(old_sorted, new_sorted):
+                writer.write(kind, row, changes)
+        finally:
+            writer.close()
+
+    print(f'\n✅ 완료! ({args.out_dir}/)')
+    print(f'   - 신규: {writer.counts["added"]}개')
+    print(f'   - 삭제: {writer.counts["removed"]}개')
+    print(f'   - 가격 변경: {writer.counts["changed"]}개')
+
+
+if __name__ == '__main__':
+    main()
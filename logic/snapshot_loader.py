@@ -0,0 +1,209 @@
+"""
+seoul_data.zip 스냅샷 로더
+압축을 풀지 않고 zip 안의 구별 CSV를 바로 읽어 타입 변환된 행으로 반환
+
+- zip 멤버 이름의 #Uac15 형태(유니코드 이스케이프) 및 cp437로 잘못 읽힌 한글 이름 복원
+- 여러 구를 프로세스 풀로 병렬 로드
+- 파싱 결과를 아카이브 옆 캐시 폴더(seoul_data.zip.cache/)에 pickle로 저장하여
+  다음 로드부터 CSV 파싱 생략 (멤버 CRC가 바뀌면 자동으로 다시 파싱)
+
+사용법:
+  python snapshot_loader.py seoul_data.zip
+  python snapshot_loader.py seoul_data.zip --gu 강남구 --gu 관악구
+  python snapshot_loader.py seoul_data.zip --workers 8 --no-cache
+"""
+import argparse
+import csv
+import io
+import os
+import pickle
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from listing_store import ListingStore, INT_FIELDS, FLOAT_FIELDS, parse_number
+
+CACHE_VERSION = 2
+
+_ESCAPE_RE = re.compile(r'#U([0-9a-fA-F]{4})|#L([0-9a-fA-F]{8})')
+_GU_MEMBER_RE = re.compile(r'(?:^|/)zigbang_(.+)\.csv$')
+
+
+def decode_member_name(info: zipfile.ZipInfo) -> str:
+    """zip 멤버 이름을 원래 한글 이름으로 복원"""
+    name = info.filename
+    # UTF-8 플래그 없이 저장된 이름은 zipfile이 cp437로 읽으므로 원래 바이트로 되돌려 다시 디코딩
+    if not info.flag_bits & 0x800:
+        try:
+            raw = name.encode('cp437')
+        except UnicodeEncodeError:
+            raw = None
+        if raw is not None:
+            for encoding in ('utf-8', 'cp949'):
+                try:
+                    name = raw.decode(encoding)
+                    break
+                except UnicodeDecodeError:
+                    continue
+    return _ESCAPE_RE.sub(lambda m: chr(int(m.group(1) or m.group(2), 16)), name)
+
+
+def list_members(zip_path: str) -> dict:
+    """{복원된 멤버 이름: ZipInfo} (CSV 멤버만)"""
+    with zipfile.ZipFile(zip_path) as zf:
+        return {decode_member_name(info): info for info in zf.infolist()
+                if info.filename.lower().endswith('.csv')}
+
+
+def member_gu(name: str):
+    """'zigbang_강남구.csv' → '강남구' (구별 파일이 아니면 None)"""
+    m = _GU_MEMBER_RE.search(name)
+    if not m or '_전체_' in name:
+        return None
+    return m.group(1)
+
+
+def convert_value(field: str, value: str):
+    """CSV 문자열 값을 필드 타입에 맞게 변환 (빈 값은 None)"""
+    if value is None or value == '':
+        return None
+    if field in INT_FIELDS or field in FLOAT_FIELDS:
+        # 원래 표기 유지: '20' → 20, '1000.5' → 1000.5, 숫자가 아니면 None
+        return parse_number(value)
+    return value
+
+
+def iter_member_rows(zf: zipfile.ZipFile, info: zipfile.ZipInfo, typed: bool = True):
+    """zip 멤버 하나의 CSV 행을 스트리밍으로 반환"""
+    with zf.open(info) as raw:
+        text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        for row in csv.DictReader(text):
+            if typed:
+                row = {k: convert_value(k, v) for k, v in row.items()}
+            yield row
+
+
+def iter_zip_rows(zip_path: str, gus: list = None, typed: bool = True):
+    """아카이브의 구별 CSV 행을 구 이름 순서대로 스트리밍 (gus: 대상 구 목록)"""
+    members = list_members(zip_path)
+    with zipfile.ZipFile(zip_path) as zf:
+        for name in sorted(members):
+            gu = member_gu(name)
+            if gu is None or (gus and gu not in gus):
+                continue
+            yield from iter_member_rows(zf, members[name], typed=typed)
+
+
+def cache_dir_for(zip_path: str) -> str:
+    return zip_path + '.cache'
+
+
+def _cache_key(info: zipfile.ZipInfo) -> tuple:
+    return (CACHE_VERSION, info.CRC, info.file_size)
+
+
+def _read_cache(path: str, key: tuple):
+    try:
+        with open(path, 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if cached.get('key') != key:
+        return None
+    return cached
+
+
+def _write_cache(path: str, payload: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_gu(zip_path: str, member_name: str, use_cache: bool = True) -> tuple:
+    """구 하나 로드. (구 이름, 필드 목록, 행 튜플 목록, 캐시 사용 여부) 반환
+
+    프로세스 풀에서 호출되므로 인자와 반환값은 모두 pickle 가능한 값
+    """
+    with zipfile.ZipFile(zip_path) as zf:
+        info = next(i for i in zf.infolist() if decode_member_name(i) == member_name)
+        gu = member_gu(member_name)
+        cache_path = os.path.join(cache_dir_for(zip_path), f'{gu}.pkl')
+        key = _cache_key(info)
+
+        if use_cache:
+            cached = _read_cache(cache_path, key)
+            if cached is not None:
+                return gu, cached['fields'], cached['rows'], True
+
+        fields = None
+        rows = []
+        for row in iter_member_rows(zf, info, typed=True):
+            if fields is None:
+                fields = list(row.keys())
+            rows.append(tuple(row[f] for f in fields))
+
+    if use_cache:
+        _write_cache(cache_path, {'key': key, 'fields': fields or [], 'rows': rows})
+    return gu, fields or [], rows, False
+
+
+def _load_members(zip_path: str, gus: list, workers: int, use_cache: bool) -> list:
+    """대상 구 멤버를 (병렬로) 로드하여 load_gu 결과 목록 반환"""
+    members = [name for name in sorted(list_members(zip_path))
+               if member_gu(name) and (not gus or member_gu(name) in gus)]
+    if workers > 1 and len(members) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(load_gu, zip_path, name, use_cache) for name in members]
+            return [f.result() for f in futures]
+    return [load_gu(zip_path, name, use_cache) for name in members]
+
+
+def load_snapshot(zip_path: str, gus: list = None, workers: int = 4, use_cache: bool = True) -> dict:
+    """구별 CSV를 병렬로 로드하여 {구: 행 dict 목록} 반환"""
+    results = {}
+    for gu, fields, rows, _ in _load_members(zip_path, gus, workers, use_cache):
+        results[gu] = [dict(zip(fields, row)) for row in rows]
+    return results
+
+
+def load_store(zip_path: str, gus: list = None, workers: int = 4, use_cache: bool = True) -> ListingStore:
+    """스냅샷을 dict 목록 대신 열 기반 ListingStore로 로드 (같은 item_id는 처음 행만 유지)"""
+    store = None
+    for gu, fields, rows, _ in _load_members(zip_path, gus, workers, use_cache):
+        if not fields:
+            continue
+        if store is None:
+            store = ListingStore(fields)
+        for row in rows:
+            store.add(dict(zip(fields, row)))
+    return store if store is not None else ListingStore()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='seoul_data.zip 스냅샷 로더')
+    parser.add_argument('archive', nargs='?', default='seoul_data.zip', help='스냅샷 zip 파일')
+    parser.add_argument('--gu', action='append', help='대상 구 (여러 번 지정 가능, 기본: 전체)')
+    parser.add_argument('--workers', type=int, default=4, help='병렬 로드 프로세스 수')
+    parser.add_argument('--no-cache', action='store_true', help='캐시를 사용하지 않고 CSV를 다시 파싱')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.time()
+    snapshot = load_snapshot(args.archive, gus=args.gu, workers=args.workers,
+                             use_cache=not args.no_cache)
+    elapsed = time.time() - start
+
+    total = 0
+    for gu, rows in snapshot.items():
+        print(f'  {gu}: {len(rows)}개')
+        total += len(rows)
+    print(f'\n✅ 로드 완료: {len(snapshot)}개 구, {total}개 매물 ({elapsed:.2f}초)')
+
+
+if __name__ == '__main__':
+    main()
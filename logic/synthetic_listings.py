@@ -0,0 +1,340 @@
+"""
+서울 규모 합성 매물 생성기 (저장소/인덱스/스냅샷 비교 규모 테스트용)
+seoul_data.zip 은 1만여 건이라 1년치 일일 스냅샷 규모(10^5 ~ 10^7 행)의 테스트에는 작음
+
+- 분포: 기준 스냅샷(기본 seoul_data.zip)에서 동별 매물 비율·중심 좌표·좌표 분산과
+  구별 매물 속성(보증금, 월세, 면적, 층, 유형, 관리비, 제목)을 뽑아 프로필로 사용
+  → 동별 밀도는 기준 스냅샷 비율 그대로, 좌표는 동 중심 주변 정규분포, 가격은 같은 구 매물을 흔들어 생성
+- 매물 한 건은 (seed, item_id, 가격 버전)만으로 다시 만들 수 있으므로 1000만 건도 id 배열만 메모리에 유지
+- 스냅샷 간 변화(--churn, --price-change): 매일 일부 매물 삭제 + 같은 수의 신규 매물, 일부 매물 가격 인하/인상
+- 출력: 날짜별 seoul_data_YYYYMMDD/ 폴더 (zigbang_{구}.csv, search_all_seoul 저장 형식) 또는 --zip
+  --details 를 주면 /v3/items/{id} 응답 형태의 원본 JSON(details.jsonl, 한 줄에 한 건)도 저장
+
+생성한 스냅샷은 snapshot_diff / price_history / rollups / snapshot_loader 등에 그대로 넣고,
+목업 서버는 python mock_api.py --synthetic 1000000 으로 파일 없이 바로 사용
+
+사용법:
+  python synthetic_listings.py --rows 100000
+  python synthetic_listings.py --rows 1000000 --days 30 --churn 0.03 --price-change 0.02 --out-dir synthetic
+  python synthetic_listings.py --rows 10000000 --days 2 --zip --seed 7
+  python synthetic_listings.py --rows 100000 --details
+"""
+import argparse
+import bisect
+import csv
+import json
+import os
+import random
+import time
+import zipfile
+from array import array
+from datetime import date, datetime, timedelta
+
+from listing_store import SEOUL_FIELDS, THUMBNAIL_TEMPLATE
+from snapshot_diff import iter_snapshot_rows
+
+FIRST_ITEM_ID = 60000000  # 실제 매물 id와 겹치지 않는 범위에서 시작
+MIN_SPREAD = 0.002  # 매물이 적은 동의 좌표 표준편차 하한 (도, 약 200m)
+
+OPTIONS = ['에어컨', '냉장고', '세탁기', '가스레인지', '인덕션', '전자레인지', '책상', '옷장', '신발장', '침대', '비데', '도어락']
+AMENITIES = ['편의점', '카페', '병원', '약국', '은행', '마트', '공원', '세탁소']
+TAGS = ['풀옵션', '역세권', '신축', '주차가능', '엘리베이터', '반려동물', '즉시입주']
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def load_profile(path: str) -> dict:
+    """기준 스냅샷 → 생성 프로필 {clusters: [(구, 동, 위도, 경도, 위도σ, 경도σ)], weights, pools: 구 → 속성 목록}"""
+    stats = {}  # (구, 동) → [n, Σlat, Σlng, Σlat², Σlng²]
+    pools = {}
+    seen = set()
+    for row in iter_snapshot_rows(path):
+        if row['item_id'] in seen:
+            continue
+        seen.add(row['item_id'])
+        lat, lng = _number(row.get('lat')), _number(row.get('lng'))
+        gu, dong = row.get('local2') or row.get('search_gu'), row.get('local3') or row.get('search_dong')
+        if lat is None or lng is None or not gu or not dong:
+            continue
+        s = stats.setdefault((gu, dong), [0, 0.0, 0.0, 0.0, 0.0])
+        s[0] += 1
+        s[1] += lat
+        s[2] += lng
+        s[3] += lat * lat
+        s[4] += lng * lng
+        pools.setdefault(gu, []).append((
+            _number(row.get('deposit')), _number(row.get('rent')), _number(row.get('size_m2')),
+            row.get('floor') or '', row.get('service_type') or '', _number(row.get('manage_cost')),
+            row.get('title') or '',
+        ))
+    if not stats:
+        raise ValueError(f'기준 스냅샷에 좌표가 있는 매물이 없습니다: {path}')
+
+    clusters, weights = [], []
+    for (gu, dong), (n, slat, slng, slat2, slng2) in sorted(stats.items()):
+        mlat, mlng = slat / n, slng / n
+        sdlat = max((max(slat2 / n - mlat * mlat, 0.0)) ** 0.5, MIN_SPREAD)
+        sdlng = max((max(slng2 / n - mlng * mlng, 0.0)) ** 0.5, MIN_SPREAD)
+        clusters.append((gu, dong, mlat, mlng, sdlat, sdlng))
+        weights.append(n)
+    total = 0
+    cumulative = []
+    for w in weights:
+        total += w
+        cumulative.append(total)
+    return {'clusters': clusters, 'cumulative': cumulative, 'total': total, 'pools': pools}
+
+
+def _rng(seed: int, item_id: int, version: int = 0) -> random.Random:
+    return random.Random((seed * 1000003 + item_id) * 101 + version)
+
+
+def _round_price(value: float, step: int) -> int:
+    return max(int(round(value / step)) * step, 0)
+
+
+def _changed_price(value: int, factor: float, step: int, minimum: int = 0) -> int:
+    """factor를 적용해 step 단위로 반올림. 반올림 결과가 그대로면 factor 방향으로 한 단위 이동
+    (버전이 오를 때마다 가격이 실제로 바뀌어 advance()의 changed 수와 스냅샷 비교 결과가 같도록)"""
+    new = max(_round_price(value * factor, step), minimum)
+    if new == value:
+        new = value - step if factor < 1 and value - step >= minimum else value + step
+    return new
+
+
+def make_row(profile: dict, item_id: int, version: int = 0, seed: int = 0) -> dict:
+    """item_id 매물 한 건 (search_all_seoul CSV 컬럼). version이 바뀔 때마다 가격만 달라짐"""
+    rng = _rng(seed, item_id)
+    gu, dong, lat, lng, sdlat, sdlng = profile['clusters'][
+        bisect.bisect_right(profile['cumulative'], rng.random() * profile['total'])]
+    lat += max(min(rng.gauss(0, 1), 2.5), -2.5) * sdlat
+    lng += max(min(rng.gauss(0, 1), 2.5), -2.5) * sdlng
+    pool = profile['pools'][gu]
+    deposit, rent, size_m2, floor, service_type, manage_cost, title = pool[rng.randrange(len(pool))]
+    deposit = _round_price((deposit or 1000) * rng.lognormvariate(0, 0.2), 100 if (deposit or 0) >= 1000 else 50)
+    rent = _round_price((rent or 0) * rng.lognormvariate(0, 0.1), 1)
+    if version:
+        # 가격 변경: 버전마다 월세 또는 보증금을 -10% ~ +5% 조정 (인하가 더 흔함)
+        # 같은 난수열을 버전 수만큼 적용하므로 버전 n의 가격은 버전 n-1 가격에서 이어짐
+        change = _rng(seed, item_id, 1 << 15)
+        for _ in range(version):
+            factor = 1 + change.uniform(-0.10, 0.05)
+            if rent and change.random() < 0.7:
+                rent = _changed_price(rent, factor, 1, minimum=1)
+            else:
+                deposit = _changed_price(deposit, factor, 50)
+    if size_m2:
+        size_m2 = round(size_m2 * rng.uniform(0.9, 1.1), 2)
+    return {
+        'search_gu': gu,
+        'search_dong': dong,
+        'item_id': item_id,
+        'title': title,
+        'address': f'{gu} {dong}',
+        'local1': '서울시',
+        'local2': gu,
+        'local3': dong,
+        'deposit': deposit,
+        'rent': rent,
+        'size_m2': size_m2,
+        'floor': floor,
+        'service_type': service_type,
+        'manage_cost': int(manage_cost) if manage_cost is not None else None,
+        'lat': round(lat, 7),
+        'lng': round(lng, 7),
+        'thumbnail': THUMBNAIL_TEMPLATE.format(item_id),
+    }
+
+
+def detail_payload(row: dict, seed: int = 0) -> dict:
+    """CSV 행 → /v3/items/{id} 응답 형태 (fetch_item_details.parse_detail 이 읽는 필드 포함)"""
+    item_id = int(row['item_id'])
+    rng = _rng(seed, item_id, 1 << 16)
+    images = [f'https://ic.zigbang.com/ic/items/{item_id}/{i}.jpg' for i in range(1, rng.randint(3, 12))]
+    floor = row.get('floor')
+    return {
+        'item': {
+            'itemId': item_id,
+            'salesType': '월세' if row.get('rent') else '전세',
+            'serviceType': row.get('service_type'),
+            'roomType': rng.choice(['오픈형원룸', '분리형원룸', '복층형원룸', '투룸']),
+            'residenceType': rng.choice(['다세대', '다가구', '단독주택', '오피스텔']),
+            'status': True,
+            'price': {'deposit': row.get('deposit'), 'rent': row.get('rent')},
+            'area': {'전용면적M2': row.get('size_m2')},
+            'floor': {'floor': floor, 'allFloors': str(max(int(floor) if str(floor).isdigit() else 3, 3)
+                                                     + rng.randint(0, 10))},
+            'manageCost': {'amount': row.get('manage_cost'),
+                           'includes': rng.sample(['수도', '인터넷', 'TV', '청소비'], rng.randint(0, 3)),
+                           'notIncludes': rng.sample(['전기', '가스'], rng.randint(0, 2))},
+            'addressOrigin': {'local1': row.get('local1', ''), 'local2': row.get('local2', ''),
+                              'local3': row.get('local3', ''), 'fullText': row.get('address', '')},
+            'jibunAddress': f'{row.get("address", "")} {rng.randint(1, 999)}-{rng.randint(1, 40)}',
+            'location': {'lat': row.get('lat'), 'lng': row.get('lng')},
+            'title': row.get('title'),
+            'description': (row.get('title') or '') + '\n' + ' '.join(rng.choices(OPTIONS + AMENITIES, k=40)),
+            'options': rng.sample(OPTIONS, rng.randint(2, 9)),
+            'roomDirection': rng.choice(['S', 'SE', 'E', 'W', 'N', 'SW']),
+            'directionCriterion': '거실',
+            'parkingAvailableText': rng.choice(['가능', '불가능', '1대']),
+            'elevator': rng.random() < 0.6,
+            'bathroomCount': 1,
+            'moveinDate': '즉시입주',
+            'approveDate': f'{rng.randint(1990, 2024)}.{rng.randint(1, 12):02d}',
+            'neighborhoods': {'amenities': [{'title': t} for t in rng.sample(AMENITIES, 4)]},
+            'imageThumbnail': row.get('thumbnail'),
+            'images': images,
+            'updatedAt': datetime(2025, 1, 1).isoformat(),
+            'isPremium': rng.random() < 0.05,
+        },
+        'agent': {'agentName': f'직방공인중개사사무소 {item_id % 997}', 'agentTitle': '대표',
+                  'agentPhone': f'02-{rng.randint(100, 9999)}-{rng.randint(1000, 9999)}',
+                  'agentAddress': row.get('address', '')},
+        'subways': [{'name': f'{row.get("local3", "")}역', 'description': f'도보 {rng.randint(3, 20)}분'}],
+        'tags': rng.sample(TAGS, rng.randint(0, 3)),
+    }
+
+
+class Population:
+    """현재 살아 있는 매물 (item_id 배열 + 가격 버전 배열). 하루씩 churn 적용"""
+
+    def __init__(self, rows: int, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.ids = array('q', range(FIRST_ITEM_ID, FIRST_ITEM_ID + rows))
+        self.versions = array('H', bytes(2 * rows))
+        self.next_id = FIRST_ITEM_ID + rows
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def advance(self, churn: float, price_change: float, growth: float = 0.0) -> dict:
+        """하루 경과: churn 비율 삭제, 삭제 수(+growth 비율)만큼 신규, price_change 비율 가격 변경"""
+        n = len(self.ids)
+        removed = int(n * churn)
+        added = max(removed + int(n * growth), 0)
+        for i in sorted(self.rng.sample(range(n), removed), reverse=True):
+            # 순서는 의미가 없으므로 마지막 매물을 빈자리로 옮기고 배열 끝을 줄임
+            last = len(self.ids) - 1
+            self.ids[i] = self.ids[last]
+            self.versions[i] = self.versions[last]
+            self.ids.pop()
+            self.versions.pop()
+        self.ids.extend(range(self.next_id, self.next_id + added))
+        self.versions.extend(array('H', bytes(2 * added)))
+        self.next_id += added
+        changed = 0
+        for i in self.rng.sample(range(len(self.ids)), int(len(self.ids) * price_change)):
+            if self.versions[i] < 0xFFFF:
+                self.versions[i] += 1
+                changed += 1
+        return {'removed': removed, 'added': added, 'changed': changed}
+
+    def rows(self, profile: dict, seed: int = 0):
+        for item_id, version in zip(self.ids, self.versions):
+            yield make_row(profile, item_id, version, seed)
+
+
+def generate_rows(rows: int, reference: str = 'seoul_data.zip', seed: int = 0):
+    """첫날 스냅샷 rows건 (목업 서버 등에서 파일 없이 사용)"""
+    return Population(rows, seed).rows(load_profile(reference), seed)
+
+
+def write_snapshot(rows, out_path: str, as_zip: bool = False, details_path: str = None, seed: int = 0) -> int:
+    """구별 CSV(zigbang_{구}.csv) 폴더 또는 zip으로 저장 (임시 경로에 쓴 뒤 os.replace)"""
+    tmp_dir = out_path + '.tmp'
+    os.makedirs(tmp_dir, exist_ok=True)
+    files, writers = [], {}
+    details = open(details_path + '.tmp', 'w', encoding='utf-8') if details_path else None
+    count = 0
+    try:
+        for row in rows:
+            writer = writers.get(row['search_gu'])
+            if writer is None:
+                f = open(os.path.join(tmp_dir, f'zigbang_{row["search_gu"]}.csv'), 'w',
+                         encoding='utf-8-sig', newline='')
+                files.append(f)
+                writer = writers[row['search_gu']] = csv.writer(f)
+                writer.writerow(SEOUL_FIELDS)
+            writer.writerow(['' if row[k] is None else row[k] for k in SEOUL_FIELDS])
+            if details is not None:
+                details.write(json.dumps(detail_payload(row, seed), ensure_ascii=False))
+                details.write('\n')
+            count += 1
+    finally:
+        for f in files:
+            f.close()
+        if details is not None:
+            details.close()
+
+    names = sorted(os.listdir(tmp_dir))
+    if as_zip:
+        with zipfile.ZipFile(out_path + '.ziptmp', 'w', zipfile.ZIP_DEFLATED) as z:
+            for name in names:
+                z.write(os.path.join(tmp_dir, name), name)
+        _remove_dir(tmp_dir)
+        os.replace(out_path + '.ziptmp', out_path)
+    else:
+        if os.path.isdir(out_path):
+            _remove_dir(out_path)
+        os.replace(tmp_dir, out_path)
+    if details_path:
+        os.replace(details_path + '.tmp', details_path)
+    return count
+
+
+def _remove_dir(path: str):
+    for name in os.listdir(path):
+        os.remove(os.path.join(path, name))
+    os.rmdir(path)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='서울 규모 합성 매물 스냅샷 생성')
+    parser.add_argument('--rows', type=int, default=100000, help='첫날 매물 수')
+    parser.add_argument('--days', type=int, default=1, help='생성할 일일 스냅샷 수')
+    parser.add_argument('--churn', type=float, default=0.03, help='하루에 삭제(같은 수만큼 신규)되는 매물 비율')
+    parser.add_argument('--price-change', type=float, default=0.02, help='하루에 가격이 바뀌는 매물 비율')
+    parser.add_argument('--growth', type=float, default=0.0, help='하루 순증 비율 (음수면 감소)')
+    parser.add_argument('--start-date', default=date.today().isoformat(), help='첫 스냅샷 날짜 (YYYY-MM-DD)')
+    parser.add_argument('--reference', default='seoul_data.zip', help='분포를 가져올 기준 스냅샷')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out-dir', default='synthetic', help='출력 디렉토리')
+    parser.add_argument('--zip', action='store_true', help='날짜별 폴더 대신 seoul_data_YYYYMMDD.zip 으로 저장')
+    parser.add_argument('--details', action='store_true',
+                        help='/v3/items/{id} 응답 형태 원본 JSON(details_YYYYMMDD.jsonl)도 저장')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    profile = load_profile(args.reference)
+    print(f'기준 스냅샷: {args.reference} (동 {len(profile["clusters"])}개, 매물 {profile["total"]}개)')
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    population = Population(args.rows, args.seed)
+    day = date.fromisoformat(args.start_date)
+    total_start = time.time()
+    for d in range(args.days):
+        if d:
+            change = population.advance(args.churn, args.price_change, args.growth)
+            print(f'  변화: 삭제 {change["removed"]}, 신규 {change["added"]}, 가격 변경 {change["changed"]}')
+        stamp = day.strftime('%Y%m%d')
+        name = f'seoul_data_{stamp}' + ('.zip' if args.zip else '')
+        details = os.path.join(args.out_dir, f'details_{stamp}.jsonl') if args.details else None
+        start = time.time()
+        count = write_snapshot(population.rows(profile, args.seed), os.path.join(args.out_dir, name),
+                               as_zip=args.zip, details_path=details, seed=args.seed)
+        print(f'📊 {name}: {count}개 ({time.time() - start:.1f}초)')
+        day += timedelta(days=1)
+
+    print(f'\n✅ 완료! 스냅샷 {args.days}개 ({time.time() - total_start:.1f}초)')
+    print(f'   - 출력: {args.out_dir}/')
+
+
+if __name__ == '__main__':
+    main()
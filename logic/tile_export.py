@@ -0,0 +1,283 @@
+"""
+지도 표시용 타일 내보내기
+스냅샷을 줌 레벨별 타일 폴더(tiles/{z}/{x}/{y}.json, GeoJSON)와 구별 GeoJSON으로 변환
+브라우저 지도는 전체 CSV 대신 화면에 보이는 타일만 불러옴
+
+- 낮은 줌: 타일을 32x32 칸으로 나눠 칸별 클러스터(매물 수, 평균 보증금/월세, 중심 좌표)
+- 최대 줌: 개별 매물 점 (item_id, 보증금, 월세, 면적, 유형, 제목)
+- 구별 결과를 .parts/ 에 저장해 두고, 내용이 바뀐 구가 걸친 타일만 다시 생성
+
+사용법:
+  python tile_export.py seoul_data.zip
+  python tile_export.py seoul_data/ --out-dir tiles --min-zoom 10 --max-zoom 16
+  python tile_export.py seoul_data.zip --full    # 전체 다시 생성
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import pickle
+import shutil
+import time
+
+from snapshot_diff import iter_snapshot_rows
+
+CLUSTER_GRID = 32  # 클러스터 줌에서 타일 한 변을 나누는 칸 수
+OWN_ENTRIES = {'gu', '.parts', 'manifest.json', 'index.json'}  # 줌 번호 폴더 외에 내보내기가 만드는 항목
+POINT_FIELDS = ['item_id', 'deposit', 'rent', 'size_m2', 'service_type', 'title']
+
+
+def tile_coords(lat: float, lng: float, zoom: int) -> tuple:
+    """위경도 → (타일 x, 타일 y) 실수 좌표 (웹 메르카토르)"""
+    n = 1 << zoom
+    x = (lng + 180.0) / 360.0 * n
+    lat_rad = math.radians(lat)
+    y = (1.0 - math.log(math.tan(lat_rad) + 1 / math.cos(lat_rad)) / math.pi) / 2.0 * n
+    return x, y
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def gu_of(row: dict) -> str:
+    return row.get('local2') or row.get('search_gu') or '기타'
+
+
+def group_by_gu(rows) -> dict:
+    """item_id 중복을 제거하고 {구: [행]} 으로 묶음"""
+    groups = {}
+    seen = set()
+    for row in rows:
+        if row['item_id'] in seen:
+            continue
+        seen.add(row['item_id'])
+        if _number(row.get('lat')) is None or _number(row.get('lng')) is None:
+            continue
+        groups.setdefault(gu_of(row), []).append(row)
+    for rows in groups.values():
+        rows.sort(key=lambda r: int(r['item_id']))
+    return groups
+
+
+def gu_digest(rows: list) -> str:
+    """타일 내용에 영향을 주는 값으로 구별 변경 여부 판단 (rows는 item_id 순)"""
+    h = hashlib.sha1()
+    for row in rows:
+        h.update('\x1f'.join(str(row.get(f, '')) for f in POINT_FIELDS + ['lat', 'lng']).encode('utf-8'))
+        h.update(b'\x1e')
+    return h.hexdigest()
+
+
+def build_parts(rows: list, min_zoom: int, max_zoom: int) -> dict:
+    """구 하나의 타일별 기여분 {(z, x, y): {'clusters': {칸: [수, 위도 합, 경도 합, 보증금 합, 월세 합]},
+    'points': [feature]}}. 기여분은 더하기만 하면 여러 구를 합칠 수 있음"""
+    parts = {}
+    for row in rows:
+        lat, lng = float(row['lat']), float(row['lng'])
+        deposit = _number(row.get('deposit')) or 0.0
+        rent = _number(row.get('rent')) or 0.0
+        for z in range(min_zoom, max_zoom + 1):
+            fx, fy = tile_coords(lat, lng, z)
+            key = (z, int(fx), int(fy))
+            part = parts.setdefault(key, {'clusters': {}, 'points': []})
+            if z == max_zoom:
+                props = {f: row.get(f) for f in POINT_FIELDS}
+                part['points'].append({
+                    'type': 'Feature',
+                    'geometry': {'type': 'Point', 'coordinates': [lng, lat]},
+                    'properties': props,
+                })
+            else:
+                cell = (int((fx - int(fx)) * CLUSTER_GRID), int((fy - int(fy)) * CLUSTER_GRID))
+                acc = part['clusters'].setdefault(cell, [0, 0.0, 0.0, 0.0, 0.0])
+                acc[0] += 1
+                acc[1] += lat
+                acc[2] += lng
+                acc[3] += deposit
+                acc[4] += rent
+    return parts
+
+
+def merge_tile(contributions: list) -> dict:
+    """여러 구의 같은 타일 기여분을 GeoJSON FeatureCollection으로 합침"""
+    clusters = {}
+    features = []
+    for part in contributions:
+        features.extend(part['points'])
+        for cell, acc in part['clusters'].items():
+            total = clusters.setdefault(cell, [0, 0.0, 0.0, 0.0, 0.0])
+            for i, v in enumerate(acc):
+                total[i] += v
+    for cell in sorted(clusters):
+        n, slat, slng, sdep, srent = clusters[cell]
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [round(slng / n, 6), round(slat / n, 6)]},
+            'properties': {'cluster': True, 'count': n,
+                           'deposit_avg': round(sdep / n), 'rent_avg': round(srent / n)},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def write_gu_geojson(out_dir: str, gu: str, rows: list):
+    features = [{
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [float(r['lng']), float(r['lat'])]},
+        'properties': {f: r.get(f) for f in POINT_FIELDS},
+    } for r in rows]
+    write_json(os.path.join(out_dir, 'gu', f'{gu}.geojson'),
+               {'type': 'FeatureCollection', 'features': features})
+
+
+class TileExporter:
+    def __init__(self, out_dir: str, min_zoom: int = 10, max_zoom: int = 16):
+        self.out_dir = out_dir
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.parts_dir = os.path.join(out_dir, '.parts')
+        self.manifest_path = os.path.join(out_dir, 'manifest.json')
+
+    def _load_manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        # 줌 범위가 바뀌면 기존 기여분을 쓸 수 없음
+        if manifest.get('zoom') != [self.min_zoom, self.max_zoom]:
+            return {}
+        return manifest.get('gus', {})
+
+    def _part_path(self, gu: str) -> str:
+        return os.path.join(self.parts_dir, f'{gu}.pkl')
+
+    def _load_parts(self, gu: str) -> dict:
+        try:
+            with open(self._part_path(gu), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return {}
+
+    def _save_parts(self, gu: str, parts: dict):
+        os.makedirs(self.parts_dir, exist_ok=True)
+        tmp_path = self._part_path(gu) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(parts, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._part_path(gu))
+
+    def _clear_output(self):
+        """--full: 내보내기가 만든 항목(줌 번호 폴더, gu/, .parts/, manifest.json, index.json)만 삭제
+        그 밖의 파일/폴더가 있으면 다른 폴더를 잘못 지정한 것으로 보고 아무것도 지우지 않음"""
+        if not os.path.isdir(self.out_dir):
+            return
+        names = os.listdir(self.out_dir)
+        foreign = sorted(n for n in names
+                         if n.removesuffix('.tmp') not in OWN_ENTRIES and not n.isdigit())
+        if foreign:
+            raise ValueError(f'{self.out_dir} 에 타일 외의 항목이 있어 --full 로 지울 수 없습니다: '
+                             f'{", ".join(foreign[:5])}{" ..." if len(foreign) > 5 else ""}')
+        for name in names:
+            path = os.path.join(self.out_dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    def _tile_path(self, key: tuple) -> str:
+        z, x, y = key
+        return os.path.join(self.out_dir, str(z), str(x), f'{y}.json')
+
+    def export(self, groups: dict, full: bool = False) -> dict:
+        """구별 행으로 타일 갱신. {changed_gus, tiles_written, tiles_removed} 반환"""
+        old_digests = {} if full else self._load_manifest()
+        if full:
+            self._clear_output()
+
+        digests = {gu: gu_digest(rows) for gu, rows in groups.items()}
+        changed = sorted(gu for gu in set(digests) | set(old_digests)
+                         if digests.get(gu) != old_digests.get(gu))
+
+        # 바뀐 구의 이전/새 기여 타일을 모두 다시 써야 함
+        all_parts = {}
+        dirty = set()
+        for gu in changed:
+            dirty.update(self._load_parts(gu))
+            if gu in groups:
+                parts = build_parts(groups[gu], self.min_zoom, self.max_zoom)
+                self._save_parts(gu, parts)
+                write_gu_geojson(self.out_dir, gu, groups[gu])
+                all_parts[gu] = parts
+                dirty.update(parts)
+            else:
+                if os.path.exists(self._part_path(gu)):
+                    os.remove(self._part_path(gu))
+                gu_path = os.path.join(self.out_dir, 'gu', f'{gu}.geojson')
+                if os.path.exists(gu_path):
+                    os.remove(gu_path)
+
+        written = removed = 0
+        if dirty:
+            for gu in groups:
+                if gu not in all_parts:
+                    all_parts[gu] = self._load_parts(gu)
+            for key in dirty:
+                # 구 이름 순서로 합쳐서 부분 갱신과 전체 생성 결과가 같도록 함
+                contributions = [all_parts[gu][key] for gu in sorted(all_parts) if key in all_parts[gu]]
+                if contributions:
+                    write_json(self._tile_path(key), merge_tile(contributions))
+                    written += 1
+                elif os.path.exists(self._tile_path(key)):
+                    os.remove(self._tile_path(key))
+                    removed += 1
+
+        write_json(self.manifest_path, {'zoom': [self.min_zoom, self.max_zoom], 'gus': digests})
+        write_json(os.path.join(self.out_dir, 'index.json'), {
+            'minzoom': self.min_zoom,
+            'maxzoom': self.max_zoom,
+            'tiles': '{z}/{x}/{y}.json',
+            'gus': {gu: f'gu/{gu}.geojson' for gu in sorted(groups)},
+        })
+        return {'changed_gus': changed, 'tiles_written': written, 'tiles_removed': removed}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='지도용 줌 레벨별 타일 + 구별 GeoJSON 내보내기')
+    parser.add_argument('snapshot', help='스냅샷 (CSV 파일, 구별 CSV 폴더 또는 zip)')
+    parser.add_argument('--out-dir', default='tiles', help='타일 출력 폴더')
+    parser.add_argument('--min-zoom', type=int, default=10)
+    parser.add_argument('--max-zoom', type=int, default=16, help='개별 매물 점을 표시하는 줌')
+    parser.add_argument('--full', action='store_true', help='변경 여부와 관계없이 전체 다시 생성')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.time()
+    groups = group_by_gu(iter_snapshot_rows(args.snapshot))
+    exporter = TileExporter(args.out_dir, args.min_zoom, args.max_zoom)
+    try:
+        result = exporter.export(groups, full=args.full)
+    except ValueError as e:
+        print(f'❌ {e}')
+        return
+
+    print(f'✅ 완료! ({time.time() - start:.2f}초, {args.out_dir}/)')
+    print(f'   - 변경된 구: {len(result["changed_gus"])}개 '
+          f'{", ".join(result["changed_gus"][:10])}{" ..." if len(result["changed_gus"]) > 10 else ""}')
+    print(f'   - 타일 생성: {result["tiles_written"]}개, 삭제: {result["tiles_removed"]}개')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+SQLite 기반 로컬 작업 큐 (lease + heartbeat)
+여러 워커 프로세스(공유 파일시스템 위 여러 노드 포함)가 작업 단위를 나눠 처리
+
+- 작업 단위(unit)는 (seq, gu, dong) 으로 구성되며 seq는 단일 프로세스 순회 순서
+- 워커는 claim()으로 lease를 획득하고, heartbeat()로 연장, complete()로 완료 처리
+- lease가 만료된 작업은 다른 워커가 다시 claim 할 수 있음
+- 결과 매물은 items 테이블에 item_id 기준으로 병합되며,
+  같은 매물은 seq가 가장 작은 작업 단위에 귀속 (단일 프로세스 실행과 동일한 결과)
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    seq INTEGER PRIMARY KEY,
+    gu TEXT NOT NULL,
+    dong TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    item_id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    search_gu TEXT,
+    search_dong TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_units_status ON units(status, lease_until);
+"""
+
+
+def default_worker_id() -> str:
+    """호스트명 + PID 형태의 워커 식별자"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class WorkQueue:
+    """SQLite 파일 하나로 구성된 lease 기반 작업 큐"""
+
+    def __init__(self, path: str, lease_seconds: float = 300.0, max_attempts: int = 3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # isolation_level=None: 트랜잭션을 직접 BEGIN IMMEDIATE로 관리
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute('PRAGMA busy_timeout=60000')
+        # 네트워크 파일시스템에서는 WAL이 지원되지 않으므로 기본 저널 모드 사용
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _begin(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+
+    def init_units(self, units: list) -> int:
+        """(gu, dong) 목록을 순서대로 등록 (이미 등록된 큐면 추가하지 않음)"""
+        self._begin()
+        try:
+            count = self.conn.execute('SELECT COUNT(*) FROM units').fetchone()[0]
+            if count == 0:
+                self.conn.executemany(
+                    'INSERT INTO units (seq, gu, dong) VALUES (?, ?, ?)',
+                    [(seq, gu, dong) for seq, (gu, dong) in enumerate(units)])
+                count = len(units)
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        return count
+
+    def claim(self, worker_id: str):
+        """대기 중이거나 lease가 만료된 작업 하나를 획득. 없으면 None
+        lease가 만료된 작업은 시도 횟수를 다 쓴 경우 실패 처리 (매번 워커를 죽이거나 lease를 넘기는 작업이
+        끝없이 다시 할당되지 않도록)"""
+        now = time.time()
+        self._begin()
+        try:
+            self.conn.execute(
+                """UPDATE units SET status = 'failed', lease_until = NULL,
+                   error = 'lease 만료 (최대 시도 횟수 초과)'
+                   WHERE status = 'leased' AND lease_until < ? AND attempts >= ?""",
+                (now, self.max_attempts))
+            row = self.conn.execute(
+                """SELECT seq, gu, dong FROM units
+                   WHERE (status = 'pending')
+                      OR (status = 'leased' AND lease_until < ?)
+                   ORDER BY seq LIMIT 1""", (now,)).fetchone()
+            if row is None:
+                self.conn.execute('COMMIT')
+                return None
+            self.conn.execute(
+                """UPDATE units SET status = 'leased', owner = ?, lease_until = ?,
+                   attempts = attempts + 1 WHERE seq = ?""",
+                (worker_id, now + self.lease_seconds, row[0]))
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        return {'seq': row[0], 'gu': row[1], 'dong': row[2]}
+
+    def heartbeat(self, seq: int, worker_id: str) -> bool:
+        """lease 연장. 다른 워커에게 넘어간 작업이면 False"""
+        cur = self.conn.execute(
+            """UPDATE units SET lease_until = ?
+               WHERE seq = ? AND owner = ? AND status = 'leased'""",
+            (time.time() + self.lease_seconds, seq, worker_id))
+        return cur.rowcount == 1
+
+    def known_ids(self, item_ids: list) -> set:
+        """이미 다른 작업 단위에서 저장된 item_id 집합"""
+        found = set()
+        for i in range(0, len(item_ids), 500):
+            chunk = item_ids[i:i+500]
+            marks = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f'SELECT item_id FROM items WHERE item_id IN ({marks})', chunk)
+            found.update(r[0] for r in rows)
+        return found
+
+    def claim_ids(self, unit: dict, item_ids: list):
+        """이미 저장된 매물의 귀속을 더 앞선(seq가 작은) 작업 단위로 갱신"""
+        rows = [(unit['seq'], unit['gu'], unit['dong'], iid, unit['seq']) for iid in item_ids]
+        self._begin()
+        try:
+            self.conn.executemany(
+                """UPDATE items SET seq = ?, search_gu = ?, search_dong = ?
+                   WHERE item_id = ? AND seq > ?""", rows)
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def complete(self, unit: dict, worker_id: str, parsed_items: list) -> bool:
+        """작업 결과 저장 후 완료 처리. lease를 잃은 경우 False"""
+        self._begin()
+        try:
+            owner = self.conn.execute(
+                'SELECT owner, status FROM units WHERE seq = ?', (unit['seq'],)).fetchone()
+            if owner is None or owner[0] != worker_id or owner[1] != 'leased':
+                self.conn.execute('ROLLBACK')
+                return False
+            self.conn.executemany(
+                """INSERT INTO items (item_id, seq, search_gu, search_dong, data)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(item_id) DO UPDATE SET
+                       seq = excluded.seq,
+                       search_gu = excluded.search_gu,
+                       search_dong = excluded.search_dong
+                   WHERE excluded.seq < items.seq""",
+                # --boundaries 로 좌표가 속한 구/동이 다시 배정된 행은 그 값을 사용
+                [(int(p['item_id']), unit['seq'],
+                  p.get('search_gu') or unit['gu'], p.get('search_dong') or unit['dong'],
+                  json.dumps(p, ensure_ascii=False))
+                 for p in parsed_items if p.get('item_id')])
+            self.conn.execute(
+                "UPDATE units SET status = 'done', lease_until = NULL, error = NULL WHERE seq = ?",
+                (unit['seq'],))
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        return True
+
+    def fail(self, unit: dict, worker_id: str, error: str):
+        """작업 실패 기록. 최대 시도 횟수 미만이면 다시 대기 상태로"""
+        self.conn.execute(
+            """UPDATE units SET
+                   status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                   lease_until = NULL, error = ?
+               WHERE seq = ? AND owner = ?""",
+            (self.max_attempts, error[:500], unit['seq'], worker_id))
+
+    def release(self, unit: dict, worker_id: str):
+        """처리하지 못한 작업을 시도 횟수 차감 없이 대기 상태로 되돌림 (API 차단 등 워커 외부 원인)"""
+        self.conn.execute(
+            """UPDATE units SET status = 'pending', lease_until = NULL, attempts = attempts - 1
+               WHERE seq = ? AND owner = ? AND status = 'leased'""",
+            (unit['seq'], worker_id))
+
+    def stats(self) -> dict:
+        """상태별 작업 단위 수"""
+        rows = self.conn.execute('SELECT status, COUNT(*) FROM units GROUP BY status')
+        return {status: count for status, count in rows}
+
+    def iter_items(self):
+        """병합된 결과를 작업 순서(seq), 저장 순서대로 반환"""
+        rows = self.conn.execute(
+            'SELECT search_gu, search_dong, data FROM items ORDER BY seq, rowid')
+        for gu, dong, data in rows:
+            parsed = json.loads(data)
+            parsed['search_gu'] = gu
+            parsed['search_dong'] = dong
+            yield parsed
+
+
+class LeaseKeeper(threading.Thread):
+    """작업 처리 중 백그라운드에서 주기적으로 heartbeat를 보내는 스레드
+
+    sqlite 연결은 스레드 간 공유할 수 없으므로 별도 연결을 사용
+    """
+
+    def __init__(self, path: str, seq: int, worker_id: str, lease_seconds: float):
+        super().__init__(daemon=True)
+        self.path = path
+        self.seq = seq
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop_event = threading.Event()
+
+    def run(self):
+        queue = WorkQueue(self.path, lease_seconds=self.lease_seconds)
+        try:
+            while not self._stop_event.wait(self.lease_seconds / 3):
+                if not queue.heartbeat(self.seq, self.worker_id):
+                    self.lost = True
+                    break
+        finally:
+            queue.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
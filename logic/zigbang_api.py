@@ -0,0 +1,7 @@
+"""
+직방 API 공통 설정 (수집 스크립트들이 함께 사용)
+"""
+import os
+
+# 직방 API 주소 (ZIGBANG_API_BASE 환경 변수로 로컬 목업 서버 등으로 변경 가능)
+API_BASE = os.environ.get('ZIGBANG_API_BASE', 'https://apis.zigbang.com')
@@ -1,12 +1,15 @@
+import argparse
 import json
 import math
 import time
-import sys
-import os
 from typing import List, Tuple
 import requests
 
+from logic.zigbang_api import API_BASE
 from logic.zigbang_items_fetch import fetch_items
+from logic.profiling import staged, stage, add_profile_argument, start_profiling
+from logic.crawl_plan import (add_plan_arguments, start_recording, record_request, load_metrics,
+                              estimate, list_calls_per_unit, print_plan, save_plan)
 
 HEADERS = {
     'accept': 'application/json, text/plain, */*',
@@ -19,16 +22,18 @@ HEADERS = {
 }
 
 ENDPOINTS = [
-    'https://apis.zigbang.com/v2/items/oneroom',
-    'https://apis.zigbang.com/v2/items/oneroom/vip',
+    f'{API_BASE}/v2/items/oneroom',
+    f'{API_BASE}/v2/items/oneroom/vip',
 ]
 
 
+@staged('search')
 def geocode_region(region: str) -> Tuple[float, float]:
     url = 'https://nominatim.openstreetmap.org/search'
     params = {'q': region, 'format': 'json', 'limit': 1}
     r = requests.get(url, params=params, headers={
                      'User-Agent': HEADERS['user-agent']}, timeout=10)
+    record_request('search', r)
     r.raise_for_status()
     data = r.json()
     if not data:
@@ -59,8 +64,10 @@ def generate_grid(lat: float, lng: float, radius_km: float = 1.0, steps: int = 3
     return points
 
 
+@staged('map')
 def try_query_point(lat: float, lng: float, radius: float = 1.0) -> List[int]:
     found_ids = set()
+    attempt = 0
     params_candidates = [
         {'lat': lat, 'lng': lng, 'radius': radius, 'zoom_level': 15},
         {'centerLat': lat, 'centerLng': lng, 'radius': radius, 'zoom_level': 15},
@@ -68,11 +75,13 @@ def try_query_point(lat: float, lng: float, radius: float = 1.0) -> List[int]:
     ]
     for ep in ENDPOINTS:
         for params in params_candidates:
+            attempt += 1
             try:
                 r = requests.get(ep, params=params,
                                  headers=HEADERS, timeout=10)
             except Exception:
                 continue
+            record_request('map', r, attempt=attempt)
             if r.status_code != 200:
                 continue
             try:
@@ -132,11 +141,41 @@ def save_regions_map(map_obj: dict, path: str = 'regions_itemids.json'):
     print(f'지역별 itemId 맵 저장: {path}')
 
 
+def plan_regions(regions: List[str], args, radius_km: float = 0.8, steps: int = 3, pause: float = 0.6):
+    """API 호출 없이 지역별 격자 포인트와 예상 상세 청크로 요청 수/소요 시간 추정"""
+    metrics = load_metrics(args.metrics).get('zigbang_grid_search', {})
+    # 포인트 수는 중심 좌표와 무관하므로 지오코딩 없이 서울 중심으로 격자 생성
+    points = generate_grid(37.5665, 126.978, radius_km=radius_km, steps=steps)
+    chunks = list_calls_per_unit(metrics, chunk_size=50, map_calls_per_unit=len(points))
+    plan = estimate(len(regions), {'search': 1, 'map': len(points), 'list': chunks}, metrics,
+                    call_sleep={'map': pause, 'list': 0.5},
+                    default_requests={'map': len(ENDPOINTS) * 3},
+                    workers=args.plan_workers, rate=args.plan_rate)
+    print_plan(f'격자 검색 {len(regions)}개 지역 ({steps}x{steps}, 반경 {radius_km}km)', plan)
+    print(f'   지역당 포인트 {len(points)}개 × 요청 {len(ENDPOINTS) * 3}개 조합, 상세 청크 {chunks:.1f}개 (50개씩)')
+    if args.plan_out:
+        offsets = [(round(lat - 37.5665, 6), round(lng - 126.978, 6)) for lat, lng in points]
+        work = [{'region': region, 'grid_offsets': offsets, 'list': round(chunks, 2)}
+                for region in regions]
+        save_plan(args.plan_out, plan, work)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='격자 검색으로 지역별 itemId 수집')
+    parser.add_argument('regions', nargs='*', help='지역명 (기본: 서울특별시 마포구 망원동)')
+    add_profile_argument(parser)
+    add_plan_arguments(parser)
+    return parser.parse_args()
+
+
 def main():
-    if len(sys.argv) > 1:
-        regions = sys.argv[1:]
-    else:
-        regions = ['서울특별시 마포구 망원동']
+    args = parse_args()
+    regions = args.regions or ['서울특별시 마포구 망원동']
+    if args.plan:
+        plan_regions(regions, args)
+        return
+    start_profiling(args.profile)
+    start_recording('zigbang_grid_search', args.metrics)
 
     regions_map = {}
     for region in regions:
@@ -171,18 +210,19 @@ def main():
         out = f'zigbang_items_{safe}.csv'
         # reuse zigbang_items_fetch.save_to_csv? it was not exported; write simple csv here
         if combined:
-            from logic.zigbang_items_fetch import parse_item
-            parsed = [parse_item(it) for it in combined]
-            # write csv
-            import csv as _csv
-            fieldnames = ['item_id', 'title', 'address', 'deposit', 'rent', 'size_m2',
-                          'floor', 'service_type', 'manage_cost', 'reg_date', 'lat', 'lng', 'thumbnail']
-            with open(out, 'w', encoding='utf-8', newline='') as f:
-                w = _csv.DictWriter(f, fieldnames=fieldnames)
-                w.writeheader()
-                for p in parsed:
-                    w.writerow({k: p.get(k, '') for k in fieldnames})
-            print(f'  상세 저장: {out} (항목 수: {len(parsed)})')
+            with stage('write'):
+                from logic.zigbang_items_fetch import parse_item
+                parsed = [parse_item(it) for it in combined]
+                # write csv
+                import csv as _csv
+                fieldnames = ['item_id', 'title', 'address', 'deposit', 'rent', 'size_m2',
+                              'floor', 'service_type', 'manage_cost', 'reg_date', 'lat', 'lng', 'thumbnail']
+                with open(out, 'w', encoding='utf-8', newline='') as f:
+                    w = _csv.DictWriter(f, fieldnames=fieldnames)
+                    w.writeheader()
+                    for p in parsed:
+                        w.writerow({k: p.get(k, '') for k in fieldnames})
+                print(f'  상세 저장: {out} (항목 수: {len(parsed)})')
         else:
             print(f'  {region}: 상세 항목 없음')
 
@@ -1,7 +1,19 @@
+import argparse
 import requests
 import csv
 import sys
 
+try:
+    from profiling import staged, add_profile_argument, start_profiling
+    from crawl_plan import record_request
+    from singleflight import BatchCoalescer
+    from zigbang_api import API_BASE
+except ImportError:  # python -m logic.zigbang_grid_search 처럼 패키지 경로로 import된 경우
+    from logic.profiling import staged, add_profile_argument, start_profiling
+    from logic.crawl_plan import record_request
+    from logic.singleflight import BatchCoalescer
+    from logic.zigbang_api import API_BASE
+
 HEADERS = {
     'accept': 'application/json, text/plain, */*',
     'accept-language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7',
@@ -20,20 +32,31 @@ HEADERS = {
 }
 
 
+@staged('list')
 def fetch_items(item_ids):
     """POST 요청으로 여러 itemId의 상세 정보를 가져옵니다.
 
+    다른 스레드가 같은 itemId를 요청 중이면 그 id는 다시 보내지 않고 결과를 공유합니다.
     반환값: API가 반환한 items 목록 (리스트 of dict)
     """
-    url = 'https://apis.zigbang.com/house/property/v1/items/list'
+    return _list_batches.fetch(item_ids, chunk_size=max(len(item_ids), 1))
+
+
+def _post_items(item_ids):
+    url = f'{API_BASE}/house/property/v1/items/list'
     payload = {'itemIds': item_ids}
 
     resp = requests.post(url, headers=HEADERS, json=payload, timeout=15)
+    record_request('list', resp)
     resp.raise_for_status()
     data = resp.json()
     return data.get('items', [])
 
 
+_list_batches = BatchCoalescer(_post_items)
+
+
+@staged('parse')
 def parse_item(item: dict) -> dict:
     """응답 아이템에서 필요한 필드를 추출하여 평탄화합니다."""
     # 사용자 요청 필드: 매물 id, 주소, 보증금, 월세, 관리비, 매물 정보(타입), 위도, 경도
@@ -86,6 +109,7 @@ def parse_item(item: dict) -> dict:
     }
 
 
+@staged('write')
 def save_to_csv(items: list, out_path: str):
     if not items:
         print('저장할 항목이 없습니다.')
@@ -106,9 +130,19 @@ def save_to_csv(items: list, out_path: str):
     print(f'저장 완료: {out_path} (항목 수: {len(items)})')
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='itemIds로 매물 목록 조회')
+    parser.add_argument('item_ids', nargs='*', type=int, help='조회할 item_id (기본: 예시 목록)')
+    add_profile_argument(parser)
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    start_profiling(args.profile)
+
     # 예시 itemIds(요청자 제공 샘플)
-    item_ids = [
+    item_ids = args.item_ids or [
         46893661,
         46979712,
         47038095,
@@ -1,9 +1,14 @@
+import argparse
 import requests
 import csv
 import time
-import sys
 from math import ceil
 from zigbang_items_fetch import parse_item
+from map_filters import add_filter_arguments, filters_from_args, apply_map_filters, filter_items
+from seen_set import SeenSet, add_seen_set_argument
+from profiling import staged, add_profile_argument, start_profiling
+from map_tile_cache import MapTileCache
+from zigbang_api import API_BASE
 
 HEADERS_GET = {
     'accept': 'application/json, text/plain, */*',
@@ -25,10 +30,12 @@ HEADERS_POST = HEADERS_GET.copy()
 HEADERS_POST.update({'content-type': 'application/json'})
 
 
-def map_query(bbox_params: dict):
-    """지도 API(v2/items/oneroom)로 bbox를 주고 itemId 목록(및 좌표)을 받음."""
-    url = 'https://apis.zigbang.com/v2/items/oneroom'
-    resp = requests.get(url, params=bbox_params,
+def _fetch_map_points(bbox: tuple, params: dict):
+    """지도 API(v2/items/oneroom)로 bbox (south, north, west, east)를 주고 itemId 목록(및 좌표)을 받음."""
+    url = f'{API_BASE}/v2/items/oneroom'
+    south, north, west, east = bbox
+    params = dict(params, latSouth=str(south), latNorth=str(north), lngWest=str(west), lngEast=str(east))
+    resp = requests.get(url, params=params,
                         headers=HEADERS_GET, timeout=15)
     resp.raise_for_status()
     j = resp.json()
@@ -39,13 +46,26 @@ def map_query(bbox_params: dict):
     for it in items:
         # API 응답 샘플: {lat, lng, itemId, itemBmType}
         iid = it.get('itemId') or it.get('item_id')
-        if not iid:
+        if not iid or it.get('lat') is None or it.get('lng') is None:
             continue
         results.append(
             {'itemId': int(iid), 'lat': it.get('lat'), 'lng': it.get('lng')})
     return results
 
 
+# 지도 응답 타일 캐시 (같은 프로세스에서 겹치는 bbox를 다시 조회하면 없는 타일만 요청)
+_map_tiles = MapTileCache(_fetch_map_points)
+
+
+@staged('map')
+def map_query(bbox_params: dict):
+    """지도 API(v2/items/oneroom)로 bbox를 주고 itemId 목록(및 좌표)을 받음."""
+    bbox = tuple(float(bbox_params[k]) for k in ('latSouth', 'latNorth', 'lngWest', 'lngEast'))
+    params = {k: v for k, v in bbox_params.items() if k not in ('latSouth', 'latNorth', 'lngWest', 'lngEast')}
+    return _map_tiles.query(bbox, params)
+
+
+@staged('list')
 def fetch_details_by_ids(item_ids, chunk_size=15, max_retries=3, delay_between_chunks=1.0):
     """POST /house/property/v1/items/list로 상세정보를 받아옴 (chunk 처리).
 
@@ -53,7 +73,7 @@ def fetch_details_by_ids(item_ids, chunk_size=15, max_retries=3, delay_between_c
     - max_retries: 실패 시 재시도 횟수
     - delay_between_chunks: 청크 사이 대기 시간(초)
     """
-    url = 'https://apis.zigbang.com/house/property/v1/items/list'
+    url = f'{API_BASE}/house/property/v1/items/list'
     all_items = []
     total_chunks = ceil(len(item_ids) / chunk_size) if item_ids else 0
     for idx, i in enumerate(range(0, len(item_ids), chunk_size), start=1):
@@ -110,6 +130,7 @@ def fetch_details_by_ids(item_ids, chunk_size=15, max_retries=3, delay_between_c
     return all_items
 
 
+@staged('write')
 def save_parsed_items(parsed_items, out_path='zigbang_map_details.csv'):
     if not parsed_items:
         print('저장할 항목이 없습니다.')
@@ -124,10 +145,25 @@ def save_parsed_items(parsed_items, out_path='zigbang_map_details.csv'):
     print(f'저장 완료: {out_path} (항목 수: {len(parsed_items)})')
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='지도 bbox의 매물 상세 정보 수집')
+    parser.add_argument('bbox', nargs='*', help='<lngEast> <lngWest> <latSouth> <latNorth>')
+    add_seen_set_argument(parser)
+    add_filter_arguments(parser)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    if args.bbox and len(args.bbox) != 4:
+        parser.error('bbox는 <lngEast> <lngWest> <latSouth> <latNorth> 네 값이 필요합니다')
+    return args
+
+
 def main():
     # 간단한 CLI: 네 개의 좌표를 args로 받거나, 기본 샘플 bbox 사용
-    if len(sys.argv) == 5:
-        lngEast, lngWest, latSouth, latNorth = sys.argv[1:5]
+    args = parse_args()
+    start_profiling(args.profile)
+    filters = filters_from_args(args)
+    if args.bbox:
+        lngEast, lngWest, latSouth, latNorth = args.bbox
         params = {
             'lngEast': lngEast,
             'lngWest': lngWest,
@@ -135,18 +171,12 @@ def main():
             'latNorth': latNorth,
             'domain': 'zigbang',
             'checkAnyItemWithoutFilter': 'true',
-            'depositMin': '0',
-            'rentMin': '0',
         }
     else:
-        print('사용법: python zigbang_map_to_details.py <lngEast> <lngWest> <latSouth> <latNorth>')
+        print('사용법: python zigbang_map_to_details.py <lngEast> <lngWest> <latSouth> <latNorth> [검색 조건]')
         print('샘플 bbox로 실행합니다 (사용자 제공 예시)')
         params = {
             'geohash': 'wydj',
-            'depositMin': '0',
-            'rentMin': '0',
-            'salesTypes[0]': '전세',
-            'salesTypes[1]': '월세',
             'lngEast': '126.91202684097959',
             'lngWest': '126.89079894874561',
             'latSouth': '37.547755583927504',
@@ -154,6 +184,8 @@ def main():
             'domain': 'zigbang',
             'checkAnyItemWithoutFilter': 'true',
         }
+    # bbox 모드는 원래 거래 유형 조건 없이 조회 → --sales-type 을 지정한 경우에만 전달
+    params = apply_map_filters(params, filters, default_sales_types=None)
 
     print('지도 API로 itemId 수집 중...')
     map_items = map_query(params)
@@ -164,9 +196,15 @@ def main():
     # 고유한 itemId 추출
     unique_ids = sorted({it['itemId'] for it in map_items})
     print(f'수집된 itemId 수: {len(unique_ids)}')
+    seen = SeenSet(args.seen_set) if args.seen_set else None
+    if seen is not None:
+        unique_ids = seen.filter_new(unique_ids)
+        print(f'이전에 수집하지 않은 itemId 수: {len(unique_ids)}')
 
     # 상세 정보 요청
     detailed = fetch_details_by_ids(unique_ids)
+    # 지도 API가 일부 조건을 무시하는 경우를 대비해 상세 정보로 한 번 더 필터링
+    detailed = filter_items(detailed, filters)
     # parse_item으로 평탄화
     parsed = [parse_item(it) for it in detailed]
 
@@ -181,6 +219,9 @@ def main():
             p['lng'] = p.get('lng') or lng
 
     save_parsed_items(parsed)
+    # 저장한 매물만 seen-set에 기록 (조건에 맞지 않아 거른 매물은 다른 조건의 실행에서 다시 수집)
+    if seen is not None:
+        seen.add_many(p['item_id'] for p in parsed if p['item_id'])
 
 
 if __name__ == '__main__':